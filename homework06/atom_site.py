@@ -0,0 +1,193 @@
+"""
+Minimal reader for the _atom_site loop of an mmCIF file.
+
+Only the _atom_site loop is tokenized, and only the requested columns are kept from each
+row, so a summary that needs a handful of columns does not pay for building a full
+Bio.PDB Structure (or an MMCIF2Dict of every category). Rows of models that were not asked
+for are dropped as they are read, and reading stops once the requested models are done.
+"""
+import re
+from typing import Iterator
+
+# -------------------------
+# Constants (configuration)
+# -------------------------
+ATOM_SITE_PREFIX = '_atom_site.'
+MODEL_COLUMN = 'pdbx_PDB_model_num'
+
+# a quoted value only ends at a quote followed by whitespace, so "O5'" style names survive
+TOKEN_PATTERN = re.compile(r"""'(.*?)'(?=\s|$)|"(.*?)"(?=\s|$)|(\S+)""")
+
+# -------------------------
+# Classes
+# -------------------------
+class ModelSelection:
+    """
+    Which models of a structure to read: 'all', 'first', or a comma separated list of model
+    numbers such as '1,3,5'. keep() is called with the model number of every atom row in
+    file order and also tracks when no requested model can follow, so create one selection
+    per file read.
+    """
+    def __init__(self, spec: str = 'all'):
+        self.spec = spec
+        self.numbers = None
+        if spec not in ('all', 'first'):
+            numbers = [number.strip() for number in spec.split(',')]
+            if not numbers or not all(number.isdigit() for number in numbers):
+                raise ValueError(f"Model selection must be 'all', 'first' or model numbers such as 1,3,5, not '{spec}'")
+            self.numbers = {str(int(number)) for number in numbers}
+
+        self.started = False
+        self.current = None
+        self.current_kept = False
+        self.seen = set()
+        self.finished = False
+
+    @property
+    def everything(self) -> bool:
+        return self.spec == 'all'
+
+    def keep(self, model_num: str | None) -> bool:
+        """
+        Given the model number of the next atom row (None if the file has no model column),
+        returns whether the row belongs to a requested model. Once the requested models have
+        all been read, finished is set and every later row is dropped.
+        """
+        if self.everything:
+            return True
+
+        # a file without a model column gives None for every row, which is model 1
+        if not self.started or model_num != self.current:
+            number = str(int(model_num)) if model_num and model_num.isdigit() else '1'
+
+            # the first model ends at the first change of model number; listed models are
+            # done once each has been seen and an unlisted model follows
+            if self.started and (self.spec == 'first' or (self.numbers <= self.seen and number not in self.numbers)):
+                self.finished = True
+
+            self.started = True
+            self.current = model_num
+            self.current_kept = self.spec == 'first' or number in self.numbers
+            self.seen.add(number)
+
+        return self.current_kept and not self.finished
+
+# -------------------------
+# Functions
+# -------------------------
+def split_tokens(line: str) -> list[str]:
+    """
+    Given a line of a CIF loop, splits it into values, removing any quotes.
+    """
+    if "'" not in line and '"' not in line:
+        return line.split()
+    return [single or double or bare for single, double, bare in TOKEN_PATTERN.findall(line)]
+
+def iter_atom_site(handle: object, columns: list[str], models: ModelSelection | None = None) -> Iterator[tuple]:
+    """
+    Given an open mmCIF text handle and a list of _atom_site column names (without the
+    '_atom_site.' prefix), yields one tuple per atom row with the values of those columns,
+    or None for columns the file does not have. Reading stops at the end of the loop, or
+    as soon as the selected models have been read.
+
+    Args:
+        handle: text handle of the mmCIF file
+        columns: names of the _atom_site columns to return, e.g. ['group_PDB', 'auth_asym_id']
+        models: which models to read (default: all)
+
+    Returns:
+        Iterator[tuple]: the requested values of each atom row, in file order
+    """
+    lines = iter(handle)
+
+    # find a loop_ whose first item belongs to _atom_site
+    header = []
+    for line in lines:
+        if line.startswith('loop_'):
+            header = []
+        elif line.startswith(ATOM_SITE_PREFIX):
+            header.append(line.split()[0][len(ATOM_SITE_PREFIX):])
+        elif header:
+            break
+    else:
+        if not header:
+            raise ValueError("No _atom_site loop found")
+        return
+
+    # position of each requested column in a row, or None if missing
+    positions = [header.index(c) if c in header else None for c in columns]
+    model_position = header.index(MODEL_COLUMN) if MODEL_COLUMN in header else None
+    width = len(header)
+
+    pending = []
+    while True:
+        stripped = line.strip()
+        if line.startswith(('#', 'loop_', '_', 'data_')):
+            break
+        if stripped.startswith(';'):
+            raise ValueError("Multi-line text values are not supported in the _atom_site loop")
+
+        if stripped:
+            tokens = split_tokens(stripped)
+
+            # rows are almost always one per line, but a row may continue on following lines
+            if pending or len(tokens) != width:
+                pending.extend(tokens)
+                if len(pending) < width:
+                    line = next(lines, '#')
+                    continue
+                tokens, pending = pending[:width], pending[width:]
+
+            if models is None or models.keep(None if model_position is None else tokens[model_position]):
+                yield tuple(None if p is None else tokens[p] for p in positions)
+            elif models.finished:
+                return
+
+        line = next(lines, '#')
+
+def filter_models(handle: object, models: ModelSelection) -> Iterator[str]:
+    """
+    Given an open mmCIF text handle and a model selection, yields the lines of the file
+    without the _atom_site rows of models that were not selected, so a parser reading the
+    lines (e.g. MMCIFParser) never tokenizes the atoms of those models. Rows after the last
+    selected model are skipped without being split.
+
+    Args:
+        handle: text handle of the mmCIF file
+        models: which models to keep
+
+    Returns:
+        Iterator[str]: the lines that are kept
+    """
+    header = []
+    in_rows = False
+    width = 0
+    model_position = None
+
+    for line in handle:
+        if not in_rows:
+            if line.startswith('loop_'):
+                header = []
+            elif line.startswith(ATOM_SITE_PREFIX):
+                header.append(line.split()[0][len(ATOM_SITE_PREFIX):])
+            elif header:
+                # first row of the _atom_site loop; rows can only be told apart by model
+                # when the loop has a model column
+                in_rows = MODEL_COLUMN in header
+                width = len(header)
+                model_position = header.index(MODEL_COLUMN) if in_rows else None
+                header = []
+
+        if in_rows:
+            if line.startswith(('#', 'loop_', '_', 'data_')):
+                in_rows = False
+            elif line.strip():
+                if models.finished:
+                    continue
+
+                # a row split over several lines is kept whole rather than guessed at
+                tokens = split_tokens(line.strip())
+                if len(tokens) == width and not models.keep(tokens[model_position]):
+                    continue
+
+        yield line
@@ -0,0 +1,375 @@
+"""
+Columnar (NumPy) table of the atoms in the _atom_site loop of an mmCIF file.
+
+Each column of the loop that a summary needs becomes one array with a value per atom, and
+per-chain metrics are computed as group-bys over those arrays (np.unique, np.bincount and
+ufunc.reduceat), so summarizing a structure costs a few passes over the arrays instead of
+a walk over Bio.PDB Chain, Residue and Atom objects. Text columns are stored as integer
+codes into a list of labels, so every column is a plain typed array that can be saved to
+and memory-mapped from a structure archive (see structure_archive.py).
+"""
+import numpy as np
+from atom_site import ModelSelection, iter_atom_site
+from spatial_index import CellList
+
+# -------------------------
+# Constants (configuration)
+# -------------------------
+ATOM_TABLE_COLUMNS = [
+    'pdbx_PDB_model_num', 'auth_asym_id', 'auth_seq_id', 'label_seq_id', 'pdbx_PDB_ins_code',
+    'group_PDB', 'label_comp_id', 'label_atom_id', 'type_symbol',
+    'Cartn_x', 'Cartn_y', 'Cartn_z', 'occupancy', 'B_iso_or_equiv'
+]
+WATER_NAMES = ['HOH', 'WAT']
+MISSING_VALUES = ['.', '?']
+
+# per-atom arrays of a table and their stored types; the text columns (and model, whose
+# labels are the model numbers) hold codes into AtomTable.labels
+ATOM_ARRAYS = {
+    'model': '<i4', 'chain': '<i4', 'resseq': '<i4', 'icode': '<i4', 'hetfield': '<i4',
+    'atom_name': '<i4', 'element': '<i4', 'coords': '<f4', 'occupancy': '<f4', 'b_factor': '<f4'
+}
+
+# arrays of AtomTable.hierarchy and their stored types
+HIERARCHY_ARRAYS = {
+    'atom_chain': '<i4', 'chain_first_atom': '<i4', 'atom_residue': '<i4', 'residue_first_atom': '<i4'
+}
+
+# decimals kept in the per-chain metrics; mmCIF coordinates have three
+METRIC_DECIMALS = 3
+
+# -------------------------
+# Classes
+# -------------------------
+class AtomTable:
+    """
+    The atoms of a structure as parallel NumPy arrays (see ATOM_ARRAYS), one entry per atom
+    site: model (index of the model, in file order), chain, residue number, insertion code,
+    hetfield (' ', 'W' or H_<resname>, as in Bio.PDB residue IDs), atom name, element,
+    coordinates (n x 3), occupancy and B-factor.
+
+    The chain and residue of each atom (the hierarchy) are worked out on first use, unless
+    they are passed in, as they are when the table comes from a structure archive.
+    """
+    def __init__(self, arrays: dict[str, np.ndarray], labels: dict[str, list[str]], hierarchy: dict[str, np.ndarray] | None = None):
+        self.arrays = arrays
+        self.labels = labels
+        self.hierarchy = hierarchy
+
+        for name, values in arrays.items():
+            setattr(self, name, values)
+
+    def __len__(self) -> int:
+        return len(self.model)
+
+    @property
+    def hetero(self) -> np.ndarray:
+        is_hetero = np.array([label != ' ' for label in self.labels['hetfield']], dtype=bool)
+        return is_hetero[self.hetfield]
+
+    @property
+    def water(self) -> np.ndarray:
+        is_water = np.array([label == 'W' for label in self.labels['hetfield']], dtype=bool)
+        return is_water[self.hetfield]
+
+    def select_models(self, models: ModelSelection) -> 'AtomTable':
+        """
+        Given a model selection, returns a table of the atoms of the selected models only.
+        When they are one contiguous block of atoms (e.g. the first model), the new table's
+        arrays are views of this table's arrays, so nothing is copied.
+
+        Args:
+            models: which models to keep
+
+        Returns:
+            AtomTable: the atoms of the selected models (this table if all are selected)
+        """
+        kept_models = np.array([models.keep(label) for label in self.labels['model']], dtype=bool)
+        if kept_models.all():
+            return self
+
+        rows = np.flatnonzero(kept_models[self.model])
+        if len(rows) and rows[-1] - rows[0] + 1 == len(rows):
+            rows = slice(rows[0], rows[-1] + 1)
+        arrays = {name: values[rows] for name, values in self.arrays.items()}
+
+        # renumber the kept models from 0
+        renumber = np.cumsum(kept_models) - 1
+        arrays['model'] = renumber[arrays['model']].astype(np.int32)
+        labels = dict(self.labels, model=[label for label, kept in zip(self.labels['model'], kept_models) if kept])
+        return AtomTable(arrays, labels)
+
+    def build_hierarchy(self) -> dict[str, np.ndarray]:
+        """
+        Groups the atoms into chains, by (model, chain), and into residues, by (chain,
+        hetfield, residue number, insertion code), the key of a Bio.PDB Residue. Groups are
+        numbered in order of first appearance, as Bio.PDB orders them.
+
+        Returns:
+            dict[str, np.ndarray]: chain of each atom (atom_chain), first atom of each chain
+                                   (chain_first_atom), residue of each atom (atom_residue)
+                                   and first atom of each residue (residue_first_atom)
+        """
+        if self.hierarchy is None:
+            atom_chain, chain_first_atom = group_rows(self.model, self.chain)
+            atom_residue, residue_first_atom = group_rows(atom_chain, self.hetfield, self.resseq, self.icode)
+            self.hierarchy = {
+                'atom_chain': atom_chain, 'chain_first_atom': chain_first_atom,
+                'atom_residue': atom_residue, 'residue_first_atom': residue_first_atom
+            }
+        return self.hierarchy
+
+    def select_atoms(self, atom_residue: np.ndarray) -> np.ndarray:
+        """
+        Given the residue of each atom, picks one atom site per atom name of each residue:
+        of several alternate locations, the one with the highest occupancy (the first of equals),
+        which is the location Bio.PDB reports for a disordered atom.
+
+        Returns:
+            np.ndarray: indices of the selected atoms, in file order
+        """
+        atom_group, _ = group_rows(atom_residue, self.atom_name)
+
+        # within each atom group, rows sorted by descending occupancy then file order
+        order = np.lexsort((np.arange(len(self)), -self.occupancy, atom_group))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = atom_group[order][1:] != atom_group[order][:-1]
+        return np.sort(order[first])
+
+    def residue_contacts(self, cutoff: float) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Given a distance cutoff, finds the pairs of different residues of the same model that
+        have atoms within the cutoff of each other, using a cell list built once for the
+        structure. Waters are left out, and each atom is used at one location (see select_atoms).
+
+        Args:
+            cutoff: largest atom-atom distance of a contact, in angstroms
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: the two residues of each contact, each pair once
+        """
+        atom_residue = self.build_hierarchy()['atom_residue']
+        atoms = self.select_atoms(atom_residue)
+        atoms = atoms[~self.water[atoms]]
+
+        i, j = CellList(self.coords[atoms], cutoff).pairs()
+        i, j = atoms[i], atoms[j]
+        keep = (self.model[i] == self.model[j]) & (atom_residue[i] != atom_residue[j])
+
+        residue_pairs = np.sort(np.stack([atom_residue[i[keep]], atom_residue[j[keep]]], axis=1), axis=1)
+        residue_pairs = np.unique(residue_pairs, axis=0).reshape(-1, 2)
+        return residue_pairs[:, 0], residue_pairs[:, 1]
+
+    def summarize_contacts(self, cutoff: float) -> list[dict]:
+        """
+        Given a distance cutoff, summarizes the contacts of every chain: the residues that
+        touch another chain, the standard residues that touch a hetero group (a ligand such
+        as HEM; waters are not counted), and the number of residue-residue contacts with each
+        partner chain.
+
+        Args:
+            cutoff: largest atom-atom distance of a contact, in angstroms
+
+        Returns:
+            list[dict]: per chain, in order of first appearance: interface_residues,
+                        ligand_contact_residues and partner_contacts (partner chain ID ->
+                        number of residue pairs in contact)
+        """
+        hierarchy = self.build_hierarchy()
+        residue_first = hierarchy['residue_first_atom']
+        residue_chain = hierarchy['atom_chain'][residue_first]
+        residue_hetero = self.hetero[residue_first]
+        n_chains = len(hierarchy['chain_first_atom'])
+
+        a, b = self.residue_contacts(cutoff)
+
+        # both directions of every contact between residues of different chains
+        inter = residue_chain[a] != residue_chain[b]
+        own = np.r_[a[inter], b[inter]]
+        partner = np.r_[b[inter], a[inter]]
+        interface = np.unique(own)
+        interface_residues = np.bincount(residue_chain[interface], minlength=n_chains)
+
+        chain_pairs, pair_counts = np.unique(np.stack([residue_chain[own], residue_chain[partner]], axis=1),
+                                             axis=0, return_counts=True)
+        chain_pairs = chain_pairs.reshape(-1, 2)
+
+        # standard residues in contact with a hetero residue, of any chain
+        touching = np.r_[a[residue_hetero[b] & ~residue_hetero[a]], b[residue_hetero[a] & ~residue_hetero[b]]]
+        ligand_contacts = np.bincount(residue_chain[np.unique(touching)], minlength=n_chains)
+
+        chain_ids = [self.labels['chain'][self.chain[first]] for first in hierarchy['chain_first_atom']]
+        summaries = [
+            {'interface_residues': int(interface_residues[c]), 'ligand_contact_residues': int(ligand_contacts[c]),
+             'partner_contacts': {}}
+            for c in range(n_chains)
+        ]
+        for (c, p), count in zip(chain_pairs, pair_counts):
+            summaries[c]['partner_contacts'][chain_ids[p]] = int(count)
+        return summaries
+
+    def summarize_chains(self, geometry: bool = True, contact_distance: float | None = None) -> list[dict]:
+        """
+        Computes the residue counts and, optionally, the geometry and contacts of every chain
+        of every model with vectorized group-bys. Atoms are counted the way Bio.PDB iterates
+        them: once per atom name of a residue, whatever its number of alternate locations.
+
+        Args:
+            geometry: whether to add the atom count, centroid, radius of gyration, bounding
+                      box and mean B-factor of each chain
+            contact_distance: distance cutoff of the contacts added by summarize_contacts(),
+                              or None to leave contacts out
+
+        Returns:
+            list[dict]: per chain, in order of first appearance: chain_id, total_residues,
+                        standard_residues, hetero_residue_count and, with geometry,
+                        atom_count, centroid, radius_of_gyration, bounding_box_min,
+                        bounding_box_max, mean_b_factor, and with a contact_distance,
+                        interface_residues, ligand_contact_residues, partner_contacts
+        """
+        hierarchy = self.build_hierarchy()
+        atom_chain = hierarchy['atom_chain']
+        chain_first = hierarchy['chain_first_atom']
+        n_chains = len(chain_first)
+
+        # residue counts: the first atom of each residue stands for the residue
+        residue_first = hierarchy['residue_first_atom']
+        residue_chain = atom_chain[residue_first]
+        total_residues = np.bincount(residue_chain, minlength=n_chains)
+        hetero_residues = np.bincount(residue_chain, weights=self.hetero[residue_first], minlength=n_chains).astype(int)
+
+        chains = [
+            {
+                'chain_id': self.labels['chain'][self.chain[chain_first[i]]],
+                'total_residues': int(total_residues[i]),
+                'standard_residues': int(total_residues[i] - hetero_residues[i]),
+                'hetero_residue_count': int(hetero_residues[i])
+            }
+            for i in range(n_chains)
+        ]
+        if contact_distance is not None:
+            for chain, contacts in zip(chains, self.summarize_contacts(contact_distance)):
+                chain.update(contacts)
+        if not geometry:
+            return chains
+
+        # geometry of the selected atoms, sorted by chain so reduceat sees contiguous groups
+        atoms = self.select_atoms(hierarchy['atom_residue'])
+        atoms = atoms[np.argsort(atom_chain[atoms], kind='stable')]
+        selected_chain = atom_chain[atoms]
+        coords = self.coords[atoms].astype(np.float64)
+
+        atom_count = np.bincount(selected_chain, minlength=n_chains)
+        centroid = np.stack([np.bincount(selected_chain, weights=coords[:, axis], minlength=n_chains)
+                             for axis in range(3)], axis=1) / atom_count[:, None]
+        squared_distance = ((coords - centroid[selected_chain]) ** 2).sum(axis=1)
+        radius_of_gyration = np.sqrt(np.bincount(selected_chain, weights=squared_distance, minlength=n_chains) / atom_count)
+
+        starts = np.flatnonzero(np.r_[True, selected_chain[1:] != selected_chain[:-1]])
+        box_min = np.minimum.reduceat(coords, starts, axis=0)
+        box_max = np.maximum.reduceat(coords, starts, axis=0)
+        mean_b_factor = np.bincount(selected_chain, weights=self.b_factor[atoms], minlength=n_chains) / atom_count
+
+        def rounded(values: np.ndarray) -> list:
+            return np.round(values, METRIC_DECIMALS).tolist()
+
+        for i, chain in enumerate(chains):
+            chain.update({
+                'atom_count': int(atom_count[i]),
+                'centroid': rounded(centroid[i]),
+                'radius_of_gyration': rounded(radius_of_gyration[i]),
+                'bounding_box_min': rounded(box_min[i]),
+                'bounding_box_max': rounded(box_max[i]),
+                'mean_b_factor': rounded(mean_b_factor[i])
+            })
+        return chains
+
+# -------------------------
+# Functions
+# -------------------------
+def encode(values: tuple, missing: str) -> tuple[np.ndarray, list[str]]:
+    """
+    Given a column of strings (all None if the file does not have the column), returns an
+    integer code per value and the list of labels the codes point into.
+    """
+    if values[0] is None:
+        return np.zeros(len(values), dtype=np.int32), [missing]
+    labels, codes = np.unique(np.array(values), return_inverse=True)
+    return codes.reshape(-1).astype(np.int32), labels.tolist()
+
+def group_rows(*keys: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Given integer key arrays of the same length, numbers the distinct key combinations in
+    order of first appearance.
+
+    Args:
+        keys: one integer array per key column
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: group number of each row, and the index of the first
+                                       row of each group
+    """
+    _, first, inverse = np.unique(np.stack(keys, axis=1), axis=0, return_index=True, return_inverse=True)
+
+    # np.unique numbers groups in sorted key order; renumber them by first appearance
+    order = np.argsort(first)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    return rank[inverse.reshape(-1)].astype(np.int32), first[order].astype(np.int32)
+
+def to_float(values: tuple, missing: float) -> np.ndarray:
+    """
+    Given a column of number strings, returns them as 32-bit floats (as Bio.PDB stores
+    coordinates), with '.' and '?' (or a column the file does not have) as missing.
+    """
+    if values[0] is None:
+        return np.full(len(values), missing, dtype=np.float32)
+    column = np.array(values)
+    return np.where(np.isin(column, MISSING_VALUES), str(missing), column).astype(np.float32)
+
+def load_atom_table(handle: object, models: ModelSelection | None = None) -> AtomTable:
+    """
+    Given an open mmCIF text handle, reads the _atom_site loop into an AtomTable. As in
+    MMCIFParser, atoms without a residue number are left out, and a new model starts
+    whenever the model number changes. Rows of models that are not selected are dropped
+    as they are read.
+
+    Args:
+        handle: text handle of the mmCIF file
+        models: which models to read (default: all)
+
+    Returns:
+        AtomTable: the atoms of the structure
+    """
+    rows = [row for row in iter_atom_site(handle, ATOM_TABLE_COLUMNS, models) if (row[2] or row[3]) != '.']
+    if not rows:
+        raise ValueError("No atoms with a residue number in the _atom_site loop")
+
+    (model_num, chain, auth_seq, label_seq, icode, group, resname,
+     atom_name, element, x, y, z, occupancy, b_factor) = zip(*rows)
+
+    # auth_seq_id may be missing, in which case label_seq_id is the residue number
+    resseq = np.array(auth_seq if auth_seq[0] is not None else label_seq).astype(np.int32)
+
+    # each run of rows with the same model number is one model, labelled with that number
+    model_num = np.array(model_num)
+    new_model = np.r_[True, model_num[1:] != model_num[:-1]]
+    model = (np.cumsum(new_model) - 1).astype(np.int32)
+
+    resname = np.array(resname)
+    hetfield = np.where(np.array(group) != 'HETATM', ' ',
+                        np.where(np.isin(resname, WATER_NAMES), 'W', np.char.add('H_', resname)))
+    icode = np.array(icode)
+    icode = np.where(np.isin(icode, MISSING_VALUES) | (icode == None), ' ', icode)
+
+    arrays = {'model': model, 'resseq': resseq}
+    labels = {'model': [str(m) if m is not None else '1' for m in model_num[new_model]]}
+    for name, values, missing in [('chain', chain, ''), ('icode', icode, ' '), ('hetfield', hetfield, ' '),
+                                  ('atom_name', atom_name, ''), ('element', element, '?')]:
+        arrays[name], labels[name] = encode(tuple(values), missing)
+
+    arrays['coords'] = np.stack([to_float(x, np.nan), to_float(y, np.nan), to_float(z, np.nan)], axis=1)
+    arrays['occupancy'] = to_float(occupancy, 1.0)
+    arrays['b_factor'] = to_float(b_factor, np.nan)
+
+    return AtomTable(arrays, labels)
@@ -0,0 +1,134 @@
+"""
+Helpers shared by the homework06 benchmark scripts: synthetic input generation and
+timing of a script run in a child process.
+"""
+import os
+import random
+import subprocess
+import sys
+import time
+
+# directory holding the scripts being benchmarked
+SCRIPT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def make_synthetic_fastq(output_file: str, num_reads: int, read_length: int = 150, seed: int = 337) -> None:
+    """
+    Given an output file path, number of reads and read length, writes a synthetic Phred+33
+    FASTQ file with random bases and qualities that straddle the default Phred 30 cutoff.
+
+    Args:
+        output_file: path of output FASTQ file
+        num_reads: number of reads to write
+        read_length: number of bases in each read
+        seed: seed for the random number generator so runs are repeatable
+
+    Returns:
+        None: this function doesn't return a value; it writes to an output file
+    """
+    rng = random.Random(seed)
+
+    # a pool of quality strings is reused so generating large files stays fast
+    quality_pool = [
+        ''.join(chr(33 + rng.randint(20, 40)) for _ in range(read_length))
+        for _ in range(1000)
+    ]
+
+    with open(output_file, 'w') as outfile:
+        for i in range(num_reads):
+            sequence = ''.join(rng.choices('ACGT', k=read_length))
+            quality = quality_pool[i % len(quality_pool)]
+            outfile.write(f"@synthetic.{i + 1} length={read_length}\n{sequence}\n+\n{quality}\n")
+
+def run_timed(command: list[str]) -> tuple[float, int]:
+    """
+    Given a command line, runs it in a child process and measures it.
+
+    Args:
+        command: the command and its arguments
+
+    Returns:
+        tuple[float, int]: wall time in seconds and peak resident memory of the child in kB
+    """
+    start = time.perf_counter()
+    process = subprocess.Popen(command)
+
+    # wait4 reports the resource usage of this one child rather than all children so far
+    _, status, usage = os.wait4(process.pid, 0)
+    elapsed = time.perf_counter() - start
+    process.returncode = os.waitstatus_to_exitcode(status)
+
+    if process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, command)
+
+    return elapsed, usage.ru_maxrss
+
+def script_command(script: str, *script_args: str) -> list[str]:
+    """
+    Given the name of a homework06 script and its arguments, builds the command line that
+    runs it with the current Python interpreter.
+
+    Args:
+        script: file name of the script, e.g. 'fastq_filter.py'
+        script_args: command line arguments passed to the script
+
+    Returns:
+        list[str]: the command line
+    """
+    return [sys.executable, os.path.join(SCRIPT_DIR, script), *script_args]
+
+def make_synthetic_mmcif(source_file: str, output_file: str, copies: int = 1, models: int = 1, spacing: float = 0.0) -> int:
+    """
+    Given a source mmCIF file, writes a larger mmCIF file whose _atom_site loop repeats the
+    source atoms `copies` times under new chain IDs (A -> A0, A1, ...) in each of `models`
+    models, which mimics a large assembly or an NMR ensemble. Other categories are copied as is.
+    With a spacing, each copy is moved that many angstroms further along x, so copies do not
+    overlap and the atom density stays that of the source.
+
+    Args:
+        source_file: path of the source mmCIF file, e.g. 4HHB.cif
+        output_file: path of output mmCIF file
+        copies: number of copies of every chain in each model
+        models: number of models
+        spacing: shift along x between consecutive copies, in angstroms
+
+    Returns:
+        int: number of atom rows written
+    """
+    with open(source_file, 'r') as f:
+        lines = f.readlines()
+
+    # locate the _atom_site header and its rows
+    first = next(i for i, line in enumerate(lines) if line.startswith('_atom_site.'))
+    header_end = first
+    while lines[header_end].startswith('_atom_site.'):
+        header_end += 1
+    rows_end = header_end
+    while not lines[rows_end].startswith('#'):
+        rows_end += 1
+
+    header = [line.split()[0][len('_atom_site.'):] for line in lines[first:header_end]]
+    id_col = header.index('id')
+    auth_chain_col = header.index('auth_asym_id')
+    label_chain_col = header.index('label_asym_id')
+    model_col = header.index('pdbx_PDB_model_num')
+    x_col = header.index('Cartn_x')
+    rows = [line.split() for line in lines[header_end:rows_end]]
+
+    written = 0
+    with open(output_file, 'w') as outfile:
+        outfile.writelines(lines[:header_end])
+        for model in range(1, models + 1):
+            for copy in range(copies):
+                for row in rows:
+                    row = list(row)
+                    written += 1
+                    row[id_col] = str(written)
+                    row[auth_chain_col] = f'{row[auth_chain_col]}{copy}'
+                    row[label_chain_col] = f'{row[label_chain_col]}{copy}'
+                    row[model_col] = str(model)
+                    if spacing:
+                        row[x_col] = f'{float(row[x_col]) + copy * spacing:.3f}'
+                    outfile.write(' '.join(row) + '\n')
+        outfile.writelines(lines[rows_end:])
+
+    return written
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+import argparse
+import logging
+import os
+import shutil
+import socket
+import sys
+import tempfile
+from bench_utils import make_synthetic_fastq, run_timed, script_command
+
+# -------------------------
+# Constants (configuration)
+# -------------------------
+NUM_READS = 500000
+READ_LENGTH = 150
+COMPRESS_THREADS = 4
+
+# -------------------------
+# Logging and Command Line Inputs setup
+# -------------------------
+parser = argparse.ArgumentParser()
+parser.add_argument(
+    '-l', '--loglevel',
+    type=str,
+    required=False,
+    choices=['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'],
+    default='WARNING',
+    help='set log level to DEBUG, INFO, WARNING, ERROR, or CRITICAL (default: WARNING)'
+)
+parser.add_argument(
+    '-n', '--numReads',
+    type=int,
+    required=False,
+    default=NUM_READS,
+    help=f'The number of reads in the synthetic FASTQ file (default: {NUM_READS})'
+)
+parser.add_argument(
+    '-r', '--readLength',
+    type=int,
+    required=False,
+    default=READ_LENGTH,
+    help=f'The length of each synthetic read (default: {READ_LENGTH})'
+)
+parser.add_argument(
+    '-t', '--compressThreads',
+    type=int,
+    required=False,
+    default=COMPRESS_THREADS,
+    help=f'The number of threads used for BGZF output (default: {COMPRESS_THREADS})'
+)
+args = parser.parse_args()
+
+format_str = (
+    f'[%(asctime)s {socket.gethostname()}] '
+    '%(filename)s:%(funcName)s:%(lineno)s - %(levelname)s: %(message)s'
+)
+logging.basicConfig(level=args.loglevel, format=format_str)
+
+# -------------------------
+# Functions
+# -------------------------
+
+def main():
+
+    with tempfile.TemporaryDirectory() as tmp:
+        plain_file = os.path.join(tmp, 'synthetic.fastq')
+        gzip_file = plain_file + '.gz'
+        scratch_file = os.path.join(tmp, 'scratch.fastq')
+        output_file = os.path.join(tmp, 'clean.fastq')
+
+        logging.info(f"Writing {args.numReads} synthetic reads to '{gzip_file}'")
+        make_synthetic_fastq(plain_file, args.numReads, args.readLength)
+        gzip_command = shutil.which('gzip')
+        if gzip_command:
+            run_timed([gzip_command, '-k', plain_file])
+        else:
+            run_timed([sys.executable, '-m', 'gzip', plain_file])
+        os.remove(plain_file)
+
+        # decompress-first workflow: gunzip to scratch space, then filter the plain file
+        if gzip_command:
+            decompress_time, _ = run_timed(['sh', '-c', f'"{gzip_command}" -dc "{gzip_file}" > "{scratch_file}"'])
+        else:
+            shutil.copy(gzip_file, scratch_file + '.gz')
+            decompress_time, _ = run_timed([sys.executable, '-m', 'gzip', '-d', scratch_file + '.gz'])
+        filter_time, _ = run_timed(script_command('fastq_filter.py', '-f', scratch_file, '-o', output_file))
+        scratch_mb = os.path.getsize(scratch_file) / 1e6
+        os.remove(scratch_file)
+
+        # direct workflow: filter the gzip file, decompressing on a background thread
+        direct_time, _ = run_timed(script_command('fastq_filter.py', '-f', gzip_file, '-o', output_file))
+
+        # direct workflow with BGZF compressed output
+        bgzf_time, _ = run_timed(script_command(
+            'fastq_filter.py', '-f', gzip_file, '-o', output_file + '.gz',
+            '--bgzf', '--compressThreads', str(args.compressThreads)
+        ))
+
+        print(f"{'workflow':<34} {'seconds':>8} {'scratch MB':>11}")
+        print(f"{'gunzip then filter':<34} {decompress_time + filter_time:>8.2f} {scratch_mb:>11.1f}")
+        print(f"{'filter .gz directly':<34} {direct_time:>8.2f} {0:>11.1f}")
+        print(f"{'filter .gz directly, BGZF output':<34} {bgzf_time:>8.2f} {0:>11.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+import argparse
+import logging
+import os
+import socket
+import sys
+import tempfile
+import time
+import numpy as np
+from bench_utils import SCRIPT_DIR, make_synthetic_mmcif
+
+sys.path.insert(0, SCRIPT_DIR)
+from structure_archive import open_atom_table
+
+# -------------------------
+# Constants (configuration)
+# -------------------------
+SOURCE_CIF = os.path.join(SCRIPT_DIR, '4HHB.cif')
+COPIES = '1,2,5,10,20,50'
+CUTOFF = 4.0
+
+# 4HHB spans about 70 angstroms, so copies this far apart do not touch
+SPACING = 100.0
+
+# the all-pairs check is only run up to this many atoms
+ALL_PAIRS_MAX_ATOMS = 20000
+
+# -------------------------
+# Logging and Command Line Inputs setup
+# -------------------------
+parser = argparse.ArgumentParser()
+parser.add_argument(
+    '-l', '--loglevel',
+    type=str,
+    required=False,
+    choices=['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'],
+    default='WARNING',
+    help='set log level to DEBUG, INFO, WARNING, ERROR, or CRITICAL (default: WARNING)'
+)
+parser.add_argument(
+    '-m', '--mmciffile',
+    type=str,
+    required=False,
+    default=SOURCE_CIF,
+    help=f'The mmCIF file whose atoms are copied to build the inputs (default: {SOURCE_CIF})'
+)
+parser.add_argument(
+    '-c', '--copies',
+    type=str,
+    required=False,
+    default=COPIES,
+    help=f'Comma separated numbers of side by side copies of the structure, one input per value (default: {COPIES})'
+)
+args = parser.parse_args()
+
+format_str = (
+    f'[%(asctime)s {socket.gethostname()}] '
+    '%(filename)s:%(funcName)s:%(lineno)s - %(levelname)s: %(message)s'
+)
+logging.basicConfig(level=args.loglevel, format=format_str)
+
+# -------------------------
+# Functions
+# -------------------------
+def count_all_pairs(coords: np.ndarray, cutoff: float) -> int:
+    """
+    Given coordinates and a cutoff, counts the pairs within the cutoff by measuring every
+    pair of atoms, a block of rows at a time.
+    """
+    count = 0
+    for start in range(0, len(coords), 1000):
+        block = ((coords[start:start + 1000, None] - coords[None]) ** 2).sum(axis=-1) <= cutoff ** 2
+        count += int(block.sum())
+    return (count - len(coords)) // 2
+
+def main():
+
+    print(f"{'atoms':>9} {'contacts s':>11} {'us/atom':>8} {'all pairs s':>12}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for copies in [int(c) for c in args.copies.split(',')]:
+            input_file = os.path.join(tmp, f'copies{copies}.cif')
+            atoms = make_synthetic_mmcif(args.mmciffile, input_file, copies, spacing=SPACING)
+            table = open_atom_table(input_file)
+            table.build_hierarchy()
+
+            # spatial index: build it and summarize the contacts of every chain
+            start = time.perf_counter()
+            table.summarize_contacts(CUTOFF)
+            elapsed = time.perf_counter() - start
+
+            all_pairs = ''
+            if atoms <= ALL_PAIRS_MAX_ATOMS:
+                start = time.perf_counter()
+                count_all_pairs(table.coords.astype(np.float64), CUTOFF)
+                all_pairs = f'{time.perf_counter() - start:.2f}'
+
+            print(f"{atoms:>9} {elapsed:>11.3f} {elapsed / atoms * 1e6:>8.1f} {all_pairs:>12}")
+            os.remove(input_file)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+import argparse
+import filecmp
+import logging
+import os
+import socket
+import tempfile
+from bench_utils import make_synthetic_fastq, run_timed, script_command
+
+# -------------------------
+# Constants (configuration)
+# -------------------------
+NUM_READS = 200000
+READ_LENGTH = 150
+
+# -------------------------
+# Logging and Command Line Inputs setup
+# -------------------------
+parser = argparse.ArgumentParser()
+parser.add_argument(
+    '-l', '--loglevel',
+    type=str,
+    required=False,
+    choices=['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'],
+    default='WARNING',
+    help='set log level to DEBUG, INFO, WARNING, ERROR, or CRITICAL (default: WARNING)'
+)
+parser.add_argument(
+    '-n', '--numReads',
+    type=int,
+    required=False,
+    default=NUM_READS,
+    help=f'The number of reads in the synthetic FASTQ file (default: {NUM_READS})'
+)
+parser.add_argument(
+    '-r', '--readLength',
+    type=int,
+    required=False,
+    default=READ_LENGTH,
+    help=f'The length of each synthetic read (default: {READ_LENGTH})'
+)
+args = parser.parse_args()
+
+format_str = (
+    f'[%(asctime)s {socket.gethostname()}] '
+    '%(filename)s:%(funcName)s:%(lineno)s - %(levelname)s: %(message)s'
+)
+logging.basicConfig(level=args.loglevel, format=format_str)
+
+# -------------------------
+# Functions
+# -------------------------
+
+def main():
+
+    with tempfile.TemporaryDirectory() as tmp:
+        input_file = os.path.join(tmp, 'synthetic.fastq')
+
+        logging.info(f"Writing {args.numReads} synthetic reads to '{input_file}'")
+        make_synthetic_fastq(input_file, args.numReads, args.readLength)
+        size_mb = os.path.getsize(input_file) / 1e6
+
+        # run each engine on the same input and record wall time and peak memory
+        print(f"{'engine':<8} {'seconds':>8} {'reads/s':>10} {'MB/s':>8} {'peak RSS MB':>12}")
+        outputs = []
+        for engine in ['seqio', 'stream']:
+            output_file = os.path.join(tmp, f'{engine}.fastq')
+            elapsed, max_rss_kb = run_timed(script_command(
+                'fastq_filter.py', '-f', input_file, '-o', output_file, '-g', engine
+            ))
+            outputs.append(output_file)
+            print(f"{engine:<8} {elapsed:>8.2f} {args.numReads / elapsed:>10.0f} {size_mb / elapsed:>8.1f} {max_rss_kb / 1024:>12.1f}")
+
+        # both engines must write exactly the same reads
+        if not filecmp.cmp(*outputs, shallow=False):
+            logging.error("Engines produced different output files")
+            raise SystemExit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+import argparse
+import filecmp
+import logging
+import os
+import socket
+import tempfile
+from bench_utils import make_synthetic_fastq, run_timed, script_command
+
+# -------------------------
+# Constants (configuration)
+# -------------------------
+NUM_READS = 1000000
+READ_LENGTH = 150
+WORKER_COUNTS = '1,2,4,8,16'
+
+# -------------------------
+# Logging and Command Line Inputs setup
+# -------------------------
+parser = argparse.ArgumentParser()
+parser.add_argument(
+    '-l', '--loglevel',
+    type=str,
+    required=False,
+    choices=['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'],
+    default='WARNING',
+    help='set log level to DEBUG, INFO, WARNING, ERROR, or CRITICAL (default: WARNING)'
+)
+parser.add_argument(
+    '-n', '--numReads',
+    type=int,
+    required=False,
+    default=NUM_READS,
+    help=f'The number of reads in the synthetic FASTQ file (default: {NUM_READS})'
+)
+parser.add_argument(
+    '-r', '--readLength',
+    type=int,
+    required=False,
+    default=READ_LENGTH,
+    help=f'The length of each synthetic read (default: {READ_LENGTH})'
+)
+parser.add_argument(
+    '-w', '--workers',
+    type=str,
+    required=False,
+    default=WORKER_COUNTS,
+    help=f'Comma separated worker counts to run fastq_filter.py with (default: {WORKER_COUNTS})'
+)
+args = parser.parse_args()
+
+format_str = (
+    f'[%(asctime)s {socket.gethostname()}] '
+    '%(filename)s:%(funcName)s:%(lineno)s - %(levelname)s: %(message)s'
+)
+logging.basicConfig(level=args.loglevel, format=format_str)
+
+# -------------------------
+# Functions
+# -------------------------
+
+def main():
+
+    worker_counts = [int(w) for w in args.workers.split(',')]
+    logging.info(f"Host has {os.cpu_count()} CPUs")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        input_file = os.path.join(tmp, 'synthetic.fastq')
+
+        logging.info(f"Writing {args.numReads} synthetic reads to '{input_file}'")
+        make_synthetic_fastq(input_file, args.numReads, args.readLength)
+        size_mb = os.path.getsize(input_file) / 1e6
+
+        # run the stream engine with each worker count and compare against the first run
+        print(f"{'workers':>7} {'seconds':>8} {'reads/s':>10} {'MB/s':>8} {'speedup':>8}")
+        baseline_output = None
+        baseline_time = None
+        for workers in worker_counts:
+            output_file = os.path.join(tmp, f'workers{workers}.fastq')
+            elapsed, _ = run_timed(script_command(
+                'fastq_filter.py', '-f', input_file, '-o', output_file, '-w', str(workers)
+            ))
+
+            if baseline_output is None:
+                baseline_output, baseline_time = output_file, elapsed
+            elif not filecmp.cmp(baseline_output, output_file, shallow=False):
+                logging.error(f"Output with {workers} workers differs from output with {worker_counts[0]}")
+                raise SystemExit(1)
+
+            print(f"{workers:>7} {elapsed:>8.2f} {args.numReads / elapsed:>10.0f} {size_mb / elapsed:>8.1f} {baseline_time / elapsed:>8.2f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import logging
+import os
+import socket
+import tempfile
+from bench_utils import SCRIPT_DIR, make_synthetic_mmcif, run_timed, script_command
+
+# -------------------------
+# Constants (configuration)
+# -------------------------
+SOURCE_CIF = os.path.join(SCRIPT_DIR, '4HHB.cif')
+MODELS = '1,20,50'
+
+# -------------------------
+# Logging and Command Line Inputs setup
+# -------------------------
+parser = argparse.ArgumentParser()
+parser.add_argument(
+    '-l', '--loglevel',
+    type=str,
+    required=False,
+    choices=['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'],
+    default='WARNING',
+    help='set log level to DEBUG, INFO, WARNING, ERROR, or CRITICAL (default: WARNING)'
+)
+parser.add_argument(
+    '-m', '--mmciffile',
+    type=str,
+    required=False,
+    default=SOURCE_CIF,
+    help=f'The mmCIF file whose atoms are copied into every model of the inputs (default: {SOURCE_CIF})'
+)
+parser.add_argument(
+    '-n', '--models',
+    type=str,
+    required=False,
+    default=MODELS,
+    help=f'Comma separated numbers of models, one input per value (default: {MODELS})'
+)
+args = parser.parse_args()
+
+format_str = (
+    f'[%(asctime)s {socket.gethostname()}] '
+    '%(filename)s:%(funcName)s:%(lineno)s - %(levelname)s: %(message)s'
+)
+logging.basicConfig(level=args.loglevel, format=format_str)
+
+# -------------------------
+# Functions
+# -------------------------
+
+def main():
+
+    print(f"{'models':>6} {'atoms':>9} {'mode':<10} {'--models':<8} {'seconds':>8} {'peak RSS MB':>12} {'JSON kB':>8}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for models in [int(n) for n in args.models.split(',')]:
+            input_file = os.path.join(tmp, f'models{models}.cif')
+            atoms = make_synthetic_mmcif(args.mmciffile, input_file, models=models)
+
+            # every model is a copy of the first, so reading only the first gives the same
+            # chains as reading them all and collapsing them
+            for mode, flags in [('biopython', []), ('fast', ['-f']), ('geometry', ['-g'])]:
+                outputs = {}
+                for selection, selection_flags in [('all', ['--collapseModels']), ('first', ['--models', 'first'])]:
+                    output_file = os.path.join(tmp, f'models{models}_{mode}_{selection}.json')
+                    elapsed, max_rss_kb = run_timed(script_command(
+                        'mmcif_summary.py', '-l', 'ERROR', '-m', input_file, '-o', output_file, '--noCache', *flags, *selection_flags
+                    ))
+                    with open(output_file) as f:
+                        outputs[selection] = json.load(f)['chains']
+                    size_kb = os.path.getsize(output_file) / 1024
+                    print(f"{models:>6} {atoms:>9} {mode:<10} {selection:<8} {elapsed:>8.2f} {max_rss_kb / 1024:>12.1f} {size_kb:>8.1f}")
+
+                collapsed = [{k: v for k, v in chain.items() if k != 'model_count'} for chain in outputs['all']]
+                if collapsed != outputs['first'] or any(chain['model_count'] != models for chain in outputs['all']):
+                    logging.error(f"Summaries of all and first models differ for {models} models ({mode})")
+                    raise SystemExit(1)
+            os.remove(input_file)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import logging
+import os
+import socket
+import tempfile
+from bench_utils import SCRIPT_DIR, make_synthetic_mmcif, run_timed, script_command
+
+# -------------------------
+# Constants (configuration)
+# -------------------------
+SOURCE_CIF = os.path.join(SCRIPT_DIR, '4HHB.cif')
+COPIES = '1,10,50'
+
+# -------------------------
+# Logging and Command Line Inputs setup
+# -------------------------
+parser = argparse.ArgumentParser()
+parser.add_argument(
+    '-l', '--loglevel',
+    type=str,
+    required=False,
+    choices=['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'],
+    default='WARNING',
+    help='set log level to DEBUG, INFO, WARNING, ERROR, or CRITICAL (default: WARNING)'
+)
+parser.add_argument(
+    '-m', '--mmciffile',
+    type=str,
+    required=False,
+    default=SOURCE_CIF,
+    help=f'The mmCIF file whose atoms are copied to build the inputs (default: {SOURCE_CIF})'
+)
+parser.add_argument(
+    '-c', '--copies',
+    type=str,
+    required=False,
+    default=COPIES,
+    help=f'Comma separated numbers of copies of every chain, one input per value (default: {COPIES})'
+)
+args = parser.parse_args()
+
+format_str = (
+    f'[%(asctime)s {socket.gethostname()}] '
+    '%(filename)s:%(funcName)s:%(lineno)s - %(levelname)s: %(message)s'
+)
+logging.basicConfig(level=args.loglevel, format=format_str)
+
+# -------------------------
+# Functions
+# -------------------------
+
+def main():
+
+    print(f"{'atoms':>9} {'mode':<10} {'seconds':>8} {'peak RSS MB':>12}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for copies in [int(c) for c in args.copies.split(',')]:
+            input_file = os.path.join(tmp, f'copies{copies}.cif')
+            atoms = make_synthetic_mmcif(args.mmciffile, input_file, copies)
+
+            # summarize with and without building the Bio.PDB Structure, and from the atom
+            # table with geometry added; the cache is skipped so every run does the work
+            outputs = []
+            for mode, flags in [('biopython', []), ('fast', ['-f']), ('geometry', ['-g'])]:
+                output_file = os.path.join(tmp, f'copies{copies}_{mode}.json')
+                elapsed, max_rss_kb = run_timed(script_command(
+                    'mmcif_summary.py', '-l', 'ERROR', '-m', input_file, '-o', output_file, '--noCache', *flags
+                ))
+                with open(output_file) as f:
+                    outputs.append(json.load(f))
+                print(f"{atoms:>9} {mode:<10} {elapsed:>8.2f} {max_rss_kb / 1024:>12.1f}")
+
+            # the geometry summary has extra fields, but the same residue counts
+            counts = [{k: chain[k] for k in outputs[0]['chains'][0]} for chain in outputs[2]['chains']]
+            if outputs[0] != outputs[1] or outputs[0]['chains'] != counts:
+                logging.error(f"Summaries differ for {copies} copies")
+                raise SystemExit(1)
+            os.remove(input_file)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+import argparse
+import logging
+import os
+import socket
+import sys
+import tempfile
+from bench_utils import SCRIPT_DIR, make_synthetic_mmcif, run_timed, script_command
+
+# -------------------------
+# Constants (configuration)
+# -------------------------
+SOURCE_CIF = os.path.join(SCRIPT_DIR, '4HHB.cif')
+COPIES = '1,50'
+
+# loaders run in a fresh interpreter each; each writes the seconds spent loading (after
+# imports) to the file given as its second argument
+LOADERS = {
+    'MMCIFParser': (
+        "from Bio.PDB.MMCIFParser import MMCIFParser\n"
+        "structure = MMCIFParser(QUIET=True).get_structure('bench', path)\n"
+        "atoms = sum(1 for _ in structure.get_atoms())\n"
+    ),
+    'atom table': (
+        "from structure_archive import open_atom_table\n"
+        "open_atom_table(path).summarize_chains(geometry=False)\n"
+    ),
+    'archive': (
+        "from structure_archive import open_atom_table\n"
+        "open_atom_table(path).summarize_chains(geometry=False)\n"
+    )
+}
+LOADER_TEMPLATE = (
+    "import sys, time\n"
+    "sys.path.insert(0, {script_dir!r})\n"
+    "path, timing_file = sys.argv[1:3]\n"
+    "import numpy\n"
+    "start = time.perf_counter()\n"
+    "{body}"
+    "open(timing_file, 'w').write(str(time.perf_counter() - start))\n"
+)
+
+# -------------------------
+# Logging and Command Line Inputs setup
+# -------------------------
+parser = argparse.ArgumentParser()
+parser.add_argument(
+    '-l', '--loglevel',
+    type=str,
+    required=False,
+    choices=['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'],
+    default='WARNING',
+    help='set log level to DEBUG, INFO, WARNING, ERROR, or CRITICAL (default: WARNING)'
+)
+parser.add_argument(
+    '-m', '--mmciffile',
+    type=str,
+    required=False,
+    default=SOURCE_CIF,
+    help=f'The mmCIF file whose atoms are copied to build the inputs (default: {SOURCE_CIF})'
+)
+parser.add_argument(
+    '-c', '--copies',
+    type=str,
+    required=False,
+    default=COPIES,
+    help=f'Comma separated numbers of copies of every chain, one input per value (default: {COPIES})'
+)
+args = parser.parse_args()
+
+format_str = (
+    f'[%(asctime)s {socket.gethostname()}] '
+    '%(filename)s:%(funcName)s:%(lineno)s - %(levelname)s: %(message)s'
+)
+logging.basicConfig(level=args.loglevel, format=format_str)
+
+# -------------------------
+# Functions
+# -------------------------
+def drop_page_cache(path: str) -> None:
+    """
+    Given a file path, asks the kernel to drop the file's cached pages so the next read
+    comes from disk. Only clean pages are dropped, so the file is flushed first.
+    """
+    with open(path, 'rb+') as f:
+        os.fsync(f.fileno())
+        os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+
+def time_loader(loader: str, path: str, timing_file: str) -> tuple[float, int]:
+    """
+    Given a loader name and an input path, loads the input in a child process.
+
+    Returns:
+        tuple[float, int]: seconds spent loading inside the child and its peak RSS in kB
+    """
+    code = LOADER_TEMPLATE.format(script_dir=SCRIPT_DIR, body=LOADERS[loader])
+    _, max_rss_kb = run_timed([sys.executable, '-c', code, path, timing_file])
+    with open(timing_file) as f:
+        return float(f.read()), max_rss_kb
+
+def main():
+
+    print(f"{'atoms':>9} {'loader':<12} {'cache':<5} {'load s':>8} {'peak RSS MB':>12} {'file MB':>8}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        timing_file = os.path.join(tmp, 'seconds')
+        for copies in [int(c) for c in args.copies.split(',')]:
+            input_file = os.path.join(tmp, f'copies{copies}.cif')
+            atoms = make_synthetic_mmcif(args.mmciffile, input_file, copies)
+            run_timed(script_command('mmcif_compile.py', '-l', 'ERROR', '-m', input_file))
+            archive_file = os.path.join(tmp, f'copies{copies}.cifarc')
+
+            for loader, path in [('MMCIFParser', input_file), ('atom table', input_file), ('archive', archive_file)]:
+
+                # cold: the file's pages are dropped first; warm: they are still cached
+                for cache in ['cold', 'warm']:
+                    if cache == 'cold':
+                        drop_page_cache(path)
+                    seconds, max_rss_kb = time_loader(loader, path, timing_file)
+                    size_mb = os.path.getsize(path) / 1e6
+                    print(f"{atoms:>9} {loader:<12} {cache:<5} {seconds:>8.3f} {max_rss_kb / 1024:>12.1f} {size_mb:>8.1f}")
+
+            os.remove(input_file)
+            os.remove(archive_file)
+
+if __name__ == '__main__':
+    main()
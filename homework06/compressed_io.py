@@ -0,0 +1,231 @@
+"""
+Transparent gzip/BGZF input and BGZF output for the FASTA/FASTQ scripts.
+
+Input files are recognised as gzip (which includes BGZF) from their magic bytes rather
+than their extension, and are decompressed on a background thread so decompression
+overlaps with parsing. Output can optionally be written as BGZF, with blocks compressed
+on a pool of threads.
+"""
+import gzip
+import io
+import queue
+import struct
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+# -------------------------
+# Constants (configuration)
+# -------------------------
+GZIP_MAGIC = b'\x1f\x8b'
+CHUNK_SIZE = 1 << 20
+QUEUE_CHUNKS = 8
+COMPRESS_LEVEL = 6
+COMPRESS_THREADS = 1
+
+# uncompressed bytes per BGZF block; htslib uses the same limit so that
+# incompressible data still fits the 64 KiB compressed block size
+BGZF_BLOCK_SIZE = 0xff00
+
+# gzip member header with the 'BC' extra subfield that holds the block size
+BGZF_HEADER = b'\x1f\x8b\x08\x04\x00\x00\x00\x00\x00\xff\x06\x00BC\x02\x00'
+
+# empty block that marks the end of a BGZF file
+BGZF_EOF = BGZF_HEADER + b'\x1b\x00\x03\x00\x00\x00\x00\x00\x00\x00\x00\x00'
+
+# -------------------------
+# Classes
+# -------------------------
+class ThreadedGzipReader(io.RawIOBase):
+    """
+    Raw binary reader that decompresses a gzip or BGZF file on a background thread and
+    hands out the decompressed chunks through a bounded queue.
+    """
+    def __init__(self, path: str, chunk_size: int = CHUNK_SIZE, queue_chunks: int = QUEUE_CHUNKS):
+        self.chunks = queue.Queue(maxsize=queue_chunks)
+        self.stop = threading.Event()
+        self.pending = memoryview(b'')
+        self.eof = False
+        self.error = None
+
+        # open in the calling thread so a missing file raises FileNotFoundError here
+        self.file = gzip.open(path, 'rb')
+        self.thread = threading.Thread(target=self._decompress, args=(chunk_size,), daemon=True)
+        self.thread.start()
+
+    def _put(self, item: object) -> None:
+        # wait for space in the queue, giving up if the reader has been closed
+        while not self.stop.is_set():
+            try:
+                self.chunks.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _decompress(self, chunk_size: int) -> None:
+        # zlib releases the GIL, so this runs alongside parsing in the main thread
+        try:
+            while not self.stop.is_set():
+                chunk = self.file.read(chunk_size)
+                self._put(chunk)
+                if not chunk:
+                    return
+        except Exception as error:
+            self._put(error)
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if not self.pending:
+            # the thread stops after queueing an error, so later reads raise it again
+            if self.error is not None:
+                raise self.error
+            if self.eof:
+                return 0
+            item = self.chunks.get()
+            if isinstance(item, Exception):
+                self.error = item
+                raise item
+            if not item:
+                self.eof = True
+                return 0
+            self.pending = memoryview(item)
+
+        count = min(len(buffer), len(self.pending))
+        buffer[:count] = self.pending[:count]
+        self.pending = self.pending[count:]
+        return count
+
+    def close(self) -> None:
+        if not self.closed:
+            self.stop.set()
+            self.thread.join()
+            self.file.close()
+        super().close()
+
+class BgzfWriter(io.RawIOBase):
+    """
+    Raw binary writer that cuts its input into BGZF blocks and compresses them, on a pool
+    of threads when threads is greater than one, writing the blocks in order.
+    """
+    def __init__(self, path: str, level: int = COMPRESS_LEVEL, threads: int = COMPRESS_THREADS, write_eof: bool = True):
+        self.file = open(path, 'wb')
+        self.level = level
+        self.write_eof = write_eof
+        self.buffer = bytearray()
+        self.executor = ThreadPoolExecutor(max_workers=threads) if threads > 1 else None
+
+        # keep a few blocks per thread in flight so memory stays bounded
+        self.in_flight = []
+        self.max_in_flight = threads * 4
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.buffer += data
+        while len(self.buffer) >= BGZF_BLOCK_SIZE:
+            self._submit(bytes(self.buffer[:BGZF_BLOCK_SIZE]))
+            del self.buffer[:BGZF_BLOCK_SIZE]
+        return len(data)
+
+    def _submit(self, block: bytes) -> None:
+        if self.executor is None:
+            self.file.write(compress_bgzf_block(block, self.level))
+            return
+        self.in_flight.append(self.executor.submit(compress_bgzf_block, block, self.level))
+        while len(self.in_flight) >= self.max_in_flight:
+            self.file.write(self.in_flight.pop(0).result())
+
+    def close(self) -> None:
+        if not self.closed:
+            if self.buffer:
+                self._submit(bytes(self.buffer))
+                self.buffer.clear()
+            for future in self.in_flight:
+                self.file.write(future.result())
+            self.in_flight.clear()
+            if self.executor is not None:
+                self.executor.shutdown()
+            if self.write_eof:
+                self.file.write(BGZF_EOF)
+            self.file.close()
+        super().close()
+
+# -------------------------
+# Functions
+# -------------------------
+def is_gzipped(path: str) -> bool:
+    """
+    Given a file path, checks the first two bytes for the gzip magic number.
+
+    Args:
+        path: path of the file to check
+
+    Returns:
+        bool: True if the file is gzip or BGZF compressed
+    """
+    with open(path, 'rb') as f:
+        return f.read(2) == GZIP_MAGIC
+
+def compress_bgzf_block(block: bytes, level: int) -> bytes:
+    """
+    Given up to BGZF_BLOCK_SIZE bytes of data and a compression level, compresses the data
+    into one complete BGZF block.
+
+    Args:
+        block: uncompressed data
+        level: zlib compression level (0-9)
+
+    Returns:
+        bytes: the BGZF block
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    deflated = compressor.compress(block) + compressor.flush()
+
+    # the header stores the total block size minus one
+    return (
+        BGZF_HEADER + struct.pack('<H', len(deflated) + 25) + deflated
+        + struct.pack('<II', zlib.crc32(block), len(block))
+    )
+
+def open_input(path: str, mode: str = 'r') -> object:
+    """
+    Given a file path and 'r' or 'rb' mode, opens the file for reading, decompressing it
+    on a background thread if it is gzip or BGZF compressed.
+
+    Args:
+        path: path of the input file
+        mode: 'r' for a text handle or 'rb' for a binary handle
+
+    Returns:
+        object: an open file handle
+    """
+    if not is_gzipped(path):
+        return open(path, mode)
+
+    reader = io.BufferedReader(ThreadedGzipReader(path), buffer_size=CHUNK_SIZE)
+    return reader if 'b' in mode else io.TextIOWrapper(reader)
+
+def open_output(path: str, mode: str = 'w', bgzf: bool = False, level: int = COMPRESS_LEVEL, threads: int = COMPRESS_THREADS, write_eof: bool = True) -> object:
+    """
+    Given a file path and 'w' or 'wb' mode, opens the file for writing, optionally as BGZF.
+
+    Args:
+        path: path of the output file
+        mode: 'w' for a text handle or 'wb' for a binary handle
+        bgzf: whether to BGZF compress the output
+        level: zlib compression level (0-9) used when bgzf is True
+        threads: number of threads compressing blocks when bgzf is True
+        write_eof: whether to finish the file with the BGZF end-of-file block; files that
+                   will be appended to another BGZF file should leave it out
+
+    Returns:
+        object: an open file handle
+    """
+    if not bgzf:
+        return open(path, mode)
+
+    writer = io.BufferedWriter(BgzfWriter(path, level, threads, write_eof), buffer_size=BGZF_BLOCK_SIZE)
+    return writer if 'b' in mode else io.TextIOWrapper(writer)
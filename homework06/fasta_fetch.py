@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+import argparse
+import logging
+import socket
+import sys
+from fasta_index import load_index
+
+# -------------------------
+# Constants (configuration)
+# -------------------------
+OUTPUT_FASTA = 'fetched.fasta'
+
+# -------------------------
+# Logging and Command Line Inputs setup
+# -------------------------
+parser = argparse.ArgumentParser()
+parser.add_argument(
+    '-l', '--loglevel',
+    type=str,
+    required=False,
+    choices=['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'],
+    default='WARNING',
+    help='set log level to DEBUG, INFO, WARNING, ERROR, or CRITICAL (default: WARNING)'
+)
+parser.add_argument(
+    '-f', '--fastafile',
+    type=str,
+    required=True,
+    help='The path to the input FASTA file (uncompressed)'
+)
+parser.add_argument(
+    '-i', '--index',
+    type=str,
+    required=False,
+    default=None,
+    help='The path to the .fai index, built if missing (default: the FASTA path plus .fai)'
+)
+parser.add_argument(
+    '-r', '--regions',
+    type=str,
+    nargs='*',
+    default=[],
+    help='Accessions or names to fetch, optionally with a 1-based inclusive range, e.g. P01024 or P01024:10-50'
+)
+parser.add_argument(
+    '-R', '--regionFile',
+    type=str,
+    required=False,
+    default=None,
+    help='The path to a file with one region per line, fetched after any given with -r'
+)
+parser.add_argument(
+    '-o', '--output',
+    type=str,
+    required=False,
+    default=OUTPUT_FASTA,
+    help=f'The path to the output FASTA file (default: {OUTPUT_FASTA})'
+)
+parser.add_argument(
+    '-b', '--rebuild',
+    action='store_true',
+    help='Rebuild the index even if it is up to date'
+)
+args = parser.parse_args()
+
+format_str = (
+    f'[%(asctime)s {socket.gethostname()}] '
+    '%(filename)s:%(funcName)s:%(lineno)s - %(levelname)s: %(message)s'
+)
+logging.basicConfig(level=args.loglevel, format=format_str)
+
+# -------------------------
+# Functions
+# -------------------------
+
+def parse_region(region: str) -> tuple[str, int | None, int | None]:
+    """
+    Given a region string (KEY or KEY:START-END), splits it into the key and the
+    1-based inclusive range.
+
+    Args:
+        region: the region string
+
+    Returns:
+        tuple[str, int | None, int | None]: the key, start and end (None for the whole sequence)
+    """
+    key, _, span = region.rpartition(':')
+    start, _, end = span.partition('-')
+    if key and start.isdigit() and end.isdigit():
+        return key, int(start), int(end)
+    return region, None, None
+
+def fetch_regions(fasta_file: str, index_file: str | None, regions: list[str], output_file: str, rebuild: bool) -> int:
+    """
+    Given a FASTA file, its index path, a list of regions and an output path, fetches each
+    region through the index and writes it to the output FASTA file. Whole sequences keep
+    their full header; ranges are named KEY:START-END.
+
+    Args:
+        fasta_file: path to the input FASTA file
+        index_file: path to the .fai index (None for the default)
+        regions: list of region strings
+        output_file: path to the output FASTA file
+        rebuild: whether to rebuild the index
+
+    Returns:
+        int: number of regions written
+    """
+    written = 0
+
+    logging.info(f"Fetching {len(regions)} regions from '{fasta_file}' into '{output_file}'")
+
+    with load_index(fasta_file, index_file, rebuild) as index, open(output_file, 'w') as outfile:
+        for region in regions:
+            key, start, end = parse_region(region)
+            try:
+                if start is None:
+                    outfile.write(f">{index.header(key)}\n{index.fetch(key)}\n")
+                else:
+                    outfile.write(f">{key}:{start}-{end}\n{index.fetch(key, start, end)}\n")
+                written += 1
+            except KeyError:
+                logging.warning(f"Sequence '{key}' is not in '{fasta_file}'")
+
+    logging.info(f"Wrote {written} of {len(regions)} regions")
+
+    return written
+
+def main():
+
+    logging.info("Starting FASTA fetch workflow")
+
+    regions = list(args.regions)
+    try:
+        if args.regionFile:
+            with open(args.regionFile, 'r') as f:
+                regions += [line.strip() for line in f if line.strip()]
+        fetch_regions(args.fastafile, args.index, regions, args.output, args.rebuild)
+    except FileNotFoundError as e:
+        logging.error(f"Input file '{e.filename}' not found. Exiting.")
+        sys.exit(1)
+    except ValueError as e:
+        logging.error(f"Could not index FASTA file '{args.fastafile}': {e}. Exiting.")
+        sys.exit(1)
+
+    logging.info("FASTA fetch workflow complete")
+
+if __name__ == '__main__':
+    main()
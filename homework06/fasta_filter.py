@@ -4,6 +4,8 @@ import logging
 import socket
 import sys
 from Bio.SeqIO.FastaIO import SimpleFastaParser
+from compressed_io import COMPRESS_LEVEL, COMPRESS_THREADS, is_gzipped, open_input, open_output
+from fasta_index import load_index
 
 # -------------------------
 # Constants (configuration)
@@ -43,6 +45,31 @@ parser.add_argument(
     default=MINIMUM_LENGTH,
     help=f'The minimum length to filter by (default: {MINIMUM_LENGTH})'
 )
+parser.add_argument(
+    '-z', '--bgzf',
+    action='store_true',
+    help='BGZF compress the output file'
+)
+parser.add_argument(
+    '--compressLevel',
+    type=int,
+    required=False,
+    choices=range(10),
+    default=COMPRESS_LEVEL,
+    help=f'The zlib compression level used with --bgzf (default: {COMPRESS_LEVEL})'
+)
+parser.add_argument(
+    '--compressThreads',
+    type=int,
+    required=False,
+    default=COMPRESS_THREADS,
+    help=f'The number of threads compressing output blocks with --bgzf (default: {COMPRESS_THREADS})'
+)
+parser.add_argument(
+    '-i', '--useIndex',
+    action='store_true',
+    help='Filter on the lengths in the .fai index next to the input (built if missing) instead of parsing every sequence'
+)
 args = parser.parse_args()
 
 format_str = (
@@ -55,15 +82,18 @@ logging.basicConfig(level=args.loglevel, format=format_str)
 # Functions
 # -------------------------
 
-def filter_fasta(input_file: str, output_file: str, min_length: int) -> None:
+def filter_fasta(input_file: str, output_file: str, min_length: int, bgzf: bool = False, compress_level: int = COMPRESS_LEVEL, compress_threads: int = COMPRESS_THREADS) -> None:
     """
     Given input FASTA file, output file path, and minimum sequence length, iterates through sequences and writes sequences greater than 
-    or equal to minimum sequence length to output FASTA file.
+    or equal to minimum sequence length to output FASTA file. Gzip/BGZF input is detected and decompressed automatically.
 
     Args:
-        input_file: path to input FASTA file
+        input_file: path to input FASTA file (plain, gzip or BGZF)
         output_file: path to output FASTA file
         min_length: minimum length of protein to filter sequences by
+        bgzf: whether to BGZF compress the output file
+        compress_level: zlib compression level used when bgzf is True
+        compress_threads: number of threads compressing output blocks when bgzf is True
 
     Returns: 
         None: this function doesn't return anything; it writes filtered sequences to FASTA file
@@ -72,7 +102,7 @@ def filter_fasta(input_file: str, output_file: str, min_length: int) -> None:
     logging.info(f"Reading FASTA file '{input_file}' and writing filtered sequences to '{output_file}' given minimum length: {min_length}")
 
     # open given fasta file for reading and open new fasta file for writing
-    with open(input_file, 'r') as infile, open(output_file, 'w') as outfile:
+    with open_input(input_file) as infile, open_output(output_file, 'w', bgzf, compress_level, compress_threads) as outfile:
         
         # iterate through tuples in SimpleFastaParser instance of given fasta file
         for header, sequence in SimpleFastaParser(infile):
@@ -83,12 +113,54 @@ def filter_fasta(input_file: str, output_file: str, min_length: int) -> None:
                 outfile.write(f">{header}\n")
                 outfile.write(f"{sequence}\n")
 
+def filter_fasta_indexed(input_file: str, output_file: str, min_length: int, bgzf: bool = False, compress_level: int = COMPRESS_LEVEL, compress_threads: int = COMPRESS_THREADS) -> None:
+    """
+    Given input FASTA file, output file path, and minimum sequence length, decides which sequences pass
+    from the lengths in the file's .fai index alone, and reads only the passing sequences through the index.
+    Writes the same output as filter_fasta().
+
+    Args:
+        input_file: path to input FASTA file (uncompressed)
+        output_file: path to output FASTA file
+        min_length: minimum length of protein to filter sequences by
+        bgzf: whether to BGZF compress the output file
+        compress_level: zlib compression level used when bgzf is True
+        compress_threads: number of threads compressing output blocks when bgzf is True
+
+    Returns: 
+        None: this function doesn't return anything; it writes filtered sequences to FASTA file
+    """
+
+    logging.info(f"Filtering FASTA file '{input_file}' by its index into '{output_file}' given minimum length: {min_length}")
+
+    # open (or build) the index of the given fasta file and open new fasta file for writing
+    with load_index(input_file) as index, open_output(output_file, 'w', bgzf, compress_level, compress_threads) as outfile:
+
+        # iterate through the index records, fetching only sequences at least the minimum length;
+        # each is read from its own record, as several sequences may share a name
+        for record in index.records:
+            if record.length >= min_length:
+                outfile.write(f">{index.header_of(record)}\n")
+                outfile.write(f"{index.fetch_record(record)}\n")
+
 def main():
     
     logging.info("Starting FASTA filtering workflow")
 
     try:
-        filter_fasta(args.fastafile, args.output, args.minimumLength)
+        # an index addresses bytes of the uncompressed file, so compressed input is always parsed
+        if args.useIndex and is_gzipped(args.fastafile):
+            logging.warning("Compressed input can not be indexed; parsing every sequence instead")
+        indexed = args.useIndex and not is_gzipped(args.fastafile)
+        if indexed:
+            # a file samtools can not index (e.g. uneven line lengths) can still be parsed
+            try:
+                filter_fasta_indexed(args.fastafile, args.output, args.minimumLength, args.bgzf, args.compressLevel, args.compressThreads)
+            except ValueError as e:
+                logging.warning(f"Could not index FASTA file '{args.fastafile}': {e}; parsing every sequence instead")
+                indexed = False
+        if not indexed:
+            filter_fasta(args.fastafile, args.output, args.minimumLength, args.bgzf, args.compressLevel, args.compressThreads)
     except FileNotFoundError:
         logging.error(f"Input FASTA file '{args.fastafile}' not found. Exiting.")
         sys.exit(1)
@@ -0,0 +1,215 @@
+"""
+samtools-compatible (.fai) index for FASTA files and random access to indexed sequences.
+
+Each index line holds the sequence name (first word of the header), its length, the byte
+offset of its first residue, the residues per line and the bytes per line. Records can be
+looked up by that name or by the '|' separated accession used by fasta_stats.py, and are
+read through an mmap of the FASTA file, so a lookup costs the same however large the file is.
+"""
+import mmap
+import os
+from pydantic import BaseModel
+
+# -------------------------
+# Constants (configuration)
+# -------------------------
+FAI_SUFFIX = '.fai'
+
+# -------------------------
+# Classes
+# -------------------------
+class FaiRecord(BaseModel):
+    name: str
+    length: int
+    offset: int
+    line_bases: int
+    line_width: int
+
+class FastaIndex:
+    """
+    An index of a FASTA file together with an mmap of the file for fetching sequences.
+    Use as a context manager, or call close() when finished.
+    """
+    def __init__(self, fasta_file: str, records: list[FaiRecord]):
+        self.fasta_file = fasta_file
+        self.records = records
+        self.by_name = {record.name: record for record in records}
+
+        # UniProt style names (db|ACCESSION|ENTRY) can also be looked up by accession
+        self.by_accession = {accession_from_name(record.name): record for record in records}
+
+        self.file = open(fasta_file, 'rb')
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if os.path.getsize(fasta_file) else b''
+
+    def __enter__(self) -> 'FastaIndex':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if isinstance(self.mm, mmap.mmap):
+            self.mm.close()
+        self.file.close()
+
+    def get(self, key: str) -> FaiRecord:
+        """
+        Given a sequence name or accession, returns its index record (KeyError if unknown).
+        """
+        record = self.by_name.get(key) or self.by_accession.get(key)
+        if record is None:
+            raise KeyError(key)
+        return record
+
+    def header(self, key: str) -> str:
+        """
+        Given a sequence name or accession, returns its full header line without the '>'.
+        """
+        return self.header_of(self.get(key))
+
+    def header_of(self, record: FaiRecord) -> str:
+        """
+        Given an index record, returns its full header line without the '>'. Unlike a lookup
+        by name, this reads the record itself when several sequences share a name.
+        """
+        # the header is the line that ends just before the first residue
+        line_start = self.mm.rfind(b'\n', 0, record.offset - 1) + 1
+        return self.mm[line_start + 1:record.offset].decode().rstrip()
+
+    def fetch(self, key: str, start: int | None = None, end: int | None = None) -> str:
+        """
+        Given a sequence name or accession and an optional 1-based, inclusive range,
+        returns the residues of the sequence (or of the range).
+        """
+        return self.fetch_record(self.get(key), start, end)
+
+    def fetch_record(self, record: FaiRecord, start: int | None = None, end: int | None = None) -> str:
+        """
+        Given an index record and an optional 1-based, inclusive range, returns the residues
+        of the record's sequence (or of the range).
+        """
+        start = 1 if start is None else max(start, 1)
+        end = record.length if end is None else min(end, record.length)
+        if start > end:
+            return ''
+
+        # residue i (0-based) sits on line i // line_bases, at column i % line_bases
+        first_byte = residue_offset(record, start - 1)
+        last_byte = residue_offset(record, end - 1) + 1
+        return self.mm[first_byte:last_byte].translate(None, b'\r\n').decode()
+
+# -------------------------
+# Functions
+# -------------------------
+def accession_from_name(name: str) -> str:
+    """
+    Given a sequence name, returns the accession: the second '|' separated field for
+    names such as sp|P01024|CO3_HUMAN, otherwise the name itself.
+    """
+    parts = name.split('|')
+    return parts[1] if len(parts) > 1 else name
+
+def residue_offset(record: FaiRecord, position: int) -> int:
+    """
+    Given an index record and a 0-based residue position, returns the byte offset of the residue.
+    """
+    return record.offset + (position // record.line_bases) * record.line_width + position % record.line_bases
+
+def build_fai(fasta_file: str) -> list[FaiRecord]:
+    """
+    Given a FASTA file, scans it once and builds the samtools index records. Like samtools,
+    every sequence line of a record except the last must have the same length.
+
+    Args:
+        fasta_file: path to the (uncompressed) FASTA file
+
+    Returns:
+        list[FaiRecord]: one index record per sequence, in file order
+    """
+    records = []
+    record = None
+    last_line_short = False
+
+    with open(fasta_file, 'rb') as f:
+        offset = 0
+        for line in f:
+            line_start = offset
+            offset += len(line)
+
+            if line.startswith(b'>'):
+                if record is not None:
+                    records.append(FaiRecord(**record))
+                record = {'name': line[1:].split(maxsplit=1)[0].decode() if line[1:].strip() else '',
+                          'length': 0, 'offset': offset, 'line_bases': 0, 'line_width': 0}
+                last_line_short = False
+                continue
+
+            # text before the first header is ignored, as SimpleFastaParser does
+            if record is None:
+                continue
+
+            bases = len(line.rstrip(b'\r\n'))
+            if bases == 0:
+                last_line_short = True
+                continue
+
+            if record['line_bases'] == 0:
+                record['line_bases'] = bases
+                record['line_width'] = len(line)
+            # the last line of the file may lack its newline, as samtools allows
+            elif last_line_short or bases > record['line_bases'] or (
+                    line.endswith(b'\n') and len(line) - bases != record['line_width'] - record['line_bases']):
+                raise ValueError(f"Different line length in sequence '{record['name']}' at byte {line_start}")
+
+            last_line_short = bases < record['line_bases']
+            record['length'] += bases
+
+    if record is not None:
+        records.append(FaiRecord(**record))
+
+    return records
+
+def write_fai(records: list[FaiRecord], index_file: str) -> None:
+    """
+    Given index records and an output path, writes them in samtools .fai format.
+    """
+    with open(index_file, 'w') as f:
+        for record in records:
+            f.write(f"{record.name}\t{record.length}\t{record.offset}\t{record.line_bases}\t{record.line_width}\n")
+
+def read_fai(index_file: str) -> list[FaiRecord]:
+    """
+    Given a .fai file, reads its index records.
+    """
+    records = []
+    with open(index_file, 'r') as f:
+        for line in f:
+            name, length, offset, line_bases, line_width = line.rstrip('\n').split('\t')[:5]
+            records.append(FaiRecord(
+                name=name, length=int(length), offset=int(offset),
+                line_bases=int(line_bases), line_width=int(line_width)
+            ))
+    return records
+
+def load_index(fasta_file: str, index_file: str | None = None, rebuild: bool = False) -> FastaIndex:
+    """
+    Given a FASTA file, opens it with its index, building and saving the index first if
+    it is missing, older than the FASTA file, or rebuild is True.
+
+    Args:
+        fasta_file: path to the (uncompressed) FASTA file
+        index_file: path to the .fai file (default: the FASTA path plus .fai)
+        rebuild: whether to rebuild the index even if it is up to date
+
+    Returns:
+        FastaIndex: the opened index
+    """
+    index_file = index_file or fasta_file + FAI_SUFFIX
+
+    if rebuild or not os.path.exists(index_file) or os.path.getmtime(index_file) < os.path.getmtime(fasta_file):
+        records = build_fai(fasta_file)
+        write_fai(records, index_file)
+    else:
+        records = read_fai(index_file)
+
+    return FastaIndex(fasta_file, records)
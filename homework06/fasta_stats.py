@@ -1,14 +1,33 @@
 #!/usr/bin/env python3
 import argparse
+import glob
+import json
 import logging
+import os
 import socket
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from array import array
+from itertools import repeat
+import numpy as np
 from Bio.SeqIO.FastaIO import SimpleFastaParser
+from compressed_io import open_input
 
 # -------------------------
 # Constants (configuration)
 # -------------------------
 OUTPUT_TXT = 'proteins_stats.txt'
+HISTOGRAM_BINS = 20
+QUANTILES = [0.05, 0.25, 0.5, 0.75, 0.95]
+OUTPUT_TABLE = 'proteins_stats_table.tsv'
+TABLE_FORMAT = 'tsv'
+WORKERS = os.cpu_count() or 1
+FASTA_EXTENSIONS = ('.fasta', '.fa', '.faa', '.fas', '.fna')
+TABLE_COLUMNS = [
+    'file', 'num_sequences', 'total_residues', 'longest_accession', 'longest_accession_length',
+    'shortest_accession', 'shortest_accession_length', 'n50', 'l50', 'seconds', 'error'
+]
 
 # -------------------------
 # Logging and Command Line Inputs setup
@@ -22,18 +41,59 @@ parser.add_argument(
     default='WARNING',
     help='set log level to DEBUG, INFO, WARNING, ERROR, or CRITICAL (default: WARNING)'
 )
-parser.add_argument(
+inputs = parser.add_mutually_exclusive_group(required=True)
+inputs.add_argument(
     '-f', '--fastafile',
     type=str,
-    required=True,
     help='The path to the input FASTA file'
 )
+inputs.add_argument(
+    '-d', '--batch',
+    type=str,
+    help='A directory of FASTA files, or a quoted glob such as "samples/*.fasta.gz", to summarize in parallel'
+)
 parser.add_argument(
     '-o', '--output',
     type=str,
     default=OUTPUT_TXT,
     help=f'The path to the output TXT file (default: {OUTPUT_TXT})'
 )
+parser.add_argument(
+    '-j', '--json',
+    type=str,
+    required=False,
+    default=None,
+    help='The path to an optional JSON file of detailed statistics: N50/L50, length quantiles, length histogram and residue composition'
+)
+parser.add_argument(
+    '-b', '--bins',
+    type=int,
+    required=False,
+    default=HISTOGRAM_BINS,
+    help=f'The number of bins in the length histogram of the JSON statistics (default: {HISTOGRAM_BINS})'
+)
+parser.add_argument(
+    '-w', '--workers',
+    type=int,
+    required=False,
+    default=WORKERS,
+    help=f'The number of processes summarizing files with --batch (default: {WORKERS})'
+)
+parser.add_argument(
+    '-t', '--table',
+    type=str,
+    required=False,
+    default=OUTPUT_TABLE,
+    help=f'The path to the per-file statistics table written with --batch (default: {OUTPUT_TABLE})'
+)
+parser.add_argument(
+    '--tableFormat',
+    type=str,
+    required=False,
+    choices=['tsv', 'jsonl'],
+    default=TABLE_FORMAT,
+    help=f'The format of the per-file table, TSV or JSON Lines (default: {TABLE_FORMAT})'
+)
 args = parser.parse_args()
 
 format_str = (
@@ -42,56 +102,128 @@ format_str = (
 )
 logging.basicConfig(level=args.loglevel, format=format_str)
 
+# -------------------------
+# Classes
+# -------------------------
+class FastaStats:
+    """
+    Single-pass accumulator of FASTA statistics. Only sequence lengths, the longest and shortest
+    accessions and residue counts are kept, so memory does not grow with the number of residues.
+    Residue counts are only kept when composition is True, as only the detailed report needs them.
+    Accumulators for consecutive chunks of input can be combined in order with merge().
+    """
+    def __init__(self, composition: bool = False):
+        self.lengths = array('Q')
+        self.composition = np.zeros(256, dtype=np.int64) if composition else None
+        self.longest_accession = None
+        self.longest_accession_length = 0
+        self.shortest_accession = None
+        self.shortest_accession_length = 0
+
+    def add(self, accession_id: str, sequence: str) -> None:
+        # the first sequence sets both the longest and shortest accession, and later
+        # sequences only replace them when strictly longer or shorter
+        length = len(sequence)
+        if not self.lengths or length > self.longest_accession_length:
+            self.longest_accession_length = length
+            self.longest_accession = accession_id
+        if not self.lengths or length < self.shortest_accession_length:
+            self.shortest_accession_length = length
+            self.shortest_accession = accession_id
+
+        self.lengths.append(length)
+
+        # count every byte value of the sequence at once rather than residue by residue
+        if self.composition is not None:
+            self.composition += np.bincount(np.frombuffer(sequence.encode(), dtype=np.uint8), minlength=256)
+
+    def merge(self, other: 'FastaStats') -> 'FastaStats':
+        # other must hold the sequences that come after ours so ties keep the earlier accession
+        if other.lengths:
+            if not self.lengths or other.longest_accession_length > self.longest_accession_length:
+                self.longest_accession_length = other.longest_accession_length
+                self.longest_accession = other.longest_accession
+            if not self.lengths or other.shortest_accession_length < self.shortest_accession_length:
+                self.shortest_accession_length = other.shortest_accession_length
+                self.shortest_accession = other.shortest_accession
+
+        self.lengths.extend(other.lengths)
+        if self.composition is not None:
+            self.composition += other.composition
+        return self
+
+    @property
+    def num_sequences(self) -> int:
+        return len(self.lengths)
+
+    @property
+    def total_residues(self) -> int:
+        return sum(self.lengths)
+
+    def n50(self) -> tuple[int, int]:
+        # N50 is the length at which the longest sequences first cover half of all residues,
+        # and L50 is the number of sequences needed to get there
+        lengths = np.sort(np.frombuffer(self.lengths, dtype=np.uint64))[::-1]
+        covered = np.cumsum(lengths)
+        l50 = int(np.searchsorted(covered, covered[-1] / 2)) + 1
+        return int(lengths[l50 - 1]), l50
+
+    def quantiles(self, quantiles: list[float]) -> dict[str, float]:
+        values = np.quantile(np.frombuffer(self.lengths, dtype=np.uint64), quantiles)
+        return {str(q): float(v) for q, v in zip(quantiles, values)}
+
+    def histogram(self, bins: int) -> dict[str, list]:
+        counts, edges = np.histogram(np.frombuffer(self.lengths, dtype=np.uint64), bins=bins)
+        return {'bin_edges': edges.tolist(), 'counts': counts.tolist()}
+
+    def residue_composition(self) -> dict[str, int]:
+        if self.composition is None:
+            raise ValueError("Residue composition was not counted")
+        return {chr(code): int(count) for code, count in enumerate(self.composition) if count}
+
 # -------------------------
 # Functions
 # -------------------------
 
-def retrieve_fasta_data(fasta_file: str) -> list:
+def accumulate_fasta_stats(fasta_file: str, composition: bool = False) -> FastaStats:
     """
-    Given an input FASTA file, parses through sequences and stores each sequence entry as a dictionary 
-    and returns a list of the dictionaries. 
+    Given an input FASTA file, parses through sequences once and adds each sequence's
+    accession (the second '|' separated field of the header) and residues to a FastaStats
+    accumulator. Gzip/BGZF input is detected and decompressed automatically.
 
     Args: 
-        fasta_file: path to the input FASTA file
+        fasta_file: path to the input FASTA file (plain, gzip or BGZF)
+        composition: whether to count residues for the detailed statistics
 
     Returns: 
-        list of sequence entries (dictionaries)
+        FastaStats: accumulator holding the statistics of every sequence in the file
     """
-    # create empty list for sequences from the fasta file to be added to
-    sequences = []
+    # create empty accumulator for sequences from the fasta file to be added to
+    stats = FastaStats(composition)
 
     logging.info(f"Reading FASTA file '{fasta_file}'")
 
     # open fasta file for reading 
-    with open(fasta_file, 'r') as f:
+    with open_input(fasta_file) as f:
 
         # iterate through tuples in SimpleFastaParser class instance 
         for header, sequence in SimpleFastaParser(f):
 
-            # split the header on character into a list of strings
+            # split the header on character into a list of strings and add the
+            # accession and sequence to the accumulator
             header_parts = header.split("|")
-            
-            # create entry (dictionary) for each sequence with accession, sequence, and sequence length info
-            entry = {
-                "accession_id": header_parts[1],
-                "sequence": sequence,
-                "sequence_length": len(sequence)
-            }
-
-            # add the entry to the list of sequences
-            sequences.append(entry)
+            stats.add(header_parts[1], sequence)
 
-    logging.info(f"Finished reading {len(sequences)} reads")
+    logging.info(f"Finished reading {stats.num_sequences} reads")
 
-    return sequences
+    return stats
 
-def summarize_fasta_stats(fasta_data: list) -> str:
+def summarize_fasta_stats(stats: FastaStats) -> str:
     """
-    Given an input list of FASTA protein sequence entries, iterates through entries to determine
-    fasta summary stats which are returned as a string.
+    Given a FastaStats accumulator, formats the FASTA summary stats as a string.
 
     Args:
-        fasta_data: a list of FASTA sequence entries
+        stats: FastaStats accumulator of FASTA sequences
 
     Returns:
         string of FASTA data summary stats
@@ -99,34 +231,47 @@ def summarize_fasta_stats(fasta_data: list) -> str:
     
     logging.info(f"Creating summary statistics of FASTA data")
 
-    # set total residues from fasta sequences to 0
-    total_residues = 0
+    if not stats.num_sequences:
+        raise ValueError("No sequences to summarize")
+
+    summary = f"Num Sequences: {stats.num_sequences}\nTotal Residues: {stats.total_residues}\nLongest Accession: {stats.longest_accession} ({stats.longest_accession_length} residues)\nShortest Accession: {stats.shortest_accession} ({stats.shortest_accession_length} residues)"
+
+    return summary
+
+def detail_fasta_stats(stats: FastaStats, bins: int = HISTOGRAM_BINS) -> dict:
+    """
+    Given a FastaStats accumulator and a number of histogram bins, collects the detailed
+    statistics: counts, longest and shortest accession, N50/L50, length quantiles,
+    a length histogram and per-residue composition.
 
-    # set longest and shortest accessions and their lengths to that of first sequence in list
-    longest_accession_length = fasta_data[0]['sequence_length']
-    longest_accession = fasta_data[0]['accession_id']
-    shortest_accession_length = fasta_data[0]['sequence_length']
-    shortest_accession = fasta_data[0]['accession_id']
+    Args:
+        stats: FastaStats accumulator of FASTA sequences
+        bins: number of bins in the length histogram
 
-    # iterate through entries in the sequences list
-    for seq in fasta_data:
+    Returns:
+        dict: detailed statistics, ready to be written as JSON
+    """
 
-        # add the number of residues of the current sequence to total residues
-        total_residues += seq['sequence_length']
+    logging.info(f"Creating detailed statistics of FASTA data")
 
-        # if this sequence is the longest so far, set longest accession and its length 
-        if seq['sequence_length'] > longest_accession_length:
-            longest_accession_length = seq['sequence_length']
-            longest_accession = seq['accession_id']
-        
-        # if this sequence is the shortest so far, set shortest accession and its length 
-        if seq['sequence_length'] < shortest_accession_length:
-            shortest_accession_length = seq['sequence_length']
-            shortest_accession = seq['accession_id']
+    if not stats.num_sequences:
+        raise ValueError("No sequences to summarize")
 
-    summary = f"Num Sequences: {len(fasta_data)}\nTotal Residues: {total_residues}\nLongest Accession: {longest_accession} ({longest_accession_length} residues)\nShortest Accession: {shortest_accession} ({shortest_accession_length} residues)"
+    n50, l50 = stats.n50()
 
-    return summary
+    return {
+        'num_sequences': stats.num_sequences,
+        'total_residues': stats.total_residues,
+        'longest_accession': stats.longest_accession,
+        'longest_accession_length': stats.longest_accession_length,
+        'shortest_accession': stats.shortest_accession,
+        'shortest_accession_length': stats.shortest_accession_length,
+        'n50': n50,
+        'l50': l50,
+        'length_quantiles': stats.quantiles(QUANTILES),
+        'length_histogram': stats.histogram(bins),
+        'residue_composition': stats.residue_composition()
+    }
 
 def write_stats_to_txt(fasta_stats: str, output_file: str) -> None:
     """
@@ -145,20 +290,167 @@ def write_stats_to_txt(fasta_stats: str, output_file: str) -> None:
     with open(output_file, 'w') as o:
         o.write(fasta_stats)
 
+def write_stats_to_json(detailed_stats: dict, output_file: str) -> None:
+    """
+    Given a dictionary of detailed FASTA stats and a path to an output file,
+    writes the stats to the output file in JSON format.
+
+    Args:
+        detailed_stats: dictionary of detailed FASTA stats
+        output_file: path to the output file
+
+    Returns:
+        None: this function does not return a value; it writes to output file
+    """
+    logging.info(f"Writing detailed statistics to {output_file}")
+
+    with open(output_file, 'w') as o:
+        json.dump(detailed_stats, o, indent=2)
+
+def find_fasta_files(batch: str) -> list[str]:
+    """
+    Given a directory or glob, lists the FASTA files to summarize. In a directory, files with
+    a FASTA extension (optionally followed by .gz) are used; a glob is used as given.
+
+    Args:
+        batch: path to a directory, or a glob pattern
+
+    Returns:
+        list[str]: sorted FASTA file paths
+    """
+    if os.path.isdir(batch):
+        return sorted(
+            os.path.join(batch, name) for name in os.listdir(batch)
+            if name.removesuffix('.gz').endswith(FASTA_EXTENSIONS) and os.path.isfile(os.path.join(batch, name))
+        )
+    return sorted(path for path in glob.glob(batch) if os.path.isfile(path))
+
+def file_fasta_stats(fasta_file: str, composition: bool = False) -> tuple[str, FastaStats | None, float, str | None]:
+    """
+    Given a FASTA file, accumulates its statistics and times how long that took. Runs in a
+    worker process; any error is returned rather than raised so one bad file does not stop
+    the batch.
+
+    Args:
+        fasta_file: path to the input FASTA file
+        composition: whether to count residues for the detailed statistics
+
+    Returns:
+        tuple: the file path, its FastaStats (None on error), seconds taken, and the error message (None on success)
+    """
+    start = time.perf_counter()
+    try:
+        stats = accumulate_fasta_stats(fasta_file, composition)
+        error = None
+    except Exception as e:
+        stats = None
+        error = f"{type(e).__name__}: {e}"
+    return fasta_file, stats, time.perf_counter() - start, error
+
+def table_row(fasta_file: str, stats: FastaStats | None, seconds: float, error: str | None) -> dict:
+    """
+    Given the result of file_fasta_stats(), builds the per-file table row.
+
+    Returns:
+        dict: values for each of TABLE_COLUMNS (None where not available)
+    """
+    row = dict.fromkeys(TABLE_COLUMNS)
+    row.update(file=fasta_file, seconds=round(seconds, 6), error=error)
+    if stats is not None:
+        row.update(
+            num_sequences=stats.num_sequences,
+            total_residues=stats.total_residues,
+            longest_accession=stats.longest_accession,
+            longest_accession_length=stats.longest_accession_length,
+            shortest_accession=stats.shortest_accession,
+            shortest_accession_length=stats.shortest_accession_length
+        )
+        if stats.num_sequences:
+            row['n50'], row['l50'] = stats.n50()
+    return row
+
+def batch_fasta_stats(fasta_files: list[str], table_file: str, table_format: str, workers: int, composition: bool = False) -> FastaStats:
+    """
+    Given a list of FASTA files, a table path and format, and a number of workers, accumulates
+    the statistics of each file in a process pool, writes one table row per file as results
+    arrive (in input order) and merges every file's statistics into a combined accumulator.
+    Files that fail are recorded in the table and logged, and the rest carry on.
+
+    Args:
+        fasta_files: paths to the input FASTA files
+        table_file: path to the per-file table
+        table_format: 'tsv' or 'jsonl'
+        workers: number of worker processes
+        composition: whether to count residues for the detailed statistics
+
+    Returns:
+        FastaStats: the combined statistics of every file that was read successfully
+    """
+    combined = FastaStats(composition)
+    failures = 0
+    slowest = (0.0, None)
+
+    logging.info(f"Summarizing {len(fasta_files)} FASTA files with {workers} workers into '{table_file}'")
+
+    with ProcessPoolExecutor(max_workers=workers) as executor, open(table_file, 'w') as table:
+        if table_format == 'tsv':
+            table.write('\t'.join(TABLE_COLUMNS) + '\n')
+
+        for fasta_file, stats, seconds, error in executor.map(file_fasta_stats, fasta_files, repeat(composition)):
+            row = table_row(fasta_file, stats, seconds, error)
+            if table_format == 'tsv':
+                table.write('\t'.join('' if row[c] is None else str(row[c]) for c in TABLE_COLUMNS) + '\n')
+            else:
+                table.write(json.dumps(row) + '\n')
+
+            if error is not None:
+                failures += 1
+                logging.error(f"Could not summarize '{fasta_file}': {error}")
+            else:
+                combined.merge(stats)
+                logging.debug(f"Summarized '{fasta_file}' in {seconds:.3f} s")
+                slowest = max(slowest, (seconds, fasta_file))
+
+    logging.info(f"Finished {len(fasta_files) - failures} of {len(fasta_files)} files; slowest was '{slowest[1]}' ({slowest[0]:.3f} s)")
+    if failures:
+        logging.warning(f"{failures} files could not be summarized; see the error column of '{table_file}'")
+
+    return combined
+
 def main():
     
     logging.info("Starting FASTA statistics workflow")
 
+    if args.batch:
+        fasta_files = find_fasta_files(args.batch)
+        if not fasta_files:
+            logging.error(f"No FASTA files found for '{args.batch}'. Exiting.")
+            sys.exit(1)
+        try:
+            stats = batch_fasta_stats(fasta_files, args.table, args.tableFormat, args.workers, args.json is not None)
+            write_stats_to_txt(summarize_fasta_stats(stats), args.output)
+            if args.json:
+                write_stats_to_json(detail_fasta_stats(stats, args.bins), args.json)
+        except ValueError as e:
+            logging.error(f"Could not summarize '{args.batch}': {e}. Exiting.")
+            sys.exit(1)
+        logging.info("FASTA statistics workflow complete")
+        return
+
     try:
-        protein_data = retrieve_fasta_data(args.fastafile)
-        fasta_stats = summarize_fasta_stats(protein_data)
+        stats = accumulate_fasta_stats(args.fastafile, args.json is not None)
+        fasta_stats = summarize_fasta_stats(stats)
         write_stats_to_txt(fasta_stats, args.output)
+        if args.json:
+            write_stats_to_json(detail_fasta_stats(stats, args.bins), args.json)
     except FileNotFoundError:
         logging.error(f"Input FASTA file '{args.fastafile}' not found. Exiting.")
         sys.exit(1)
+    except ValueError as e:
+        logging.error(f"Could not summarize FASTA file '{args.fastafile}': {e}. Exiting.")
+        sys.exit(1)
 
     logging.info("FASTA statistics workflow complete")
 
 if __name__ == '__main__':
     main()
-
@@ -1,9 +1,19 @@
 #!/usr/bin/env python3
 import argparse
+import io
 import logging
+import os
+import shutil
 import socket
 import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice, repeat
+import numpy as np
+from pydantic import BaseModel
 from Bio import SeqIO
+from Bio.SeqIO.QualityIO import FastqGeneralIterator, phred_quality_from_solexa
+from compressed_io import BGZF_EOF, COMPRESS_LEVEL, COMPRESS_THREADS, is_gzipped, open_input, open_output
 
 # -------------------------
 # Constants (configuration)
@@ -11,6 +21,20 @@ from Bio import SeqIO
 OUTPUT_FASTQ = 'cleanReads.fastq'
 ENCODING = 'fastq-sanger'
 MINIMUM_PHRED = 30
+ENGINE = 'stream'
+BATCH_SIZE = 4096
+LOW_QUALITY_PHRED = 20
+TRIM_QUALITY = 20
+WORKERS = 1
+SHARDS_PER_WORKER = 4
+
+# ASCII offset of the first quality character for each encoding the stream engine reads;
+# the seqio engine reads any FASTQ variant SeqIO knows, such as fastq-solexa
+PHRED_OFFSETS = {
+    'fastq': 33,
+    'fastq-sanger': 33,
+    'fastq-illumina': 64
+}
 
 # -------------------------
 # Logging and Command Line Inputs setup
@@ -49,16 +73,144 @@ parser.add_argument(
     type=str,
     required= False,
     default=ENCODING,
-    help=f'The encoding used for Phred scores (default: {ENCODING})'
+    help=f'The encoding used for Phred scores; the stream engine reads {", ".join(PHRED_OFFSETS)} (default: {ENCODING})'
+)
+parser.add_argument(
+    '-g', '--engine',
+    type=str,
+    required= False,
+    choices=['stream', 'seqio'],
+    default=ENGINE,
+    help=f'stream reads straight to the output file, or collect SeqRecord objects before writing (default: {ENGINE})'
+)
+parser.add_argument(
+    '--minimumBaseQuality',
+    type=int,
+    required=False,
+    default=None,
+    help='Reject reads with any base below this Phred score (default: off)'
+)
+parser.add_argument(
+    '--maxLowQualityFraction',
+    type=float,
+    required=False,
+    default=None,
+    help='Reject reads whose fraction of bases below --lowQualityPhred exceeds this value (default: off)'
+)
+parser.add_argument(
+    '--lowQualityPhred',
+    type=int,
+    required=False,
+    default=LOW_QUALITY_PHRED,
+    help=f'The Phred score below which a base counts as low quality (default: {LOW_QUALITY_PHRED})'
+)
+parser.add_argument(
+    '--trimWindow',
+    type=int,
+    required=False,
+    default=None,
+    help='Trim the 3\' end back to the last window of this many bases with average Phred of at least --trimQuality (default: off)'
+)
+parser.add_argument(
+    '--trimQuality',
+    type=int,
+    required=False,
+    default=TRIM_QUALITY,
+    help=f'The minimum average Phred score of a sliding window when trimming (default: {TRIM_QUALITY})'
+)
+parser.add_argument(
+    '--maxNFraction',
+    type=float,
+    required=False,
+    default=None,
+    help='Reject reads whose fraction of N bases exceeds this value (default: off)'
+)
+parser.add_argument(
+    '--batchSize',
+    type=int,
+    required=False,
+    default=BATCH_SIZE,
+    help=f'The number of reads scored together by the stream engine (default: {BATCH_SIZE})'
+)
+parser.add_argument(
+    '-w', '--workers',
+    type=int,
+    required=False,
+    default=WORKERS,
+    help=f'The number of processes filtering shards of the input in parallel with the stream engine (default: {WORKERS})'
+)
+parser.add_argument(
+    '-z', '--bgzf',
+    action='store_true',
+    help='BGZF compress the output file'
+)
+parser.add_argument(
+    '--compressLevel',
+    type=int,
+    required=False,
+    choices=range(10),
+    default=COMPRESS_LEVEL,
+    help=f'The zlib compression level used with --bgzf (default: {COMPRESS_LEVEL})'
+)
+parser.add_argument(
+    '--compressThreads',
+    type=int,
+    required=False,
+    default=COMPRESS_THREADS,
+    help=f'The number of threads compressing output blocks with --bgzf (default: {COMPRESS_THREADS})'
 )
 args = parser.parse_args()
 
+if args.engine == 'seqio' and any(
+    option is not None for option in
+    [args.minimumBaseQuality, args.maxLowQualityFraction, args.trimWindow, args.maxNFraction]
+):
+    parser.error('only --minimumPhred is supported by the seqio engine')
+if args.engine == 'seqio' and args.workers > 1:
+    parser.error('--workers is only supported by the stream engine')
+if args.engine == 'stream' and args.encoding not in PHRED_OFFSETS:
+    parser.error(f'the stream engine reads {", ".join(PHRED_OFFSETS)} encodings; use --engine seqio for {args.encoding}')
+
 format_str = (
     f'[%(asctime)s {socket.gethostname()}] '
     '%(filename)s:%(funcName)s:%(lineno)s - %(levelname)s: %(message)s'
 )
 logging.basicConfig(level=args.loglevel, format=format_str)
 
+# -------------------------
+# Classes
+# -------------------------
+class FilterCriteria(BaseModel):
+    min_phred: int
+    min_base_quality: int | None = None
+    max_low_quality_fraction: float | None = None
+    low_quality_phred: int = LOW_QUALITY_PHRED
+    trim_window: int | None = None
+    trim_quality: int = TRIM_QUALITY
+    max_n_fraction: float | None = None
+
+class ByteRangeReader(io.RawIOBase):
+    """
+    Raw binary reader over the bytes [start, end) of a file, so one shard of a FASTQ file
+    can be wrapped in a text handle and parsed as if it were a whole file.
+    """
+    def __init__(self, path: str, start: int, end: int):
+        self.file = open(path, 'rb')
+        self.file.seek(start)
+        self.remaining = end - start
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        count = self.file.readinto(memoryview(buffer)[:self.remaining])
+        self.remaining -= count
+        return count
+
+    def close(self) -> None:
+        self.file.close()
+        super().close()
+
 # -------------------------
 # Functions
 # -------------------------
@@ -84,8 +236,8 @@ def filter_fastq(input_file: str, encoding: str, min_phred: int) -> list[object]
 
     logging.info(f"Reading FASTQ file '{input_file}'")
 
-    # open given fastq file for reading
-    with open(input_file, 'r') as infile:
+    # open given fastq file (plain, gzip or BGZF) for reading
+    with open_input(input_file) as infile:
 
         # iterate through sequence records in SeqIO.parse instance of given fastq file 
         # with Phred+33 quality encoding (fastq-sanger)
@@ -94,8 +246,12 @@ def filter_fastq(input_file: str, encoding: str, min_phred: int) -> list[object]
             # increment infile reads
             infile_reads += 1
 
-            # retrieve phred quality scores and set to variable
-            phred_scores = record.letter_annotations['phred_quality']
+            # retrieve phred quality scores and set to variable; fastq-solexa records hold
+            # Solexa scores, which are converted to Phred scores first
+            if 'solexa_quality' in record.letter_annotations:
+                phred_scores = [phred_quality_from_solexa(q) for q in record.letter_annotations['solexa_quality']]
+            else:
+                phred_scores = record.letter_annotations['phred_quality']
             
             # if the average phred score is greater than or equal to 30, add record to clean_records list
             # and increment outfile reads
@@ -109,7 +265,7 @@ def filter_fastq(input_file: str, encoding: str, min_phred: int) -> list[object]
 
     return clean_records
 
-def write_filtered_to_fastq(filtered_records: list[object], output_file: str) -> None:
+def write_filtered_to_fastq(filtered_records: list[object], output_file: str, bgzf: bool = False, compress_level: int = COMPRESS_LEVEL, compress_threads: int = COMPRESS_THREADS) -> None:
     """
     Given a list of SeqRecord objects and output FASTQ file path, writes the reads to the output file
     in FASTQ format.
@@ -117,6 +273,9 @@ def write_filtered_to_fastq(filtered_records: list[object], output_file: str) ->
     Args:
         filtered_records: a list of SeqRecord objects to be written to output file
         output_file: path of output FASTQ file
+        bgzf: whether to BGZF compress the output file
+        compress_level: zlib compression level used when bgzf is True
+        compress_threads: number of threads compressing output blocks when bgzf is True
 
     Returns:
         None: this function doesn't return a value; it writes to an output file
@@ -124,16 +283,339 @@ def write_filtered_to_fastq(filtered_records: list[object], output_file: str) ->
     logging.info(f"Writing filtered records to {output_file}")
 
     # open new fastq file for writing and write clean_records to it in fastq format
-    with open(output_file, 'w') as outfile:
+    with open_output(output_file, 'w', bgzf, compress_level, compress_threads) as outfile:
         SeqIO.write(filtered_records, outfile, "fastq")
 
+def score_batch(sequences: list[str], qualities: list[str], offset: int, criteria: FilterCriteria) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Given the sequences and quality strings of a batch of reads, the quality encoding offset, and
+    the filter criteria, decodes every quality string into one uint8 array of Phred scores and
+    applies trimming and all filters to the whole batch at once.
+
+    Args:
+        sequences: sequence strings of the reads in the batch
+        qualities: quality strings of the reads in the batch
+        offset: ASCII offset of the quality encoding
+        criteria: FilterCriteria instance with the thresholds to apply
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: boolean array of reads passing all filters and
+            integer array of the number of bases to keep from each read after trimming
+    """
+
+    # decode all quality strings of the batch into one flat array of Phred scores
+    lengths = np.fromiter(map(len, qualities), dtype=np.int64, count=len(qualities))
+    quality_codes = np.frombuffer(''.join(qualities).encode('ascii'), dtype=np.uint8)
+    if quality_codes.size and quality_codes.min() < offset:
+        raise ValueError("Invalid character in quality string")
+    phred = quality_codes - np.uint8(offset)
+
+    # each read occupies [starts, starts + lengths) of the flat array
+    starts = np.zeros(len(lengths), dtype=np.int64)
+    np.cumsum(lengths[:-1], out=starts[1:])
+
+    # empty reads fail; reduceat needs the start of every remaining (non-empty) read
+    nonempty = lengths > 0
+    read_starts = starts[nonempty]
+    read_lengths = lengths[nonempty]
+
+    # position of every base within its read, and the length of the read it belongs to
+    base_read_length = np.repeat(read_lengths, read_lengths)
+    position = np.arange(phred.size) - np.repeat(read_starts, read_lengths)
+
+    # sliding-window 3' trimming: keep each read up to the end of its last window whose
+    # average Phred is at least the trim quality; reads shorter than the window are one window
+    if criteria.trim_window is not None:
+        window = criteria.trim_window
+        cumulative = np.concatenate(([0], np.cumsum(phred, dtype=np.int64)))
+        window_end = np.minimum(np.arange(phred.size) + window, phred.size)
+        window_sum = cumulative[window_end] - cumulative[:-1]
+        full_window = position + window <= base_read_length
+        window_pass = full_window & (window_sum >= criteria.trim_quality * window)
+        keep = np.maximum.reduceat(np.where(window_pass, position + window, 0), read_starts)
+        short = read_lengths < window
+        short_sums = np.add.reduceat(phred, read_starts, dtype=np.int64)[short]
+        keep[short] = np.where(short_sums >= criteria.trim_quality * read_lengths[short], read_lengths[short], 0)
+        kept_base = position < np.repeat(keep, read_lengths)
+    else:
+        keep = read_lengths
+        kept_base = np.ones(phred.size, dtype=bool)
+
+    # average Phred rule, compared as sums so it matches sum(scores)/len(scores) >= min_phred exactly
+    phred_sums = np.add.reduceat(np.where(kept_base, phred, 0), read_starts, dtype=np.int64)
+    passed = (keep > 0) & (phred_sums >= criteria.min_phred * keep)
+
+    if criteria.min_base_quality is not None:
+        min_quality = np.minimum.reduceat(np.where(kept_base, phred, 255), read_starts)
+        passed &= min_quality >= criteria.min_base_quality
+
+    if criteria.max_low_quality_fraction is not None:
+        low_counts = np.add.reduceat(kept_base & (phred < criteria.low_quality_phred), read_starts, dtype=np.int64)
+        passed &= low_counts <= criteria.max_low_quality_fraction * keep
+
+    if criteria.max_n_fraction is not None:
+        # setting the 0x20 bit lower-cases letters, so this matches 'N' and 'n'
+        bases = np.frombuffer(''.join(sequences).encode('ascii'), dtype=np.uint8)
+        n_counts = np.add.reduceat(kept_base & ((bases | 0x20) == ord('n')), read_starts, dtype=np.int64)
+        passed &= n_counts <= criteria.max_n_fraction * keep
+
+    # scatter results for non-empty reads back onto the whole batch
+    batch_passed = np.zeros(len(lengths), dtype=bool)
+    batch_keep = np.zeros(len(lengths), dtype=np.int64)
+    batch_passed[nonempty] = passed
+    batch_keep[nonempty] = keep
+
+    return batch_passed, batch_keep
+
+def filter_read_batches(infile: object, outfile: object, encoding: str, criteria: FilterCriteria, batch_size: int) -> tuple[int, int]:
+    """
+    Given an open input FASTQ handle, an open output handle, Phred score encoding, and filter
+    criteria, scores reads batch_size at a time and writes the (trimmed) reads that pass to
+    the output handle as each batch is scored.
+
+    Args:
+        infile: text handle of the input FASTQ data
+        outfile: text handle the passing reads are written to
+        encoding: Phred score encoding scheme
+        criteria: FilterCriteria instance with the thresholds to apply
+        batch_size: number of reads scored together
+
+    Returns:
+        tuple[int, int]: number of reads read and number of reads passing the filter
+    """
+
+    # set number of infile and outfile reads to 0
+    infile_reads = 0
+    outfile_reads = 0
+
+    # quality characters start at this ASCII code for the given encoding
+    offset = PHRED_OFFSETS[encoding]
+
+    # SeqIO.write always writes Phred+33, so build a table that re-encodes other offsets
+    to_sanger = str.maketrans({chr(c): chr(c - offset + 33) for c in range(offset, 127)})
+
+    # take the raw title, sequence and quality strings of batch_size reads at a time
+    reads = FastqGeneralIterator(infile)
+    while batch := list(islice(reads, batch_size)):
+        titles, sequences, qualities = zip(*batch)
+        passed, keep = score_batch(sequences, qualities, offset, criteria)
+
+        # write each passing read, cut to its trimmed length
+        for i in np.flatnonzero(passed):
+            n = keep[i]
+            outfile.write(f"@{titles[i]}\n{sequences[i][:n]}\n+\n{qualities[i][:n].translate(to_sanger)}\n")
+
+        # increment infile and outfile reads
+        infile_reads += len(batch)
+        outfile_reads += int(passed.sum())
+
+    return infile_reads, outfile_reads
+
+def stream_filter_fastq(input_file: str, output_file: str, encoding: str, criteria: FilterCriteria, batch_size: int = BATCH_SIZE, bgzf: bool = False, compress_level: int = COMPRESS_LEVEL, compress_threads: int = COMPRESS_THREADS) -> tuple[int, int]:
+    """
+    Given input FASTQ file, output file path, Phred score encoding, and filter criteria,
+    streams reads through the filter in batches and writes the (trimmed) reads that pass
+    to the output file as each batch is scored, so memory use is bounded by the batch size
+    rather than the size of the input.
+
+    Args:
+        input_file: path to input FASTQ file (plain, gzip or BGZF)
+        output_file: path of output FASTQ file
+        encoding: Phred score encoding scheme
+        criteria: FilterCriteria instance with the thresholds to apply
+        batch_size: number of reads scored together
+        bgzf: whether to BGZF compress the output file
+        compress_level: zlib compression level used when bgzf is True
+        compress_threads: number of threads compressing output blocks when bgzf is True
+
+    Returns:
+        tuple[int, int]: number of reads in the input file and number of reads passing the filter
+    """
+
+    logging.info(f"Reading FASTQ file '{input_file}' and writing filtered reads to '{output_file}'")
+
+    # open given fastq file for reading and new fastq file for writing
+    with open_input(input_file) as infile, open_output(output_file, 'w', bgzf, compress_level, compress_threads) as outfile:
+        infile_reads, outfile_reads = filter_read_batches(infile, outfile, encoding, criteria, batch_size)
+
+    logging.info(f"Finished reading FASTQ file '{input_file}'")
+    logging.info(f"Total reads in original file: {infile_reads}")
+    logging.info(f"Reads passing filter: {outfile_reads}")
+
+    return infile_reads, outfile_reads
+
+def find_record_start(infile: object, position: int) -> int:
+    """
+    Given a binary handle of a FASTQ file and a byte position, finds the first record that
+    starts at or after the position. A record start is a line beginning with '@' whose
+    third line begins with '+' and whose sequence and quality lines have the same length,
+    which a quality line that happens to begin with '@' can not satisfy.
+
+    Args:
+        infile: binary handle of the FASTQ file
+        position: byte position to search from
+
+    Returns:
+        int: byte offset of the record start, or of the end of the file if there is none
+    """
+
+    # unless we are at the very start, the first (possibly partial) line belongs to an earlier record
+    infile.seek(position)
+    if position > 0:
+        infile.readline()
+
+    while True:
+        record_start = infile.tell()
+        title, sequence, plus, quality = (infile.readline() for _ in range(4))
+
+        if not title:
+            return record_start
+
+        if title.startswith(b'@') and plus.startswith(b'+') and len(sequence.rstrip()) == len(quality.rstrip()):
+            return record_start
+
+        # not a record start, so move forward one line and try again
+        infile.seek(record_start)
+        infile.readline()
+
+def shard_fastq(input_file: str, num_shards: int) -> list[tuple[int, int]]:
+    """
+    Given an input FASTQ file with four-line records and a number of shards, splits the file
+    into roughly equal byte ranges that each start and end on a record boundary.
+
+    Args:
+        input_file: path to input FASTQ file
+        num_shards: number of byte ranges to split the file into
+
+    Returns:
+        list[tuple[int, int]]: (start, end) byte offsets of each shard, in file order
+    """
+    size = os.path.getsize(input_file)
+
+    # move each evenly spaced cut point forward to the next record boundary
+    with open(input_file, 'rb') as infile:
+        boundaries = sorted({0, size, *(find_record_start(infile, size * i // num_shards) for i in range(1, num_shards))})
+
+    return [(start, end) for start, end in zip(boundaries, boundaries[1:]) if start < end]
+
+def filter_fastq_shard(input_file: str, start: int, end: int, part_file: str, encoding: str, criteria: FilterCriteria, batch_size: int, bgzf: bool, compress_level: int) -> tuple[int, int]:
+    """
+    Given input FASTQ file, the byte range of one shard, and a part file path, filters the
+    reads of the shard into the part file. Runs in a worker process.
+
+    Args:
+        input_file: path to input FASTQ file
+        start: byte offset of the first record of the shard
+        end: byte offset just past the last record of the shard
+        part_file: path of the FASTQ file the passing reads of the shard are written to
+        encoding: Phred score encoding scheme
+        criteria: FilterCriteria instance with the thresholds to apply
+        batch_size: number of reads scored together
+        bgzf: whether to BGZF compress the part file, leaving out the end-of-file block
+        compress_level: zlib compression level used when bgzf is True
+
+    Returns:
+        tuple[int, int]: number of reads in the shard and number of reads passing the filter
+    """
+    logging.debug(f"Filtering bytes {start}-{end} of '{input_file}' into '{part_file}'")
+
+    with io.TextIOWrapper(io.BufferedReader(ByteRangeReader(input_file, start, end))) as infile, \
+            open_output(part_file, 'w', bgzf, compress_level, write_eof=False) as outfile:
+        return filter_read_batches(infile, outfile, encoding, criteria, batch_size)
+
+def parallel_filter_fastq(input_file: str, output_file: str, encoding: str, criteria: FilterCriteria, batch_size: int, workers: int, bgzf: bool = False, compress_level: int = COMPRESS_LEVEL) -> tuple[int, int]:
+    """
+    Given input FASTQ file, output file path, Phred score encoding, filter criteria and a number
+    of worker processes, splits the input into record-aligned shards, filters the shards in a
+    process pool and appends each shard's passing reads to the output in the original order.
+    With bgzf, each worker compresses its own part, and since BGZF files are a series of
+    independent blocks the parts are simply joined and finished with the end-of-file block.
+
+    Args:
+        input_file: path to input FASTQ file (uncompressed)
+        output_file: path of output FASTQ file
+        encoding: Phred score encoding scheme
+        criteria: FilterCriteria instance with the thresholds to apply
+        batch_size: number of reads scored together
+        workers: number of worker processes
+        bgzf: whether to BGZF compress the output file
+        compress_level: zlib compression level used when bgzf is True
+
+    Returns:
+        tuple[int, int]: number of reads in the input file and number of reads passing the filter
+    """
+
+    # set number of infile and outfile reads to 0
+    infile_reads = 0
+    outfile_reads = 0
+
+    # several shards per worker keep every worker busy when shards filter at different speeds
+    shards = shard_fastq(input_file, workers * SHARDS_PER_WORKER)
+
+    logging.info(f"Filtering FASTQ file '{input_file}' in {len(shards)} shards with {workers} workers")
+
+    # part files are kept next to the output so appending them does not cross file systems
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(output_file))) as tmp, \
+            ProcessPoolExecutor(max_workers=workers) as executor, open(output_file, 'wb') as outfile:
+
+        part_files = [os.path.join(tmp, f'part{i:05d}.fastq') for i in range(len(shards))]
+        starts, ends = zip(*shards) if shards else ((), ())
+        results = executor.map(
+            filter_fastq_shard, repeat(input_file), starts, ends, part_files,
+            repeat(encoding), repeat(criteria), repeat(batch_size), repeat(bgzf), repeat(compress_level)
+        )
+
+        # results arrive in shard order, so each part is appended while later shards still run
+        for part_file, (shard_reads, shard_passing) in zip(part_files, results):
+            with open(part_file, 'rb') as part:
+                shutil.copyfileobj(part, outfile, 1 << 20)
+            os.remove(part_file)
+            infile_reads += shard_reads
+            outfile_reads += shard_passing
+
+        if bgzf:
+            outfile.write(BGZF_EOF)
+
+    logging.info(f"Finished reading FASTQ file '{input_file}'")
+    logging.info(f"Total reads in original file: {infile_reads}")
+    logging.info(f"Reads passing filter: {outfile_reads}")
+
+    return infile_reads, outfile_reads
+
 def main():
 
     logging.info("Starting FASTQ filter workflow")
 
     try:
-        filtered_reads = filter_fastq(args.fastqfile, args.encoding, args.minimumPhred)
-        write_filtered_to_fastq(filtered_reads, args.output)
+        if args.engine == 'stream':
+            criteria = FilterCriteria(
+                min_phred=args.minimumPhred,
+                min_base_quality=args.minimumBaseQuality,
+                max_low_quality_fraction=args.maxLowQualityFraction,
+                low_quality_phred=args.lowQualityPhred,
+                trim_window=args.trimWindow,
+                trim_quality=args.trimQuality,
+                max_n_fraction=args.maxNFraction
+            )
+            # compressed input can not be split at byte offsets, so it is filtered in one process
+            workers = args.workers
+            if workers > 1 and is_gzipped(args.fastqfile):
+                logging.warning("Compressed input can not be sharded; filtering with one worker")
+                workers = 1
+
+            if workers > 1:
+                parallel_filter_fastq(
+                    args.fastqfile, args.output, args.encoding, criteria, args.batchSize, workers,
+                    args.bgzf, args.compressLevel
+                )
+            else:
+                stream_filter_fastq(
+                    args.fastqfile, args.output, args.encoding, criteria, args.batchSize,
+                    args.bgzf, args.compressLevel, args.compressThreads
+                )
+        else:
+            filtered_reads = filter_fastq(args.fastqfile, args.encoding, args.minimumPhred)
+            write_filtered_to_fastq(filtered_reads, args.output, args.bgzf, args.compressLevel, args.compressThreads)
     except FileNotFoundError:
         logging.error(f"Input FASTQ file '{args.fastqfile}' not found. Exiting.")
         sys.exit(1)
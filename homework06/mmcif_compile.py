@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+import argparse
+import logging
+import os
+import socket
+import sys
+import time
+from atom_table import load_atom_table
+from compressed_io import open_input
+from structure_archive import ARCHIVE_SUFFIX, write_archive
+
+# -------------------------
+# Constants (configuration)
+# -------------------------
+MMCIF_EXTENSIONS = ('.cif', '.cif.gz', '.mmcif', '.mmcif.gz')
+
+# -------------------------
+# Logging and Command Line Inputs setup
+# -------------------------
+parser = argparse.ArgumentParser()
+parser.add_argument(
+    '-l', '--loglevel',
+    type=str,
+    required=False,
+    choices=['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'],
+    default='WARNING',
+    help='set log level to DEBUG, INFO, WARNING, ERROR, or CRITICAL (default: WARNING)'
+)
+parser.add_argument(
+    '-m', '--mmciffiles',
+    type=str,
+    nargs='+',
+    required=True,
+    help='The paths to the input mmCIF files (.cif or .cif.gz)'
+)
+parser.add_argument(
+    '-o', '--outputDir',
+    type=str,
+    required=False,
+    default=None,
+    help=f'The directory the {ARCHIVE_SUFFIX} archives are written to (default: next to each input file)'
+)
+args = parser.parse_args()
+
+format_str = (
+    f'[%(asctime)s {socket.gethostname()}] '
+    '%(filename)s:%(funcName)s:%(lineno)s - %(levelname)s: %(message)s'
+)
+logging.basicConfig(level=args.loglevel, format=format_str)
+
+# -------------------------
+# Functions
+# -------------------------
+def archive_path(mmcif_file: str, output_dir: str | None) -> str:
+    """
+    Given an mmCIF file and an optional output directory, returns the path of its archive:
+    the file name with its mmCIF (and gzip) extension replaced by ARCHIVE_SUFFIX.
+
+    Args:
+        mmcif_file: path to the mmCIF file
+        output_dir: directory for the archive, or None for the directory of the mmCIF file
+
+    Returns:
+        str: path of the archive
+    """
+    name = os.path.basename(mmcif_file)
+    for extension in MMCIF_EXTENSIONS:
+        if name.endswith(extension):
+            name = name[:-len(extension)]
+            break
+    return os.path.join(output_dir or os.path.dirname(mmcif_file), name + ARCHIVE_SUFFIX)
+
+def compile_mmcif(mmcif_file: str, archive_file: str) -> None:
+    """
+    Given an mmCIF file and an output path, parses the _atom_site loop once and writes it
+    as a structure archive.
+
+    Args:
+        mmcif_file: path to the mmCIF file
+        archive_file: path of the output archive
+
+    Returns:
+        None: this function doesn't return a value; it writes to an output file
+    """
+    start = time.perf_counter()
+    with open_input(mmcif_file) as f:
+        table = load_atom_table(f)
+    size = write_archive(table, archive_file)
+
+    logging.info(f"Compiled {len(table)} atoms of {mmcif_file} into {archive_file} "
+                 f"({size} bytes, {time.perf_counter() - start:.2f} s)")
+
+def main():
+
+    logging.info("Starting mmCIF compile workflow")
+
+    if args.outputDir:
+        os.makedirs(args.outputDir, exist_ok=True)
+
+    for mmcif_file in args.mmciffiles:
+        try:
+            compile_mmcif(mmcif_file, archive_path(mmcif_file, args.outputDir))
+        except FileNotFoundError:
+            logging.error(f"Input mmCIF file {mmcif_file} not found. Exiting")
+            sys.exit(1)
+        except ValueError as e:
+            logging.error(f"Could not compile mmCIF file {mmcif_file}: {e}. Exiting")
+            sys.exit(1)
+
+    logging.info("mmCIF compile workflow complete")
+
+if __name__ == '__main__':
+    main()
@@ -2,15 +2,42 @@
 import json
 import argparse
 import logging
+import os
 import socket
 import sys
+import time
+import warnings
+from multiprocessing import Pool
 from pydantic import BaseModel
 from Bio.PDB.MMCIFParser import MMCIFParser
+from Bio.PDB.PDBExceptions import PDBConstructionWarning
+from atom_site import ModelSelection, filter_models, iter_atom_site
+from compressed_io import open_input
+from structure_archive import ARCHIVE_SUFFIX, is_archive, open_atom_table
+from summary_cache import CACHE_FILE, MAX_BYTES, SummaryCache, open_cache
 
 # -------------------------
 # Constants (Configuration)
 # -------------------------
 OUTPUT_JSON = "protein_summary.json"
+OUTPUT_JSONL = "protein_summaries.jsonl"
+WORKERS = os.cpu_count() or 1
+MAX_TASKS_PER_CHILD = 200
+PROGRESS_EVERY = 1000
+MMCIF_EXTENSIONS = ('.cif', '.cif.gz', '.mmcif', '.mmcif.gz', ARCHIVE_SUFFIX)
+
+# part of every cache key; bump it whenever the summary of the same file would change
+SUMMARIZER_VERSION = '1'
+
+# atoms closer than this (in angstroms) are in contact with --contacts
+CONTACT_DISTANCE = 4.0
+
+# _atom_site columns read by the fast summarizer; label_comp_id is needed because
+# Bio.PDB names hetero residues H_<resname>, and label_seq_id stands in for auth_seq_id
+ATOM_SITE_COLUMNS = [
+    'pdbx_PDB_model_num', 'auth_asym_id', 'auth_seq_id', 'label_seq_id',
+    'pdbx_PDB_ins_code', 'group_PDB', 'label_comp_id'
+]
 
 # -------------------------
 # Logging and Command Line Inputs setup
@@ -24,28 +51,121 @@ parser.add_argument(
     default='WARNING',
     help='set log level to DEBUG, INFO, WARNING, ERROR, or CRITICAL (default: WARNING)'
 )
-parser.add_argument(
+inputs = parser.add_mutually_exclusive_group()
+inputs.add_argument(
     '-m', '--mmciffile',
     type=str,
-    required=True,
-    help='The path to the input mmCIF file'
+    help=f'The path to the input mmCIF file, or its {ARCHIVE_SUFFIX} archive from mmcif_compile.py'
+)
+inputs.add_argument(
+    '-d', '--batch',
+    type=str,
+    help=f'A directory of mmCIF files (.cif, .cif.gz or {ARCHIVE_SUFFIX}), or a manifest file listing one mmCIF path per line, to summarize in parallel'
 )
 parser.add_argument(
     '-o', '--output',
     type=str,
     required= False,
-    default=OUTPUT_JSON,
-    help=f'The path to the output JSON file (default: {OUTPUT_JSON})'
+    default=None,
+    help=f'The path to the output JSON file, or JSON Lines file with --batch (default: {OUTPUT_JSON}, or {OUTPUT_JSONL} with --batch)'
+)
+parser.add_argument(
+    '-f', '--fast',
+    action='store_true',
+    help='Summarize from the _atom_site columns alone instead of building a Bio.PDB Structure'
+)
+parser.add_argument(
+    '-g', '--geometry',
+    action='store_true',
+    help='Also report the atom count, centroid, radius of gyration, bounding box and mean B-factor of each chain'
+)
+parser.add_argument(
+    '-t', '--contacts',
+    action='store_true',
+    help='Also report the residues of each chain that touch other chains or hetero groups, and contacts per partner chain'
+)
+parser.add_argument(
+    '--contactDistance',
+    type=float,
+    required=False,
+    default=CONTACT_DISTANCE,
+    help=f'The largest atom-atom distance in angstroms counted as a contact with --contacts (default: {CONTACT_DISTANCE})'
+)
+parser.add_argument(
+    '--models',
+    type=str,
+    required=False,
+    default='all',
+    help="Which models to summarize: 'all', 'first' or model numbers such as 1,3,5; other models are skipped while reading (default: all)"
+)
+parser.add_argument(
+    '--collapseModels',
+    action='store_true',
+    help='Report chains whose summaries are the same in several models once, with the number of models'
+)
+parser.add_argument(
+    '-w', '--workers',
+    type=int,
+    required=False,
+    default=WORKERS,
+    help=f'The number of processes summarizing entries with --batch (default: {WORKERS})'
+)
+parser.add_argument(
+    '--maxTasksPerChild',
+    type=int,
+    required=False,
+    default=MAX_TASKS_PER_CHILD,
+    help=f'Replace each --batch worker after this many entries so its memory stays bounded (default: {MAX_TASKS_PER_CHILD})'
+)
+parser.add_argument(
+    '--retryFailed',
+    action='store_true',
+    help='When resuming a --batch run, summarize entries that failed before again'
+)
+parser.add_argument(
+    '-c', '--cache',
+    type=str,
+    required=False,
+    default=CACHE_FILE,
+    help=f'The path to the SQLite cache of summaries keyed by file content (default: {CACHE_FILE})'
+)
+parser.add_argument(
+    '--cacheMaxBytes',
+    type=int,
+    required=False,
+    default=MAX_BYTES,
+    help=f'The size the cache is trimmed to, dropping least recently used summaries first (default: {MAX_BYTES})'
+)
+parser.add_argument(
+    '--noCache',
+    action='store_true',
+    help='Neither read nor write the cache'
+)
+parser.add_argument(
+    '--clearCache',
+    action='store_true',
+    help='Delete every cached summary before running (may be given without -m or -d)'
 )
 
 args = parser.parse_args()
 
+if not (args.mmciffile or args.batch or args.clearCache):
+    parser.error('one of the arguments -m/--mmciffile -d/--batch is required')
+
+try:
+    ModelSelection(args.models)
+except ValueError as e:
+    parser.error(str(e))
+
 format_str = (
     f'[%(asctime)s {socket.gethostname()}] '
     '%(filename)s:%(funcName)s:%(lineno)s - %(levelname)s: %(message)s'
 )
 logging.basicConfig(level=args.loglevel, format=format_str)
 
+# summary cache of a --batch worker process, set by init_batch_worker()
+worker_cache = None
+
 # -------------------------
 # Classes
 # -------------------------
@@ -54,10 +174,33 @@ class ChainSummary(BaseModel):
     total_residues: int
     standard_residues: int
     hetero_residue_count: int
+
+    # only filled in with --geometry, and left out of the JSON otherwise
+    atom_count: int | None = None
+    centroid: list[float] | None = None
+    radius_of_gyration: float | None = None
+    bounding_box_min: list[float] | None = None
+    bounding_box_max: list[float] | None = None
+    mean_b_factor: float | None = None
+
+    # only filled in with --contacts
+    interface_residues: int | None = None
+    ligand_contact_residues: int | None = None
+    partner_contacts: dict[str, int] | None = None
+
+    # only filled in with --collapseModels: the number of models with this same chain summary
+    model_count: int | None = None
     
 class StructureSummary(BaseModel):
     chains: list[ChainSummary]
 
+class SummaryOptions(BaseModel):
+    fast: bool = False
+    geometry: bool = False
+    contact_distance: float | None = None
+    models: str = 'all'
+    collapse_models: bool = False
+
 # -------------------------
 # Functions
 # -------------------------
@@ -106,7 +249,7 @@ def summarize_chain(chain: object) -> ChainSummary:
     )
 
 
-def summarize_mmcif_structure(mmcif_file: str, structure_id: str = "structure_id") -> StructureSummary:
+def summarize_mmcif_structure(mmcif_file: str, structure_id: str = "structure_id", models: str = 'all') -> StructureSummary:
     """
     Given an MMCIF file and structure ID (optional), creates a list of ChainSummary instances 
     which are returned in a StructureSummary instance.
@@ -115,6 +258,8 @@ def summarize_mmcif_structure(mmcif_file: str, structure_id: str = "structure_id
         mmcif_file: the name of the mmcif file
         structure_id: the ID that will be used for the structure; has default value as ID of structure
                       is not important to purpose of this function
+        models: which models to summarize ('all', 'first' or model numbers such as '1,3,5');
+                the atom rows of other models are dropped before MMCIFParser sees them
     
     Returns:
         StructureSummary: StructureSummary instance containing a list of ChainSummary objects
@@ -127,8 +272,9 @@ def summarize_mmcif_structure(mmcif_file: str, structure_id: str = "structure_id
 
     # open input mmcif file for reading and retrieve structure as python variable 
     # with input (or default) structure id
-    with open(mmcif_file, 'r') as f:
-        structure = parser.get_structure(structure_id, f)
+    with open_input(mmcif_file) as f:
+        lines = f if models == 'all' else filter_models(f, ModelSelection(models))
+        structure = parser.get_structure(structure_id, lines)
 
     # create empty list for ChainSummary objects to be added to
     chains_list = []
@@ -149,6 +295,125 @@ def summarize_mmcif_structure(mmcif_file: str, structure_id: str = "structure_id
     )
 
 
+def summarize_mmcif_fast(mmcif_file: str, models: str = 'all') -> StructureSummary:
+    """
+    Given an MMCIF file, creates the same StructureSummary as summarize_mmcif_structure() from
+    the model, chain, residue number, insertion code, group and residue name columns of the
+    _atom_site loop, without building atoms. Residues are identified the way Bio.PDB does:
+    (hetfield, resseq, icode), with hetfield ' ' for ATOM, 'W' for water and H_<resname> for
+    other HETATM groups, and a new model starts whenever the model number changes.
+
+    Args:
+        mmcif_file: the name of the mmcif file
+        models: which models to summarize ('all', 'first' or model numbers such as '1,3,5');
+                reading stops once the selected models have been read
+
+    Returns:
+        StructureSummary: StructureSummary instance containing a list of ChainSummary objects
+    """
+
+    logging.info(f"Reading _atom_site columns of MMCIF file {mmcif_file}")
+
+    selection = ModelSelection(models)
+
+    # one dictionary per model of chain ID -> set of residue IDs, in order of first appearance
+    models = []
+    current_model = None
+
+    with open_input(mmcif_file) as f:
+        for model_num, chain_id, auth_seq, label_seq, icode, group, resname in iter_atom_site(f, ATOM_SITE_COLUMNS, selection):
+
+            # atoms without a residue number are skipped, as MMCIFParser does
+            resseq = auth_seq if auth_seq is not None else label_seq
+            if resseq == '.':
+                continue
+
+            if not models or model_num != current_model:
+                current_model = model_num
+                models.append({})
+
+            if group == 'HETATM':
+                hetfield = 'W' if resname in ('HOH', 'WAT') else f'H_{resname}'
+            else:
+                hetfield = ' '
+
+            icode = ' ' if icode in ('.', '?', None) else icode
+            models[-1].setdefault(chain_id, set()).add((hetfield, int(resseq), icode))
+
+    # count the residues of each chain of each model
+    chains_list = []
+    for chains in models:
+        for chain_id, residues in chains.items():
+            standard = sum(1 for hetfield, _, _ in residues if hetfield == ' ')
+            chains_list.append(ChainSummary(
+                chain_id = chain_id,
+                total_residues = len(residues),
+                standard_residues = standard,
+                hetero_residue_count = len(residues) - standard
+            ))
+
+    logging.info(f"Finished summarizing {len(chains_list)} chains")
+
+    return StructureSummary(
+        chains = chains_list
+    )
+
+
+def summarize_mmcif_table(mmcif_file: str, geometry: bool = True, contact_distance: float | None = None, models: str = 'all') -> StructureSummary:
+    """
+    Given an MMCIF file or structure archive, loads its atoms into a columnar AtomTable and
+    creates the StructureSummary of summarize_mmcif_structure(), optionally with the geometry
+    of each chain added (atom count, centroid, radius of gyration, bounding box and mean
+    B-factor) and its contacts (interface residues, residues touching hetero groups and
+    residue contacts per partner chain). Every metric is a vectorized group-by over the atom
+    arrays, and contacts come from a spatial index built once for the structure.
+
+    Args:
+        mmcif_file: the name of the mmcif file or archive
+        geometry: whether to add the geometry of each chain
+        contact_distance: distance cutoff of the contacts, or None to leave contacts out
+        models: which models to summarize ('all', 'first' or model numbers such as '1,3,5')
+
+    Returns:
+        StructureSummary: StructureSummary instance containing a list of ChainSummary objects
+    """
+
+    logging.info(f"Reading atom table of {mmcif_file}")
+
+    # an archive is memory-mapped, an mmCIF file has its _atom_site loop parsed
+    table = open_atom_table(mmcif_file, ModelSelection(models))
+
+    chains_list = [ChainSummary(**chain) for chain in table.summarize_chains(geometry, contact_distance)]
+
+    logging.info(f"Finished summarizing {len(chains_list)} chains from {len(table)} atom sites")
+
+    return StructureSummary(
+        chains = chains_list
+    )
+
+
+def collapse_models(summary: StructureSummary) -> StructureSummary:
+    """
+    Given a StructureSummary, merges chains whose summaries are identical (as the same chain
+    usually is in every model of an NMR ensemble) into one entry, in order of first appearance,
+    and sets model_count to the number of models each entry stands for.
+
+    Args:
+        summary: a StructureSummary with one ChainSummary per chain per model
+
+    Returns:
+        StructureSummary: StructureSummary with the identical chains merged
+    """
+    counts = {}
+    for chain in summary.chains:
+        key = chain.model_dump_json(exclude_none=True)
+        counts[key] = counts.get(key, 0) + 1
+
+    return StructureSummary(
+        chains = [ChainSummary.model_validate_json(key).model_copy(update={'model_count': count}) for key, count in counts.items()]
+    )
+
+
 def write_summary_to_json(summary: StructureSummary, output_file: str) -> None:
     """
     Given a StructureSummary object instance and the name of an output file, 
@@ -166,21 +431,279 @@ def write_summary_to_json(summary: StructureSummary, output_file: str) -> None:
 
     # open json file for writing and write StructureSummary to it
     with open(output_file, 'w') as outfile:
-        json.dump(summary.model_dump(), outfile, indent=2)
+        json.dump(summary.model_dump(exclude_none=True), outfile, indent=2)
 
     logging.info(f"Finished writing {output_file}")
 
+def cache_version(options: SummaryOptions) -> str:
+    """
+    Given the summary options, returns the version part of the cache key. The summarizers
+    give the same summary, so fast and Bio.PDB summaries share cache entries, while options
+    that add fields to the summary are cached separately.
+    """
+    version = SUMMARIZER_VERSION
+    if options.geometry:
+        version += '+geometry'
+    if options.contact_distance is not None:
+        version += f'+contacts{options.contact_distance}'
+    if options.models != 'all':
+        version += f'+models{options.models}'
+    if options.collapse_models:
+        version += '+collapsed'
+    return version
+
+def summarize_cached(mmcif_file: str, options: SummaryOptions, cache: SummaryCache | None) -> tuple[StructureSummary, bool]:
+    """
+    Given an mmCIF file, the summary options and an optional cache, returns the cached
+    StructureSummary for the file's content if there is one, and otherwise summarizes the
+    file and stores the result. A structure archive, and any summary with geometry or
+    contacts, is summarized from the file's atom table.
+
+    Args:
+        mmcif_file: path to the mmCIF file
+        options: which summarizer to use and which fields to add
+        cache: SummaryCache to read and write, or None to always summarize
+
+    Returns:
+        tuple[StructureSummary, bool]: the summary, and whether it came from the cache
+    """
+    key = cache.key(mmcif_file, cache_version(options)) if cache is not None else None
+    cached = cache.get(key) if cache is not None else None
+    if cached is not None:
+        logging.debug(f"Cache hit for {mmcif_file}")
+        return StructureSummary.model_validate_json(cached), True
+
+    if options.geometry or options.contact_distance is not None or is_archive(mmcif_file):
+        summary = summarize_mmcif_table(mmcif_file, options.geometry, options.contact_distance, options.models)
+    elif options.fast:
+        summary = summarize_mmcif_fast(mmcif_file, options.models)
+    else:
+        summary = summarize_mmcif_structure(mmcif_file, entry_id_from_path(mmcif_file), options.models)
+
+    if options.collapse_models:
+        summary = collapse_models(summary)
+
+    if cache is not None:
+        cache.put(key, summary.model_dump_json(exclude_none=True))
+    return summary, False
+
+def entry_id_from_path(mmcif_file: str) -> str:
+    """
+    Given the path of an mmCIF file, returns its entry ID: the file name without its
+    mmCIF (and gzip) extension, e.g. /mirror/hh/4hhb.cif.gz -> 4hhb.
+    """
+    name = os.path.basename(mmcif_file)
+    for extension in MMCIF_EXTENSIONS:
+        if name.endswith(extension):
+            return name[:-len(extension)]
+    return name
+
+def find_mmcif_files(batch: str) -> list[str]:
+    """
+    Given a directory or a manifest file, lists the mmCIF files to summarize. In a directory,
+    files with an mmCIF extension are used; a manifest lists one path per line, and relative
+    paths are taken relative to the manifest.
+
+    Args:
+        batch: path to a directory or a manifest file
+
+    Returns:
+        list[str]: mmCIF file paths
+    """
+    if os.path.isdir(batch):
+        return sorted(
+            os.path.join(batch, name) for name in os.listdir(batch)
+            if name.endswith(MMCIF_EXTENSIONS)
+        )
+
+    manifest_dir = os.path.dirname(os.path.abspath(batch))
+    with open(batch, 'r') as f:
+        return [os.path.join(manifest_dir, line.strip()) for line in f if line.strip() and not line.startswith('#')]
+
+def init_batch_worker(cache_path: str | None, cache_max_bytes: int) -> None:
+    """
+    Opens the summary cache of a batch worker process (each process needs its own SQLite
+    connection), or leaves it unset when cache_path is None.
+    """
+    global worker_cache
+    worker_cache = open_cache(cache_path, cache_max_bytes) if cache_path else None
+
+def summarize_entry(mmcif_file: str, options: SummaryOptions, cache: SummaryCache | None = None) -> dict:
+    """
+    Given an mmCIF file, the summary options and an optional cache, summarizes the entry
+    and returns one JSON Lines record. Runs in a worker process; any error is
+    recorded in the record instead of being raised, so one bad entry does not stop the batch.
+
+    Args:
+        mmcif_file: path to the mmCIF file
+        options: which summarizer to use and which fields to add
+        cache: SummaryCache to read and write, or None to always summarize
+
+    Returns:
+        dict: entry_id, file, seconds, cached and either summary or error
+    """
+    entry_id = entry_id_from_path(mmcif_file)
+    record = {'entry_id': entry_id, 'file': mmcif_file}
+    start = time.perf_counter()
+
+    try:
+        # Bio.PDB warns about every discontinuous chain, which would flood the log of a batch
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', PDBConstructionWarning)
+            summary, record['cached'] = summarize_cached(mmcif_file, options, cache)
+        record['summary'] = summary.model_dump(exclude_none=True)
+    except Exception as e:
+        record['error'] = f"{type(e).__name__}: {e}"
+
+    record['seconds'] = round(time.perf_counter() - start, 6)
+    return record
+
+def summarize_entry_task(task: tuple[str, SummaryOptions]) -> dict:
+    """
+    Unpacks a (mmcif_file, options) task for Pool.imap_unordered and calls summarize_entry()
+    with the worker's cache.
+    """
+    return summarize_entry(*task, worker_cache)
+
+def finished_entries(output_file: str, retry_failed: bool) -> set[str]:
+    """
+    Given the JSON Lines output of an earlier (possibly crashed) batch run, returns the entry
+    IDs it already finished, and cuts off a partly written last line so that new records
+    can be appended safely.
+
+    Args:
+        output_file: path to the JSON Lines output
+        retry_failed: whether entries recorded with an error should be summarized again
+
+    Returns:
+        set[str]: entry IDs that do not need to be summarized again
+    """
+    finished = set()
+    if not os.path.exists(output_file):
+        return finished
+
+    with open(output_file, 'rb+') as f:
+        data = f.read()
+        complete = data.rfind(b'\n') + 1
+        if complete < len(data):
+            logging.warning(f"Discarding a partly written record at the end of '{output_file}'")
+            f.truncate(complete)
+
+    for line in data[:complete].splitlines():
+        record = json.loads(line)
+        if 'summary' in record or not retry_failed:
+            finished.add(record['entry_id'])
+
+    return finished
+
+def batch_summarize_mmcif(mmcif_files: list[str], output_file: str, options: SummaryOptions, workers: int, max_tasks_per_child: int, retry_failed: bool, cache_path: str | None = None, cache_max_bytes: int = MAX_BYTES) -> tuple[int, int]:
+    """
+    Given a list of mmCIF files, summarizes them in a pool of worker processes and appends one
+    JSON Lines record per entry to the output file as results arrive. Each worker is replaced
+    after max_tasks_per_child entries so memory stays bounded, progress is logged every
+    PROGRESS_EVERY entries, and entries already in the output file are skipped, so a crashed
+    run can be restarted with the same command.
+
+    Args:
+        mmcif_files: paths to the mmCIF files
+        output_file: path to the JSON Lines output
+        options: which summarizer to use and which fields to add
+        workers: number of worker processes
+        max_tasks_per_child: number of entries each worker summarizes before it is replaced
+        retry_failed: whether entries that failed in an earlier run are summarized again
+        cache_path: path to the summary cache shared by the workers, or None for no cache
+        cache_max_bytes: size the cache is trimmed to
+
+    Returns:
+        tuple[int, int]: number of entries summarized and number that failed in this run
+    """
+    done = finished_entries(output_file, retry_failed)
+    todo = [f for f in mmcif_files if entry_id_from_path(f) not in done]
+    summarized = 0
+    failed = 0
+    hits = 0
+    start = time.perf_counter()
+
+    logging.info(f"Summarizing {len(todo)} entries with {workers} workers ({len(mmcif_files) - len(todo)} already in '{output_file}')")
+
+    with Pool(processes=workers, maxtasksperchild=max_tasks_per_child, initializer=init_batch_worker,
+              initargs=(cache_path, cache_max_bytes)) as pool, open(output_file, 'a') as outfile:
+        tasks = ((mmcif_file, options) for mmcif_file in todo)
+        for record in pool.imap_unordered(summarize_entry_task, tasks, chunksize=4):
+
+            # flush every record so a crash loses at most the entries still in flight
+            outfile.write(json.dumps(record) + '\n')
+            outfile.flush()
+
+            if 'error' in record:
+                failed += 1
+                logging.error(f"Could not summarize {record['entry_id']} ('{record['file']}'): {record['error']}")
+            else:
+                summarized += 1
+                hits += record['cached']
+
+            if (summarized + failed) % PROGRESS_EVERY == 0:
+                rate = (summarized + failed) / (time.perf_counter() - start)
+                logging.info(f"{summarized + failed}/{len(todo)} entries done ({rate:.1f} entries/s, {failed} failed)")
+
+    logging.info(f"Finished batch: {summarized} entries summarized, {failed} failed")
+    if cache_path:
+        logging.info(f"Cache: {hits} hits, {summarized + failed - hits} misses")
+
+        # workers only trim the cache every few writes, so trim it once more at the end
+        cache = open_cache(cache_path, cache_max_bytes)
+        if cache is not None:
+            cache.close()
+
+    return summarized, failed
+
 def main():
     
     logging.info(f"Starting MMCIF structure summary workflow")
 
+    cache_path = None if args.noCache else args.cache
+    options = SummaryOptions(
+        fast = args.fast,
+        geometry = args.geometry,
+        contact_distance = args.contactDistance if args.contacts else None,
+        models = args.models,
+        collapse_models = args.collapseModels
+    )
+    if args.clearCache:
+        cache = open_cache(args.cache, args.cacheMaxBytes)
+        if cache is not None:
+            cache.clear()
+            cache.close()
+        if not (args.mmciffile or args.batch):
+            return
+
+    if args.batch:
+        try:
+            mmcif_files = find_mmcif_files(args.batch)
+        except FileNotFoundError:
+            logging.error(f"Manifest {args.batch} not found. Exiting")
+            sys.exit(1)
+        batch_summarize_mmcif(
+            mmcif_files, args.output or OUTPUT_JSONL, options,
+            args.workers, args.maxTasksPerChild, args.retryFailed,
+            cache_path, args.cacheMaxBytes
+        )
+        logging.info(f"MMCIF structure summary workflow complete!")
+        return
+
     try: 
         # call summarize_mmcif_structure() function with command line input as argument
         # and set to 'summary' variable
-        summary = summarize_mmcif_structure(args.mmciffile)
+        cache = open_cache(cache_path, args.cacheMaxBytes) if cache_path else None
+        try:
+            summary, _ = summarize_cached(args.mmciffile, options, cache)
+        finally:
+            if cache is not None:
+                logging.info(f"Cache: {cache.hits} hits, {cache.misses} misses")
+                cache.close()
 
         # call write_summary_to_json with 'summary' and command line input output file as arguments
-        write_summary_to_json(summary, args.output)
+        write_summary_to_json(summary, args.output or OUTPUT_JSON)
 
         logging.info(f"MMCIF structure summary workflow complete!")
     
@@ -0,0 +1,167 @@
+"""
+Cell list spatial index for finding atoms within a distance cutoff of each other.
+
+Space is cut into cubic cells at least as wide as the cutoff, so any two atoms within the
+cutoff are in the same or neighbouring cells. Atoms are sorted by cell once, when the index
+is built; a query then only measures distances between atoms of neighbouring cells, which
+keeps the cost proportional to the number of atoms (at a fixed density) instead of the
+number of atom pairs. Every step is vectorized over cells with NumPy.
+"""
+import itertools
+import numpy as np
+
+# -------------------------
+# Constants (configuration)
+# -------------------------
+# offsets of the 27 cells around (and including) a cell, and the 13 of them (plus the cell
+# itself) that visit every pair of neighbouring cells exactly once
+NEIGHBOUR_OFFSETS = np.array(list(itertools.product((-1, 0, 1), repeat=3)), dtype=np.int64)
+HALF_SHELL_OFFSETS = NEIGHBOUR_OFFSETS[13:]
+
+# -------------------------
+# Classes
+# -------------------------
+class CellList:
+    """
+    Spatial index of a set of points (n x 3 coordinates) for pair and neighbour queries
+    with any cutoff up to cell_size.
+    """
+    def __init__(self, coords: np.ndarray, cell_size: float):
+        if cell_size <= 0:
+            raise ValueError("The cell size must be positive")
+
+        self.coords = np.asarray(coords, dtype=np.float64)
+        self.cell_size = cell_size
+        self.origin = self.coords.min(axis=0) if len(self.coords) else np.zeros(3)
+
+        cells = self.cell_of(self.coords)
+        self.dims = cells.max(axis=0) + 1 if len(cells) else np.ones(3, dtype=np.int64)
+
+        # points sorted by cell, and the first point and number of points of each occupied cell
+        keys = self.cell_key(cells)
+        self.order = np.argsort(keys, kind='stable')
+        self.cell_keys, self.cell_start, self.cell_count = np.unique(keys[self.order], return_index=True, return_counts=True)
+        self.cell_coords = cells[self.order][self.cell_start]
+
+    def __len__(self) -> int:
+        return len(self.coords)
+
+    def cell_of(self, points: np.ndarray) -> np.ndarray:
+        """
+        Given points, returns the integer (x, y, z) cell each one falls in.
+        """
+        return np.floor((points - self.origin) / self.cell_size).astype(np.int64)
+
+    def cell_key(self, cells: np.ndarray) -> np.ndarray:
+        """
+        Given integer cells inside the grid, returns one integer key per cell.
+        """
+        return (cells[:, 0] * self.dims[1] + cells[:, 1]) * self.dims[2] + cells[:, 2]
+
+    def find_cells(self, cells: np.ndarray) -> np.ndarray:
+        """
+        Given integer cells, returns the position of each in cell_keys, or -1 for cells that
+        are outside the grid or hold no points.
+        """
+        if not len(self.cell_keys):
+            return np.full(len(cells), -1)
+        inside = np.all((cells >= 0) & (cells < self.dims), axis=1)
+        keys = self.cell_key(np.where(inside[:, None], cells, 0))
+        position = np.searchsorted(self.cell_keys, keys)
+        position = np.minimum(position, len(self.cell_keys) - 1)
+        return np.where(inside & (self.cell_keys[position] == keys), position, -1)
+
+    def pairs(self, cutoff: float | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Given a cutoff (default: the cell size), finds every pair of points at most the
+        cutoff apart.
+
+        Args:
+            cutoff: largest distance between the points of a pair, at most cell_size
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: indices i and j of the pairs, with i < j
+        """
+        cutoff = self.check_cutoff(cutoff)
+        found_i, found_j = [], []
+
+        # one neighbouring-cell direction at a time keeps the candidate arrays small
+        for offset in HALF_SHELL_OFFSETS:
+            neighbour = self.find_cells(self.cell_coords + offset)
+            cells = np.flatnonzero(neighbour >= 0)
+            left, right = expand_cell_pairs(self.cell_start[cells], self.cell_count[cells],
+                                            self.cell_start[neighbour[cells]], self.cell_count[neighbour[cells]])
+
+            # within a cell, keep each pair once
+            if not offset.any():
+                left, right = left[left < right], right[left < right]
+
+            i, j = self.order[left], self.order[right]
+            close = ((self.coords[i] - self.coords[j]) ** 2).sum(axis=1) <= cutoff ** 2
+            found_i.append(i[close])
+            found_j.append(j[close])
+
+        i, j = np.concatenate(found_i), np.concatenate(found_j)
+        return np.minimum(i, j), np.maximum(i, j)
+
+    def query(self, points: np.ndarray, cutoff: float | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Given query points and a cutoff (default: the cell size), finds the indexed points
+        within the cutoff of each query point.
+
+        Args:
+            points: m x 3 coordinates of the query points
+            cutoff: largest distance to a neighbour, at most cell_size
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: index of the query point and of the indexed point
+                                           of each neighbour pair
+        """
+        cutoff = self.check_cutoff(cutoff)
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        cells = self.cell_of(points)
+        found_query, found_point = [], []
+
+        for offset in NEIGHBOUR_OFFSETS:
+            neighbour = self.find_cells(cells + offset)
+            queries = np.flatnonzero(neighbour >= 0)
+            query, right = expand_cell_pairs(queries, np.ones(len(queries), dtype=np.int64),
+                                             self.cell_start[neighbour[queries]], self.cell_count[neighbour[queries]])
+            point = self.order[right]
+            close = ((points[query] - self.coords[point]) ** 2).sum(axis=1) <= cutoff ** 2
+            found_query.append(query[close])
+            found_point.append(point[close])
+
+        return np.concatenate(found_query), np.concatenate(found_point)
+
+    def check_cutoff(self, cutoff: float | None) -> float:
+        if cutoff is None:
+            return self.cell_size
+        if cutoff > self.cell_size:
+            raise ValueError(f"The cutoff {cutoff} is larger than the cell size {self.cell_size}")
+        return cutoff
+
+# -------------------------
+# Functions
+# -------------------------
+def ranges(starts: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """
+    Given range starts and lengths, returns the concatenation of the ranges, e.g.
+    starts [0, 10] and counts [2, 3] give [0, 1, 10, 11, 12].
+    """
+    total = counts.sum()
+    ends = np.cumsum(counts)
+    return np.repeat(starts - ends + counts, counts) + np.arange(total)
+
+def expand_cell_pairs(left_start: np.ndarray, left_count: np.ndarray, right_start: np.ndarray, right_count: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Given matched ranges of positions on the left and right, returns every (left, right)
+    combination of positions within each matched pair of ranges.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: left and right positions of every combination
+    """
+    left = ranges(left_start, left_count)
+    per_left = np.repeat(right_count, left_count)
+    right = ranges(np.repeat(right_start, left_count), per_left)
+    return np.repeat(left, per_left), right
@@ -0,0 +1,133 @@
+"""
+Compiled binary archive of a parsed structure, loaded by memory-mapping it.
+
+An archive holds the typed arrays of an AtomTable (the atoms), its hierarchy (the chain
+and residue of every atom, and the first atom of every chain and residue) and the labels
+of its coded columns (model numbers, chain IDs, residue and atom names). Its layout is:
+
+    ARCHIVE_MAGIC | header length (uint64, little endian) | JSON header | arrays
+
+where the JSON header gives the labels and the dtype, shape and byte offset of every array,
+and every array starts on an ARCHIVE_ALIGNMENT byte boundary. Loading an archive maps the
+file and wraps each array around the mapped bytes without copying, so reopening a structure
+costs next to nothing, pages are only read when used, and processes that open the same
+archive share its pages through the page cache.
+"""
+import json
+import mmap
+import struct
+import numpy as np
+from atom_site import ModelSelection
+from atom_table import ATOM_ARRAYS, HIERARCHY_ARRAYS, AtomTable, load_atom_table
+from compressed_io import open_input
+
+# -------------------------
+# Constants (configuration)
+# -------------------------
+ARCHIVE_MAGIC = b'CIFARC01'
+ARCHIVE_SUFFIX = '.cifarc'
+ARCHIVE_ALIGNMENT = 64
+
+# -------------------------
+# Functions
+# -------------------------
+def is_archive(path: str) -> bool:
+    """
+    Given a file path, checks its first bytes for the archive magic number.
+
+    Args:
+        path: path of the file to check
+
+    Returns:
+        bool: True if the file is a structure archive
+    """
+    with open(path, 'rb') as f:
+        return f.read(len(ARCHIVE_MAGIC)) == ARCHIVE_MAGIC
+
+def write_archive(table: AtomTable, archive_file: str) -> int:
+    """
+    Given an AtomTable and an output path, writes the table and its hierarchy as an archive.
+
+    Args:
+        table: the atoms of a structure
+        archive_file: path of the output archive
+
+    Returns:
+        int: size of the archive in bytes
+    """
+    arrays = {name: np.ascontiguousarray(table.arrays[name], dtype=dtype) for name, dtype in ATOM_ARRAYS.items()}
+    hierarchy = table.build_hierarchy()
+    arrays.update({name: np.ascontiguousarray(hierarchy[name], dtype=dtype) for name, dtype in HIERARCHY_ARRAYS.items()})
+
+    # lay the arrays out one after the other, each aligned, with offsets counted from the
+    # start of the data section because the header length is only known once they are set
+    layout = {}
+    offset = 0
+    for name, values in arrays.items():
+        offset = -(-offset // ARCHIVE_ALIGNMENT) * ARCHIVE_ALIGNMENT
+        layout[name] = {'dtype': values.dtype.str, 'shape': list(values.shape), 'offset': offset}
+        offset += values.nbytes
+
+    header = json.dumps({'labels': table.labels, 'arrays': layout}).encode()
+    preamble = len(ARCHIVE_MAGIC) + 8 + len(header)
+    data_start = -(-preamble // ARCHIVE_ALIGNMENT) * ARCHIVE_ALIGNMENT
+
+    with open(archive_file, 'wb') as f:
+        f.write(ARCHIVE_MAGIC + struct.pack('<Q', len(header)) + header)
+        f.write(b'\0' * (data_start - preamble))
+        for name, values in arrays.items():
+            f.write(b'\0' * (data_start + layout[name]['offset'] - f.tell()))
+            f.write(values.tobytes())
+        return f.tell()
+
+def load_archive(archive_file: str) -> AtomTable:
+    """
+    Given an archive, memory-maps it and returns an AtomTable whose arrays are read-only
+    views of the mapped file.
+
+    Args:
+        archive_file: path of the archive
+
+    Returns:
+        AtomTable: the atoms of the structure, with their hierarchy
+    """
+    with open(archive_file, 'rb') as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if mm[:len(ARCHIVE_MAGIC)] != ARCHIVE_MAGIC:
+        raise ValueError(f"'{archive_file}' is not a structure archive")
+    (header_length,) = struct.unpack_from('<Q', mm, len(ARCHIVE_MAGIC))
+    preamble = len(ARCHIVE_MAGIC) + 8 + header_length
+    header = json.loads(mm[len(ARCHIVE_MAGIC) + 8:preamble])
+    data_start = -(-preamble // ARCHIVE_ALIGNMENT) * ARCHIVE_ALIGNMENT
+
+    # each view keeps the map open for as long as the arrays are in use
+    arrays = {}
+    for name, layout in header['arrays'].items():
+        dtype = np.dtype(layout['dtype'])
+        count = int(np.prod(layout['shape']))
+        arrays[name] = np.frombuffer(mm, dtype=dtype, count=count, offset=data_start + layout['offset']).reshape(layout['shape'])
+
+    return AtomTable(
+        {name: arrays[name] for name in ATOM_ARRAYS},
+        header['labels'],
+        {name: arrays[name] for name in HIERARCHY_ARRAYS}
+    )
+
+def open_atom_table(path: str, models: ModelSelection | None = None) -> AtomTable:
+    """
+    Given an mmCIF file (plain or gzipped) or a structure archive, returns its AtomTable,
+    memory-mapping the archive or parsing the _atom_site loop of the mmCIF file.
+
+    Args:
+        path: path of the mmCIF file or archive
+        models: which models to load (default: all)
+
+    Returns:
+        AtomTable: the atoms of the structure
+    """
+    if is_archive(path):
+        table = load_archive(path)
+        return table if models is None else table.select_models(models)
+    with open_input(path) as f:
+        return load_atom_table(f, models)
@@ -0,0 +1,147 @@
+"""
+Persistent, content-addressed cache of summaries in a local SQLite file.
+
+Entries are keyed by the SHA-256 of an input file's bytes plus a version string, so an
+unchanged file is never summarized twice while any change to the file (or to the
+summarizer, when its version is bumped) misses. The cache is bounded in size, evicting
+the least recently used entries first, and can be shared by several processes.
+"""
+import hashlib
+import logging
+import os
+import sqlite3
+import time
+
+# -------------------------
+# Constants (configuration)
+# -------------------------
+CACHE_FILE = os.environ.get('MMCIF_SUMMARY_CACHE') or os.path.join(os.path.expanduser('~'), '.cache', 'mmcif_summary', 'summaries.sqlite')
+MAX_BYTES = 512 * 1024 * 1024
+HASH_CHUNK_SIZE = 1 << 20
+
+# checking the total size is a full scan, so eviction runs every EVICT_EVERY writes and on close
+EVICT_EVERY = 1000
+
+# -------------------------
+# Classes
+# -------------------------
+class SummaryCache:
+    """
+    SQLite-backed cache of text values (e.g. StructureSummary JSON) keyed by file content.
+    Counts hits and misses; call close() (or use as a context manager) to evict down to
+    max_bytes and release the database.
+    """
+    def __init__(self, path: str = CACHE_FILE, max_bytes: int = MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        # WAL lets batch workers read while another worker writes
+        self.db = sqlite3.connect(path, timeout=60)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute(
+            'CREATE TABLE IF NOT EXISTS entries '
+            '(key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)'
+        )
+        self.db.execute('CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)')
+        self.db.commit()
+
+    def __enter__(self) -> 'SummaryCache':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def key(self, file_path: str, version: str) -> str:
+        """
+        Given a file and a version string, returns the cache key: the SHA-256 of the
+        file's bytes followed by the version.
+        """
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            while chunk := f.read(HASH_CHUNK_SIZE):
+                digest.update(chunk)
+        return f"{digest.hexdigest()}:{version}"
+
+    def get(self, key: str) -> str | None:
+        """
+        Given a cache key, returns the stored value (marking it recently used) or None.
+        """
+        row = self.db.execute('SELECT value FROM entries WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        with self.db:
+            self.db.execute('UPDATE entries SET last_access = ? WHERE key = ?', (time.time(), key))
+        return row[0]
+
+    def put(self, key: str, value: str) -> None:
+        """
+        Given a cache key and value, stores the value.
+        """
+        with self.db:
+            self.db.execute(
+                'INSERT OR REPLACE INTO entries (key, value, size, last_access) VALUES (?, ?, ?, ?)',
+                (key, value, len(key) + len(value), time.time())
+            )
+        self.writes += 1
+        if self.writes % EVICT_EVERY == 0:
+            self.evict()
+
+    def evict(self) -> int:
+        """
+        Deletes least recently used entries until the cache holds at most max_bytes.
+
+        Returns:
+            int: number of entries deleted
+        """
+        total = self.db.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+
+        deleted = 0
+        with self.db:
+            for key, size in self.db.execute('SELECT key, size FROM entries ORDER BY last_access').fetchall():
+                if total <= self.max_bytes:
+                    break
+                self.db.execute('DELETE FROM entries WHERE key = ?', (key,))
+                total -= size
+                deleted += 1
+
+        logging.info(f"Evicted {deleted} least recently used entries from cache '{self.path}'")
+        return deleted
+
+    def clear(self) -> None:
+        """
+        Deletes every entry.
+        """
+        with self.db:
+            self.db.execute('DELETE FROM entries')
+        self.db.execute('VACUUM')
+        logging.info(f"Cleared cache '{self.path}'")
+
+    def close(self) -> None:
+        self.evict()
+        self.db.close()
+
+# -------------------------
+# Functions
+# -------------------------
+def open_cache(path: str, max_bytes: int = MAX_BYTES) -> SummaryCache | None:
+    """
+    Given a cache path and size limit, opens the cache, or returns None if it can not be
+    opened so the summaries are computed uncached. Only a path the user chose is warned
+    about: the default one is often unwritable, e.g. in a container run without a home.
+    """
+    try:
+        return SummaryCache(path, max_bytes)
+    except (OSError, sqlite3.Error) as e:
+        level = logging.INFO if path == CACHE_FILE else logging.WARNING
+        logging.log(level, f"Could not open cache '{path}' ({e}); continuing without a cache")
+        return None
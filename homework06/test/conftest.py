@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# make the homework06 library modules (e.g. compressed_io) importable from the tests
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,122 @@
+import json
+import subprocess
+import sys
+import warnings
+from pathlib import Path
+import numpy as np
+import pytest
+from Bio.PDB.MMCIFParser import MMCIFParser
+from atom_table import load_atom_table
+from test_mmcif_summary import write_two_model_variant
+
+HOMEWORK_DIR = Path(__file__).resolve().parent.parent
+
+ALTLOC_CIF = """data_ALT
+loop_
+_atom_site.group_PDB
+_atom_site.id
+_atom_site.type_symbol
+_atom_site.label_atom_id
+_atom_site.label_alt_id
+_atom_site.label_comp_id
+_atom_site.label_asym_id
+_atom_site.label_seq_id
+_atom_site.pdbx_PDB_ins_code
+_atom_site.Cartn_x
+_atom_site.Cartn_y
+_atom_site.Cartn_z
+_atom_site.occupancy
+_atom_site.B_iso_or_equiv
+_atom_site.auth_seq_id
+_atom_site.auth_asym_id
+_atom_site.pdbx_PDB_model_num
+ATOM   1 N N  . SER A 1 ? 0.0 0.0 0.0 1.00 10.0 1 A 1
+ATOM   2 C CA A SER A 1 ? 1.0 0.0 0.0 0.40 20.0 1 A 1
+ATOM   3 C CA B SER A 1 ? 9.0 0.0 0.0 0.60 30.0 1 A 1
+ATOM   4 O OG A SER A 1 ? 2.0 2.0 0.0 0.50 40.0 1 A 1
+ATOM   5 O OG B SER A 1 ? 7.0 7.0 0.0 0.50 50.0 1 A 1
+HETATM 6 O O  . HOH B . ? 5.0 5.0 5.0 1.00 60.0 101 A 1
+#
+"""
+
+def biopython_geometry(mmcif_file):
+    # geometry of every chain from the Bio.PDB hierarchy, for comparison with the atom table
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        structure = MMCIFParser(QUIET=True).get_structure('test', str(mmcif_file))
+
+    chains = []
+    for model in structure:
+        for chain in model:
+            atoms = list(chain.get_atoms())
+            coords = np.array([atom.coord for atom in atoms], dtype=float)
+            centroid = coords.mean(axis=0)
+            chains.append({
+                'chain_id': chain.id,
+                'atom_count': len(atoms),
+                'centroid': centroid,
+                'radius_of_gyration': np.sqrt(((coords - centroid) ** 2).sum(axis=1).mean()),
+                'bounding_box_min': coords.min(axis=0),
+                'bounding_box_max': coords.max(axis=0),
+                'mean_b_factor': np.mean([atom.bfactor for atom in atoms])
+            })
+    return chains
+
+def test_geometry_matches_biopython(tmp_path):
+    write_two_model_variant(tmp_path / 'two_models.cif')
+    (tmp_path / 'altloc.cif').write_text(ALTLOC_CIF)
+
+    for mmcif_file in [tmp_path / 'two_models.cif', tmp_path / 'altloc.cif']:
+        with open(mmcif_file) as f:
+            chains = load_atom_table(f).summarize_chains()
+        expected = biopython_geometry(mmcif_file)
+
+        assert [c['chain_id'] for c in chains] == [c['chain_id'] for c in expected]
+        for chain, reference in zip(chains, expected):
+            assert chain['atom_count'] == reference['atom_count']
+            for field in ['centroid', 'radius_of_gyration', 'bounding_box_min', 'bounding_box_max', 'mean_b_factor']:
+                assert chain[field] == pytest.approx(reference[field], abs=1e-3)
+
+def test_geometry_adds_fields_to_summary(tmp_path):
+    subprocess.run(
+        [sys.executable, str(HOMEWORK_DIR / 'mmcif_summary.py'), '-l', 'ERROR', '-m', str(HOMEWORK_DIR / '4HHB.cif'),
+         '-o', str(tmp_path / 'geometry.json'), '-g', '--noCache'],
+        check=True
+    )
+    summary = json.loads((tmp_path / 'geometry.json').read_text())
+    reference = json.loads((HOMEWORK_DIR / 'output_files' / '4HHB_summary.json').read_text())
+
+    # the residue counts are unchanged, and the geometry fields are added to each chain
+    assert [{k: c[k] for k in r} for c, r in zip(summary['chains'], reference['chains'])] == reference['chains']
+    assert [c['atom_count'] for c in summary['chains']] == [1168, 1224, 1171, 1216]
+
+def test_contacts_match_all_pairs(tmp_path):
+    with open(HOMEWORK_DIR / '4HHB.cif') as f:
+        table = load_atom_table(f)
+    a, b = table.residue_contacts(4.0)
+
+    # residue pairs from every atom pair, without waters
+    residue = table.build_hierarchy()['atom_residue']
+    atoms = np.flatnonzero(~table.water)
+    coords = table.coords[atoms].astype(float)
+    expected = set()
+    for start in range(0, len(atoms), 500):
+        close = ((coords[start:start + 500, None] - coords[None]) ** 2).sum(axis=-1) <= 16.0
+        for i, j in zip(*np.nonzero(close)):
+            r, s = residue[atoms[start + i]], residue[atoms[j]]
+            if r != s:
+                expected.add((min(r, s), max(r, s)))
+    assert set(zip(a, b)) == expected
+
+    subprocess.run(
+        [sys.executable, str(HOMEWORK_DIR / 'mmcif_summary.py'), '-l', 'ERROR', '-m', str(HOMEWORK_DIR / '4HHB.cif'),
+         '-o', str(tmp_path / 'contacts.json'), '-t', '--noCache'],
+        check=True
+    )
+    chains = {c['chain_id']: c for c in json.loads((tmp_path / 'contacts.json').read_text())['chains']}
+
+    # every chain binds a HEM, and contacts are counted the same from both sides
+    assert all(c['ligand_contact_residues'] > 0 for c in chains.values())
+    for chain_id, chain in chains.items():
+        for partner, count in chain['partner_contacts'].items():
+            assert chains[partner]['partner_contacts'][chain_id] == count
@@ -0,0 +1,48 @@
+import gzip
+import threading
+import pytest
+from Bio import bgzf
+from compressed_io import ThreadedGzipReader, is_gzipped, open_input, open_output
+
+def test_threaded_reader_reads_gzip_and_bgzf(tmp_path):
+    text = ''.join(f'line {i}\n' for i in range(200000))
+    with gzip.open(tmp_path / 'plain.gz', 'wt') as f:
+        f.write(text)
+    with bgzf.BgzfWriter(str(tmp_path / 'blocked.gz')) as f:
+        f.write(text)
+    (tmp_path / 'plain.txt').write_text(text)
+
+    for name in ['plain.gz', 'blocked.gz', 'plain.txt']:
+        with open_input(str(tmp_path / name)) as f:
+            assert f.read() == text
+    assert is_gzipped(str(tmp_path / 'blocked.gz'))
+    assert not is_gzipped(str(tmp_path / 'plain.txt'))
+
+def test_threaded_reader_keeps_raising_after_an_error(tmp_path):
+    (tmp_path / 'truncated.gz').write_bytes(gzip.compress(b'x' * 100000)[:-100])
+    reader = ThreadedGzipReader(str(tmp_path / 'truncated.gz'))
+    with pytest.raises(EOFError):
+        reader.read()
+
+    # the decompressing thread has exited, so a later read must not wait on it
+    errors = []
+    def read_again():
+        try:
+            reader.read()
+        except EOFError as e:
+            errors.append(e)
+    thread = threading.Thread(target=read_again, daemon=True)
+    thread.start()
+    thread.join(timeout=5)
+    assert not thread.is_alive() and len(errors) == 1
+    reader.close()
+
+def test_bgzf_writer_output_is_valid_bgzf(tmp_path):
+    text = ''.join(f'record {i}\n' for i in range(100000))
+    for threads in [1, 4]:
+        path = tmp_path / f'out{threads}.gz'
+        with open_output(str(path), 'w', bgzf=True, level=1, threads=threads) as f:
+            f.write(text)
+        assert gzip.decompress(path.read_bytes()).decode() == text
+        with bgzf.BgzfReader(str(path), 'rt') as f:
+            assert ''.join(iter(lambda: f.read(65536), '')) == text
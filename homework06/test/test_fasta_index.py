@@ -0,0 +1,78 @@
+import filecmp
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+import pytest
+from Bio.SeqIO.FastaIO import SimpleFastaParser
+from fasta_index import build_fai, load_index
+
+HOMEWORK_DIR = Path(__file__).resolve().parent.parent
+
+def test_fetch_matches_parser(tmp_path):
+    fasta_file = str(shutil.copy(HOMEWORK_DIR / 'immune_proteins.fasta', tmp_path))
+    with open(fasta_file) as f:
+        expected = list(SimpleFastaParser(f))
+
+    with load_index(fasta_file) as index:
+        assert len(index.records) == len(expected)
+        for header, sequence in expected:
+            accession = header.split('|')[1]
+            assert index.header(accession) == header
+            assert index.fetch(accession) == sequence
+            assert index.fetch(header.split()[0], 59, 122) == sequence[58:122]
+    assert (tmp_path / 'immune_proteins.fasta.fai').exists()
+
+def test_crlf_and_irregular_lines(tmp_path):
+    (tmp_path / 'crlf.fasta').write_bytes(b'>a desc\r\nACGT\r\nAC\r\n>b\r\nTTT\r\n')
+    with load_index(str(tmp_path / 'crlf.fasta')) as index:
+        assert [(r.name, r.length, r.line_bases, r.line_width) for r in index.records] == [('a', 6, 4, 6), ('b', 3, 3, 5)]
+        assert index.fetch('a', 3, 5) == 'GTA'
+        assert index.header('b') == 'b'
+
+    (tmp_path / 'bad.fasta').write_text('>a\nAC\nACGT\n')
+    with pytest.raises(ValueError):
+        build_fai(str(tmp_path / 'bad.fasta'))
+
+def test_fasta_filter_from_index_matches_reference(tmp_path):
+    fasta_file = str(shutil.copy(HOMEWORK_DIR / 'immune_proteins.fasta', tmp_path))
+    subprocess.run(
+        [sys.executable, str(HOMEWORK_DIR / 'fasta_filter.py'), '-f', fasta_file, '-o', str(tmp_path / 'long.fasta'), '-i'],
+        check=True
+    )
+    assert filecmp.cmp(tmp_path / 'long.fasta', HOMEWORK_DIR / 'output_files' / 'long_only.fasta', shallow=False)
+
+def test_fasta_filter_from_index_keeps_duplicate_names(tmp_path):
+    # every sequence is written once, in file order, even when names are repeated
+    (tmp_path / 'duplicates.fasta').write_text('>a first\nACGTAC\nGT\n>b\nAC\n>a second\nTTTTTT\nTTTT\n>a third\nGGGGGG\nG\n')
+    for name, extra_args in [('parsed.fasta', []), ('indexed.fasta', ['-i'])]:
+        subprocess.run(
+            [sys.executable, str(HOMEWORK_DIR / 'fasta_filter.py'), '-f', str(tmp_path / 'duplicates.fasta'),
+             '-o', str(tmp_path / name), '-m', '5', *extra_args],
+            check=True
+        )
+    assert (tmp_path / 'indexed.fasta').read_text() == '>a first\nACGTACGT\n>a second\nTTTTTTTTTT\n>a third\nGGGGGGG\n'
+    assert filecmp.cmp(tmp_path / 'indexed.fasta', tmp_path / 'parsed.fasta', shallow=False)
+
+def test_missing_final_newline(tmp_path):
+    (tmp_path / 'nonl.fasta').write_bytes(b'>a x\nACGT\nAC\n>b\nTTTTTT\nTTTT')
+    with load_index(str(tmp_path / 'nonl.fasta')) as index:
+        assert [(r.name, r.length) for r in index.records] == [('a', 6), ('b', 10)]
+        assert index.fetch('a') == 'ACGTAC'
+        assert index.fetch('b', 3, 4) == 'TT'
+
+    # the last line of the file may be short as well as unterminated
+    (tmp_path / 'short.fasta').write_bytes(b'>a x\nACGT\nAC')
+    assert [r.length for r in build_fai(str(tmp_path / 'short.fasta'))] == [6]
+
+def test_fasta_filter_from_index_falls_back_to_parsing(tmp_path):
+    # the index can not be built for uneven lines, so -i parses the file like the default filter
+    (tmp_path / 'uneven.fasta').write_text('>a\nAC\nACGTACGT\n>b\nACGTAC\n')
+    for name, extra_args in [('parsed.fasta', []), ('indexed.fasta', ['-i'])]:
+        subprocess.run(
+            [sys.executable, str(HOMEWORK_DIR / 'fasta_filter.py'), '-f', str(tmp_path / 'uneven.fasta'),
+             '-o', str(tmp_path / name), '-m', '7', *extra_args],
+            check=True
+        )
+    assert (tmp_path / 'indexed.fasta').read_text() == '>a\nACACGTACGT\n'
+    assert filecmp.cmp(tmp_path / 'indexed.fasta', tmp_path / 'parsed.fasta', shallow=False)
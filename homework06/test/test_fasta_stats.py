@@ -0,0 +1,64 @@
+import filecmp
+import json
+import subprocess
+import sys
+from collections import Counter
+from pathlib import Path
+from Bio.SeqIO.FastaIO import SimpleFastaParser
+
+HOMEWORK_DIR = Path(__file__).resolve().parent.parent
+
+def run_fasta_stats(*script_args):
+    subprocess.run([sys.executable, str(HOMEWORK_DIR / 'fasta_stats.py'), *script_args], check=True)
+
+def test_report_matches_reference(tmp_path):
+    run_fasta_stats('-f', str(HOMEWORK_DIR / 'immune_proteins.fasta'), '-o', str(tmp_path / 'stats.txt'))
+    assert filecmp.cmp(tmp_path / 'stats.txt', HOMEWORK_DIR / 'output_files' / 'immune_proteins_stats.txt', shallow=False)
+
+def test_detailed_stats(tmp_path):
+    run_fasta_stats(
+        '-f', str(HOMEWORK_DIR / 'immune_proteins.fasta'), '-o', str(tmp_path / 'stats.txt'),
+        '-j', str(tmp_path / 'stats.json'), '-b', '7'
+    )
+    detailed = json.loads((tmp_path / 'stats.json').read_text())
+
+    with open(HOMEWORK_DIR / 'immune_proteins.fasta') as f:
+        sequences = [sequence for _, sequence in SimpleFastaParser(f)]
+    lengths = sorted((len(s) for s in sequences), reverse=True)
+
+    # walk down from the longest sequence until half of all residues are covered
+    covered = 0
+    for l50, length in enumerate(lengths, start=1):
+        covered += length
+        if covered >= sum(lengths) / 2:
+            break
+
+    assert (detailed['n50'], detailed['l50']) == (length, l50)
+    assert sum(detailed['length_histogram']['counts']) == len(sequences)
+    assert len(detailed['length_histogram']['counts']) == 7
+    assert sum(detailed['residue_composition'].values()) == detailed['total_residues'] == sum(lengths)
+    assert detailed['residue_composition'] == dict(sorted(Counter(''.join(sequences)).items()))
+    assert detailed['length_quantiles']['0.5'] == sorted(lengths)[len(lengths) // 2]
+
+def test_batch_merges_to_single_file_report(tmp_path):
+    with open(HOMEWORK_DIR / 'immune_proteins.fasta') as f:
+        records = list(SimpleFastaParser(f))
+
+    # split the proteome across several files, plus one file fasta_stats can not read
+    batch_dir = tmp_path / 'batch'
+    batch_dir.mkdir()
+    for i in range(0, len(records), 50):
+        (batch_dir / f'part{i:04d}.fasta').write_text(''.join(f'>{h}\n{s}\n' for h, s in records[i:i + 50]))
+    (batch_dir / 'zbad.fasta').write_text('>no_accession\nACGT\n')
+
+    run_fasta_stats(
+        '-d', str(batch_dir), '-w', '2', '-o', str(tmp_path / 'stats.txt'),
+        '-t', str(tmp_path / 'table.jsonl'), '--tableFormat', 'jsonl', '-j', str(tmp_path / 'stats.json')
+    )
+
+    assert filecmp.cmp(tmp_path / 'stats.txt', HOMEWORK_DIR / 'output_files' / 'immune_proteins_stats.txt', shallow=False)
+    rows = [json.loads(line) for line in (tmp_path / 'table.jsonl').read_text().splitlines()]
+    assert [row['error'] is None for row in rows] == [True] * 7 + [False]
+    assert sum(row['num_sequences'] for row in rows[:-1]) == len(records)
+    composition = json.loads((tmp_path / 'stats.json').read_text())['residue_composition']
+    assert composition == dict(sorted(Counter(''.join(s for _, s in records)).items()))
@@ -0,0 +1,93 @@
+import filecmp
+import gzip
+import random
+import subprocess
+import sys
+from pathlib import Path
+from Bio import SeqIO
+
+HOMEWORK_DIR = Path(__file__).resolve().parent.parent
+
+def run_fastq_filter(output_file, *script_args):
+    subprocess.run(
+        [sys.executable, str(HOMEWORK_DIR / 'fastq_filter.py'),
+         '-f', str(HOMEWORK_DIR / 'sample1_rawReads.fastq'), '-o', str(output_file), *script_args],
+        check=True
+    )
+
+def test_stream_engine_matches_reference(tmp_path):
+    run_fastq_filter(tmp_path / 'clean.fastq', '-g', 'stream')
+    assert filecmp.cmp(tmp_path / 'clean.fastq', HOMEWORK_DIR / 'output_files' / 'sample1_cleanReads.fastq', shallow=False)
+
+def test_seqio_engine_matches_reference(tmp_path):
+    run_fastq_filter(tmp_path / 'clean.fastq', '-g', 'seqio')
+    assert filecmp.cmp(tmp_path / 'clean.fastq', HOMEWORK_DIR / 'output_files' / 'sample1_cleanReads.fastq', shallow=False)
+
+def test_parallel_workers_match_reference(tmp_path):
+    run_fastq_filter(tmp_path / 'clean.fastq', '-w', '3')
+    assert filecmp.cmp(tmp_path / 'clean.fastq', HOMEWORK_DIR / 'output_files' / 'sample1_cleanReads.fastq', shallow=False)
+
+def test_solexa_encoding_needs_seqio_engine(tmp_path):
+    # the reads are written back as Phred+33, so the Solexa copy filters to the reference output
+    SeqIO.convert(HOMEWORK_DIR / 'sample1_rawReads.fastq', 'fastq', tmp_path / 'solexa.fastq', 'fastq-solexa')
+    command = [sys.executable, str(HOMEWORK_DIR / 'fastq_filter.py'), '-f', str(tmp_path / 'solexa.fastq'), '-e', 'fastq-solexa']
+
+    subprocess.run([*command, '-o', str(tmp_path / 'clean.fastq'), '-g', 'seqio'], check=True)
+    assert filecmp.cmp(tmp_path / 'clean.fastq', HOMEWORK_DIR / 'output_files' / 'sample1_cleanReads.fastq', shallow=False)
+
+    # the stream engine has no Phred offset for Solexa scores, so it refuses them
+    stream = subprocess.run([*command, '-o', str(tmp_path / 'stream.fastq')], capture_output=True, text=True)
+    assert stream.returncode != 0 and 'use --engine seqio for fastq-solexa' in stream.stderr
+
+def test_gzip_input_and_bgzf_output(tmp_path):
+    raw = (HOMEWORK_DIR / 'sample1_rawReads.fastq').read_bytes()
+    (tmp_path / 'raw.fastq.gz').write_bytes(gzip.compress(raw))
+    subprocess.run(
+        [sys.executable, str(HOMEWORK_DIR / 'fastq_filter.py'), '-f', str(tmp_path / 'raw.fastq.gz'),
+         '-o', str(tmp_path / 'clean.fastq.gz'), '--bgzf', '--compressThreads', '2'],
+        check=True
+    )
+    expected = (HOMEWORK_DIR / 'output_files' / 'sample1_cleanReads.fastq').read_bytes()
+    assert gzip.decompress((tmp_path / 'clean.fastq.gz').read_bytes()) == expected
+
+def reference_filter(title, sequence, quality, min_phred, min_base, max_low, low_phred, window, trim_quality, max_n):
+    scores = [ord(c) - 33 for c in quality]
+
+    # trim back to the end of the last window with average at least trim_quality
+    keep = 0
+    if len(scores) < window:
+        keep = len(scores) if sum(scores) >= trim_quality * len(scores) else 0
+    for i in range(len(scores) - window + 1):
+        if sum(scores[i:i + window]) >= trim_quality * window:
+            keep = i + window
+    scores, sequence, quality = scores[:keep], sequence[:keep], quality[:keep]
+
+    if not scores or sum(scores) / len(scores) < min_phred or min(scores) < min_base:
+        return None
+    if sum(s < low_phred for s in scores) / len(scores) > max_low:
+        return None
+    if sequence.upper().count('N') / len(sequence) > max_n:
+        return None
+    return f"@{title}\n{sequence}\n+\n{quality}\n"
+
+def test_stream_engine_quality_filters(tmp_path):
+    rng = random.Random(337)
+    reads = []
+    for i in range(2000):
+        length = rng.randint(0, 60)
+        sequence = ''.join(rng.choice('ACGTNn') for _ in range(length))
+        quality = ''.join(chr(33 + rng.randint(2, 40)) for _ in range(length))
+        reads.append((f'read{i}', sequence, quality))
+    with open(tmp_path / 'raw.fastq', 'w') as f:
+        f.writelines(f"@{t}\n{s}\n+\n{q}\n" for t, s, q in reads)
+
+    subprocess.run(
+        [sys.executable, str(HOMEWORK_DIR / 'fastq_filter.py'), '-f', str(tmp_path / 'raw.fastq'),
+         '-o', str(tmp_path / 'clean.fastq'), '-m', '22', '--minimumBaseQuality', '4',
+         '--maxLowQualityFraction', '0.4', '--lowQualityPhred', '15', '--trimWindow', '5',
+         '--trimQuality', '25', '--maxNFraction', '0.2', '--batchSize', '300'],
+        check=True
+    )
+
+    expected = [reference_filter(t, s, q, 22, 4, 0.4, 15, 5, 25, 0.2) for t, s, q in reads]
+    assert (tmp_path / 'clean.fastq').read_text() == ''.join(r for r in expected if r)
@@ -0,0 +1,150 @@
+import filecmp
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+HOMEWORK_DIR = Path(__file__).resolve().parent.parent
+
+def run_mmcif_summary(mmcif_file, output_file, *script_args):
+    subprocess.run(
+        [sys.executable, str(HOMEWORK_DIR / 'mmcif_summary.py'), '-l', 'ERROR',
+         '-m', str(mmcif_file), '-o', str(output_file), '--noCache', *script_args],
+        check=True
+    )
+
+def write_two_model_variant(output_file):
+    # copy every 4HHB atom into a second model, and give residue 5 of chain A insertion code A
+    lines = (HOMEWORK_DIR / '4HHB.cif').read_text().splitlines(keepends=True)
+    header = [line.split()[0].split('.')[1] for line in lines if line.startswith('_atom_site.')]
+    rows = [i for i, line in enumerate(lines) if line.startswith(('ATOM ', 'HETATM '))]
+    chain, seq, icode, model = (header.index(c) for c in ['auth_asym_id', 'auth_seq_id', 'pdbx_PDB_ins_code', 'pdbx_PDB_model_num'])
+
+    second_model = []
+    for i in rows:
+        values = lines[i].split()
+        if values[chain] == 'A' and values[seq] == '5':
+            values[icode] = 'A'
+        lines[i] = ' '.join(values) + '\n'
+        values[model] = '2'
+        second_model.append(' '.join(values) + '\n')
+    lines[rows[-1] + 1:rows[-1] + 1] = second_model
+    Path(output_file).write_text(''.join(lines))
+
+def write_modelless_variant(output_file):
+    # drop the pdbx_PDB_model_num column from every 4HHB atom
+    lines = (HOMEWORK_DIR / '4HHB.cif').read_text().splitlines(keepends=True)
+    header = [line.split()[0].split('.')[1] for line in lines if line.startswith('_atom_site.')]
+    model = header.index('pdbx_PDB_model_num')
+    kept = []
+    for line in lines:
+        if line.startswith('_atom_site.pdbx_PDB_model_num'):
+            continue
+        if line.startswith(('ATOM ', 'HETATM ')):
+            values = line.split()
+            line = ' '.join(values[:model] + values[model + 1:]) + '\n'
+        kept.append(line)
+    Path(output_file).write_text(''.join(kept))
+
+def test_fast_summary_matches_reference(tmp_path):
+    run_mmcif_summary(HOMEWORK_DIR / '4HHB.cif', tmp_path / 'fast.json', '-f')
+    assert filecmp.cmp(tmp_path / 'fast.json', HOMEWORK_DIR / 'output_files' / '4HHB_summary.json', shallow=False)
+
+def test_fast_summary_matches_biopython_on_two_models(tmp_path):
+    write_two_model_variant(tmp_path / 'two_models.cif')
+    run_mmcif_summary(tmp_path / 'two_models.cif', tmp_path / 'biopython.json')
+    run_mmcif_summary(tmp_path / 'two_models.cif', tmp_path / 'fast.json', '-f')
+
+    biopython = json.loads((tmp_path / 'biopython.json').read_text())
+    assert len(biopython['chains']) == 8
+    assert json.loads((tmp_path / 'fast.json').read_text()) == biopython
+
+def test_batch_isolates_failures_and_resumes(tmp_path):
+    batch_dir = tmp_path / 'batch'
+    batch_dir.mkdir()
+    (batch_dir / '4HHB.cif').write_bytes((HOMEWORK_DIR / '4HHB.cif').read_bytes())
+    (batch_dir / 'copy.cif').write_bytes((HOMEWORK_DIR / '4HHB.cif').read_bytes())
+    (batch_dir / 'bad.cif').write_text('not an mmCIF file\n')
+    output_file = tmp_path / 'summaries.jsonl'
+
+    # pretend an earlier run finished 4HHB and crashed half way through writing the next record
+    reference = json.loads((HOMEWORK_DIR / 'output_files' / '4HHB_summary.json').read_text())
+    output_file.write_text(json.dumps({'entry_id': '4HHB', 'summary': reference}) + '\n{"entry_id": "co')
+
+    subprocess.run(
+        [sys.executable, str(HOMEWORK_DIR / 'mmcif_summary.py'), '-l', 'CRITICAL', '-d', str(batch_dir),
+         '-o', str(output_file), '-w', '2', '-f', '--noCache'],
+        check=True
+    )
+
+    records = {r['entry_id']: r for r in map(json.loads, output_file.read_text().splitlines())}
+    assert len(output_file.read_text().splitlines()) == 3
+    assert records['copy']['summary'] == reference
+    assert 'error' in records['bad']
+
+def test_cache_reuses_summaries_of_unchanged_files(tmp_path):
+    cache_file = tmp_path / 'cache.sqlite'
+    batch_dir = tmp_path / 'batch'
+    batch_dir.mkdir()
+    (batch_dir / '4HHB.cif').write_bytes((HOMEWORK_DIR / '4HHB.cif').read_bytes())
+    write_two_model_variant(batch_dir / 'two_models.cif')
+
+    def run_batch(output_file):
+        subprocess.run(
+            [sys.executable, str(HOMEWORK_DIR / 'mmcif_summary.py'), '-l', 'ERROR', '-d', str(batch_dir),
+             '-o', str(output_file), '-w', '2', '-f', '-c', str(cache_file)],
+            check=True
+        )
+        return {r['entry_id']: r for r in map(json.loads, Path(output_file).read_text().splitlines())}
+
+    cold = run_batch(tmp_path / 'cold.jsonl')
+    assert not any(r['cached'] for r in cold.values())
+
+    # an unchanged file is served from the cache, a changed one is summarized again
+    (batch_dir / 'two_models.cif').write_text((batch_dir / 'two_models.cif').read_text().replace(' 2 \n', ' 3 \n'))
+    warm = run_batch(tmp_path / 'warm.jsonl')
+    assert warm['4HHB']['cached'] and not warm['two_models']['cached']
+    assert warm['4HHB']['summary'] == cold['4HHB']['summary']
+
+    # a cached summary is written exactly like a fresh one
+    subprocess.run(
+        [sys.executable, str(HOMEWORK_DIR / 'mmcif_summary.py'), '-l', 'ERROR', '-m', str(batch_dir / '4HHB.cif'),
+         '-o', str(tmp_path / 'single.json'), '-c', str(cache_file)],
+        check=True
+    )
+    assert filecmp.cmp(tmp_path / 'single.json', HOMEWORK_DIR / 'output_files' / '4HHB_summary.json', shallow=False)
+
+def test_model_selection_and_collapse(tmp_path):
+    write_two_model_variant(tmp_path / 'two_models.cif')
+    subprocess.run([sys.executable, str(HOMEWORK_DIR / 'mmcif_compile.py'), '-l', 'ERROR', '-m', str(tmp_path / 'two_models.cif')], check=True)
+    run_mmcif_summary(tmp_path / 'two_models.cif', tmp_path / 'all.json', '-g')
+    chains = json.loads((tmp_path / 'all.json').read_text())['chains']
+    counts = [{key: chain[key] for key in ['chain_id', 'total_residues', 'standard_residues', 'hetero_residue_count']} for chain in chains]
+
+    # every reader keeps the same chains of the selected models
+    readers = [('two_models.cif', [], counts), ('two_models.cif', ['-f'], counts),
+               ('two_models.cif', ['-g'], chains), ('two_models.cifarc', ['-g'], chains)]
+    for models, selected in [('first', slice(0, 4)), ('2', slice(4, 8)), ('1,2', slice(0, 8))]:
+        for mmcif_file, mode, expected in readers:
+            run_mmcif_summary(tmp_path / mmcif_file, tmp_path / 'selected.json', '--models', models, *mode)
+            assert json.loads((tmp_path / 'selected.json').read_text())['chains'] == expected[selected]
+
+    # the two models are identical, so each chain collapses into one entry of two models
+    run_mmcif_summary(tmp_path / 'two_models.cif', tmp_path / 'collapsed.json', '-g', '--collapseModels')
+    collapsed = json.loads((tmp_path / 'collapsed.json').read_text())['chains']
+    assert collapsed == [dict(chain, model_count=2) for chain in chains[:4]]
+
+def test_model_selection_without_model_column(tmp_path):
+    # a file without a model column holds a single model, model 1; Bio.PDB's MMCIFParser
+    # cannot build such a file, so only the fast and atom table readers are compared
+    write_modelless_variant(tmp_path / 'no_models.cif')
+    subprocess.run([sys.executable, str(HOMEWORK_DIR / 'mmcif_compile.py'), '-l', 'ERROR', '-m', str(tmp_path / 'no_models.cif')], check=True)
+    run_mmcif_summary(tmp_path / 'no_models.cif', tmp_path / 'all.json', '-f')
+    chains = json.loads((tmp_path / 'all.json').read_text())['chains']
+    assert len(chains) == 4
+
+    for mmcif_file, mode in [('no_models.cif', ['-f']), ('no_models.cif', ['-g']), ('no_models.cifarc', ['-g'])]:
+        for models in ['all', 'first', '1']:
+            run_mmcif_summary(tmp_path / mmcif_file, tmp_path / 'selected.json', '--models', models, *mode)
+            selected = json.loads((tmp_path / 'selected.json').read_text())['chains']
+            assert [{key: chain[key] for key in chains[0]} for chain in selected] == chains
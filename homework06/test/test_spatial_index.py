@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+from spatial_index import CellList
+
+def all_pairs(coords, cutoff):
+    distances = np.sqrt(((coords[:, None] - coords[None]) ** 2).sum(axis=-1))
+    return set(zip(*np.nonzero(np.triu(distances <= cutoff, 1))))
+
+def test_pairs_and_query_match_all_pairs():
+    rng = np.random.default_rng(337)
+    coords = rng.uniform(0, 30, (2000, 3))
+    index = CellList(coords, 4.0)
+
+    i, j = index.pairs(3.5)
+    assert (i < j).all()
+    assert set(zip(i, j)) == all_pairs(coords, 3.5)
+
+    # query points may lie outside the indexed points' bounding box
+    points = rng.uniform(-3, 33, (100, 3))
+    query, point = index.query(points)
+    distances = np.sqrt(((points[:, None] - coords[None]) ** 2).sum(axis=-1))
+    assert set(zip(query, point)) == set(zip(*np.nonzero(distances <= 4.0)))
+
+    with pytest.raises(ValueError):
+        index.pairs(5.0)
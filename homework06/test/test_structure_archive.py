@@ -0,0 +1,41 @@
+import filecmp
+import json
+import subprocess
+import sys
+from pathlib import Path
+import numpy as np
+from structure_archive import is_archive, load_archive, open_atom_table
+from test_mmcif_summary import write_two_model_variant
+
+HOMEWORK_DIR = Path(__file__).resolve().parent.parent
+
+def compile_mmcif(mmcif_file, output_dir):
+    subprocess.run(
+        [sys.executable, str(HOMEWORK_DIR / 'mmcif_compile.py'), '-l', 'ERROR', '-m', str(mmcif_file), '-o', str(output_dir)],
+        check=True
+    )
+    return Path(output_dir) / (Path(mmcif_file).stem + '.cifarc')
+
+def test_archive_round_trips_atom_table(tmp_path):
+    write_two_model_variant(tmp_path / 'two_models.cif')
+    archive_file = compile_mmcif(tmp_path / 'two_models.cif', tmp_path / 'archives')
+    assert is_archive(archive_file) and not is_archive(tmp_path / 'two_models.cif')
+
+    parsed = open_atom_table(str(tmp_path / 'two_models.cif'))
+    archived = load_archive(str(archive_file))
+
+    # every array is a read-only view of the mapped file, equal to the parsed one
+    assert archived.labels == parsed.labels
+    for name, values in parsed.arrays.items():
+        assert not archived.arrays[name].flags.owndata and not archived.arrays[name].flags.writeable
+        np.testing.assert_array_equal(archived.arrays[name], values)
+    assert archived.summarize_chains() == parsed.summarize_chains()
+
+def test_summary_of_archive_matches_reference(tmp_path):
+    archive_file = compile_mmcif(HOMEWORK_DIR / '4HHB.cif', tmp_path)
+    subprocess.run(
+        [sys.executable, str(HOMEWORK_DIR / 'mmcif_summary.py'), '-l', 'ERROR', '-m', str(archive_file),
+         '-o', str(tmp_path / 'archive.json'), '--noCache'],
+        check=True
+    )
+    assert filecmp.cmp(tmp_path / 'archive.json', HOMEWORK_DIR / 'output_files' / '4HHB_summary.json', shallow=False)
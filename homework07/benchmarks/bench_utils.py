@@ -0,0 +1,196 @@
+"""
+Helpers shared by the homework07 benchmark scripts and tests: a throwaway local
+redis-server, a local stand-in for the NCBI E-utilities, and synthetic GenBank records.
+"""
+import contextlib
+import http.server
+import io
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from typing import Iterator
+from Bio import SeqIO
+from Bio.Seq import Seq
+from Bio.SeqRecord import SeqRecord
+
+ORGANISMS = ['Arabidopsis thaliana', 'Oryza sativa', 'Zea mays']
+
+# directory holding the scripts being benchmarked, made importable for the benchmarks
+SCRIPT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SCRIPT_DIR)
+
+def free_port() -> int:
+    """
+    Returns a TCP port on localhost that nothing is listening on.
+    """
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+@contextlib.contextmanager
+def local_redis_server(port: int | None = None, timeout: float = 10.0) -> Iterator[int]:
+    """
+    Starts a redis-server on localhost with persistence turned off, in a temporary
+    directory, and stops it on exit.
+
+    Args:
+        port: port to listen on (default: a free port)
+        timeout: seconds to wait for the server to accept connections
+
+    Returns:
+        Iterator[int]: the port the server listens on
+    """
+    executable = shutil.which('redis-server')
+    if executable is None:
+        raise FileNotFoundError("redis-server was not found on the PATH")
+    port = port or free_port()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        process = subprocess.Popen(
+            [executable, '--port', str(port), '--bind', '127.0.0.1', '--save', '', '--appendonly', 'no', '--dir', tmp],
+            stdout=subprocess.DEVNULL
+        )
+        try:
+            deadline = time.monotonic() + timeout
+            while True:
+                try:
+                    socket.create_connection(('127.0.0.1', port), timeout=0.1).close()
+                    break
+                except OSError:
+                    if time.monotonic() > deadline or process.poll() is not None:
+                        raise RuntimeError(f"redis-server did not start on port {port}")
+                    time.sleep(0.05)
+            yield port
+        finally:
+            process.terminate()
+            process.wait()
+
+def make_synthetic_summaries(num_records: int, length: int = 400, seed: int = 337) -> list[dict]:
+    """
+    Given a number of records and a mean sequence length, returns GenBank record summaries
+    shaped like the ones get_ncbi_genbank_records.py stores, with random protein sequences
+    of 0.5 to 1.5 times the mean length and organisms taken in turn from ORGANISMS.
+
+    Args:
+        num_records: number of summaries
+        length: mean number of residues in each sequence
+        seed: seed for the random number generator so runs are repeatable
+
+    Returns:
+        list[dict]: the record summaries
+    """
+    rng = random.Random(seed)
+
+    # a pool of sequences is reused so generating many records stays fast
+    sequences = [''.join(rng.choices('ACDEFGHIKLMNPQRSTVWY', k=rng.randint(length // 2, length * 3 // 2))) for _ in range(100)]
+    summaries = []
+    for i in range(num_records):
+        organism = ORGANISMS[i % len(ORGANISMS)]
+        summaries.append({'ID': f'SYN{i:08d}.1', 'Name': f'SYN{i:08d}', 'Description': f'synthetic protein {i} [{organism}]',
+                          'Organism': organism, 'Sequence': sequences[i % len(sequences)]})
+    return summaries
+
+def make_synthetic_genbank(num_records: int, length: int = 400, seed: int = 337) -> dict[str, str]:
+    """
+    Given a number of records and a sequence length, returns synthetic GenBank protein
+    records in flat file format, keyed by accession.version.
+
+    Args:
+        num_records: number of records
+        length: mean number of residues in each sequence
+        seed: seed for the random number generator so runs are repeatable
+
+    Returns:
+        dict[str, str]: GenBank text of each record
+    """
+    summaries = make_synthetic_summaries(num_records, length, seed)
+    records = {}
+    for summary in summaries:
+        record = SeqRecord(Seq(summary['Sequence']), id=summary['ID'], name=summary['Name'], description=summary['Description'],
+                           annotations={'molecule_type': 'protein', 'organism': summary['Organism']})
+        handle = io.StringIO()
+        SeqIO.write(record, handle, 'gb')
+        records[summary['ID']] = handle.getvalue()
+    return records
+
+class StandInEutils:
+    """
+    Local HTTP server that answers esearch, epost and efetch like NCBI E-utilities, from
+    canned GenBank records, keeping result sets on a history server of its own. Every search
+    term matches all records unless it is listed in searches. The first `failures` efetch
+    requests are answered with 503, and every request is recorded with its time.
+    """
+    def __init__(self, records: dict[str, str], searches: dict[str, list[str]] | None = None, failures: int = 0):
+        self.records = records
+        self.searches = searches or {}
+        self.failures = failures
+        self.history = {}
+        self.requests = []
+        self.lock = threading.Lock()
+
+        stand_in = self
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                params = dict(urllib.parse.parse_qsl(self.rfile.read(length).decode()))
+                status, body = stand_in.respond(self.path.rsplit('/', 1)[-1].removesuffix('.fcgi'), params)
+                self.send_response(status)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *log_args):
+                pass
+
+        self.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.server.server_address[1]}/entrez/eutils/'
+
+    def __enter__(self) -> 'StandInEutils':
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def store(self, ids: list[str]) -> str:
+        with self.lock:
+            query_key = str(len(self.history) + 1)
+            self.history[query_key] = ids
+        return f'<QueryKey>{query_key}</QueryKey><WebEnv>STANDIN</WebEnv>'
+
+    def respond(self, utility: str, params: dict) -> tuple[int, bytes]:
+        with self.lock:
+            self.requests.append((utility, params, time.monotonic()))
+            if utility == 'efetch' and self.failures > 0:
+                self.failures -= 1
+                return 503, b'Service Unavailable'
+
+        if utility == 'esearch':
+            ids = self.searches.get(params['term'], list(self.records))
+            start = int(params.get('retstart', 0))
+            shown = ''.join(f'<Id>{i}</Id>' for i in ids[start:start + int(params.get('retmax', 20))])
+            body = f'<eSearchResult><Count>{len(ids)}</Count>{self.store(ids)}<IdList>{shown}</IdList></eSearchResult>'
+        elif utility == 'epost':
+            body = f'<ePostResult>{self.store(params["id"].split(","))}</ePostResult>'
+        elif utility == 'efetch':
+            if 'id' in params:
+                ids = params['id'].split(',')
+            else:
+                start = int(params.get('retstart', 0))
+                ids = self.history[params['query_key']][start:start + int(params.get('retmax', 20))]
+            body = ''.join(self.records[i] for i in ids if i in self.records)
+        else:
+            return 404, b'Unknown E-utility'
+        return 200, body.encode()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+import argparse
+import logging
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+from bench_utils import SCRIPT_DIR, StandInEutils, local_redis_server, make_synthetic_genbank
+
+# -------------------------
+# Constants (configuration)
+# -------------------------
+RECORD_COUNTS = '2000,8000,32000'
+LENGTH = 1000
+FETCH_BATCH_SIZE = 500
+
+# -------------------------
+# Logging and Command Line Inputs setup
+# -------------------------
+parser = argparse.ArgumentParser()
+parser.add_argument(
+    '-l', '--loglevel',
+    type=str,
+    required=False,
+    choices=['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'],
+    default='WARNING',
+    help='set log level to DEBUG, INFO, WARNING, ERROR, or CRITICAL (default: WARNING)'
+)
+parser.add_argument(
+    '-n', '--recordCounts',
+    type=str,
+    required=False,
+    default=RECORD_COUNTS,
+    help=f'Comma separated numbers of records retrieved by each run (default: {RECORD_COUNTS})'
+)
+parser.add_argument(
+    '--length',
+    type=int,
+    required=False,
+    default=LENGTH,
+    help=f'The mean number of residues in each synthetic record (default: {LENGTH})'
+)
+parser.add_argument(
+    '--pipeline',
+    action='store_true',
+    help='Run the script with -p, the asyncio pipeline, instead of the sequential workflow'
+)
+args = parser.parse_args()
+
+format_str = (
+    f'[%(asctime)s {socket.gethostname()}] '
+    '%(filename)s:%(funcName)s:%(lineno)s - %(levelname)s: %(message)s'
+)
+logging.basicConfig(level=args.loglevel, format=format_str)
+
+# -------------------------
+# Functions
+# -------------------------
+def peak_rss_mb(command: list[str]) -> float:
+    """
+    Given a command, runs it in a child process and returns the child's peak resident set
+    size in MB, read from its own resource usage so nothing else is counted.
+    """
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    if process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, command)
+
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return usage.ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+def main():
+
+    counts = [int(n) for n in args.recordCounts.split(',')]
+    records = make_synthetic_genbank(max(counts), args.length)
+    script = os.path.join(SCRIPT_DIR, 'get_ncbi_genbank_records.py')
+
+    try:
+        with local_redis_server() as port, StandInEutils(records) as server, tempfile.TemporaryDirectory() as tmp:
+            print(f"{'records':>8} {'workflow':<10} {'peak RSS MB':>12}")
+            for n in counts:
+                # the stand-in ignores the API key, which only raises the client's rate limit
+                command = [sys.executable, script, '-l', 'WARNING', '-s', 'benchmark', '-n', str(n), '-o', os.path.join(tmp, 'out.txt'),
+                           '--eutilsUrl', server.url, '--apiKey', 'benchmark', '--noCache', '--fetchBatchSize', str(FETCH_BATCH_SIZE),
+                           '--redisPort', str(port), '--redisPrefix', f'benchmark{n}']
+                if args.pipeline:
+                    command.append('-p')
+                print(f"{n:>8} {'pipeline' if args.pipeline else 'sequential':<10} {peak_rss_mb(command):>12.1f}")
+    except FileNotFoundError as e:
+        logging.error(f"{e}. Install Redis to run this benchmark. Exiting")
+        sys.exit(1)
+    except subprocess.CalledProcessError as e:
+        logging.error(f"The script failed with exit code {e.returncode}. Exiting")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
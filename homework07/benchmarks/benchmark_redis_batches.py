@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import logging
+import socket
+import sys
+import time
+import redis
+from bench_utils import local_redis_server, make_synthetic_summaries
+from redis_store import RecordStore, make_redis_client
+
+# -------------------------
+# Constants (configuration)
+# -------------------------
+NUM_RECORDS = 100000
+BATCH_SIZES = '1,10,100,1000,10000'
+
+# -------------------------
+# Logging and Command Line Inputs setup
+# -------------------------
+parser = argparse.ArgumentParser()
+parser.add_argument(
+    '-l', '--loglevel',
+    type=str,
+    required=False,
+    choices=['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'],
+    default='WARNING',
+    help='set log level to DEBUG, INFO, WARNING, ERROR, or CRITICAL (default: WARNING)'
+)
+parser.add_argument(
+    '-n', '--numRecords',
+    type=int,
+    required=False,
+    default=NUM_RECORDS,
+    help=f'The number of synthetic records written and read back (default: {NUM_RECORDS})'
+)
+parser.add_argument(
+    '-b', '--batchSizes',
+    type=str,
+    required=False,
+    default=BATCH_SIZES,
+    help=f'Comma separated batch sizes to time (default: {BATCH_SIZES})'
+)
+parser.add_argument(
+    '-p', '--port',
+    type=int,
+    required=False,
+    default=None,
+    help='The port of the local redis-server that is started (default: a free port)'
+)
+args = parser.parse_args()
+
+format_str = (
+    f'[%(asctime)s {socket.gethostname()}] '
+    '%(filename)s:%(funcName)s:%(lineno)s - %(levelname)s: %(message)s'
+)
+logging.basicConfig(level=args.loglevel, format=format_str)
+
+# -------------------------
+# Functions
+# -------------------------
+def time_unbatched(rd: redis.Redis, summaries: list[dict]) -> tuple[float, float]:
+    """
+    Given a Redis client and summaries, times the original workflow: one SET per record,
+    then KEYS and one GET per key.
+
+    Returns:
+        tuple[float, float]: seconds spent writing and reading
+    """
+    start = time.perf_counter()
+    for summary in summaries:
+        rd.set(summary['ID'], json.dumps(summary))
+    written = time.perf_counter()
+    read = [json.loads(rd.get(key)) for key in rd.keys()]
+    done = time.perf_counter()
+    check(read, summaries)
+    return written - start, done - written
+
+def time_batched(rd: redis.Redis, summaries: list[dict], batch_size: int) -> tuple[float, float]:
+    """
+    Given a Redis client, summaries and a batch size, times pipelined writes of the indexed
+    hashes and pipelined reads along the length index.
+
+    Returns:
+        tuple[float, float]: seconds spent writing and reading
+    """
+    store = RecordStore(rd)
+    start = time.perf_counter()
+    store.save(summaries, 'benchmark', batch_size)
+    written = time.perf_counter()
+    read = list(store.iter_records(batch_size))
+    done = time.perf_counter()
+    check(read, summaries)
+    return written - start, done - written
+
+def time_query(rd: redis.Redis, summaries: list[dict]) -> tuple[float, float]:
+    """
+    Given a Redis client holding the stored summaries, times finding the records of one
+    organism within a length range from the indexes, and by reading every record and
+    filtering them in Python.
+
+    Returns:
+        tuple[float, float]: seconds spent querying the indexes and scanning the records
+    """
+    store = RecordStore(rd)
+    organism = summaries[0]['Organism']
+    low, high = 300, 500
+    start = time.perf_counter()
+    indexed = store.query(low, high, organism=organism)
+    queried = time.perf_counter()
+    scanned = [s['ID'] for s in store.iter_records() if low <= len(s['Sequence']) <= high and s['Organism'] == organism]
+    done = time.perf_counter()
+    if sorted(indexed) != sorted(scanned):
+        logging.error("The index query and the scan found different records")
+        sys.exit(1)
+    return queried - start, done - queried
+
+def check(read: list[dict], summaries: list[dict]) -> None:
+    if sorted(read, key=lambda s: s['ID']) != summaries:
+        logging.error("The summaries read back differ from the ones written")
+        sys.exit(1)
+
+def main():
+
+    summaries = make_synthetic_summaries(args.numRecords)
+    n = len(summaries)
+
+    try:
+        with local_redis_server(args.port) as port:
+            print(f"{'records':>8} {'method':<14} {'batch':>6} {'write rec/s':>12} {'read rec/s':>12}")
+            rd = make_redis_client(port=port)
+            runs = [('SET + KEYS/GET', None)] + [('indexed hashes', int(b)) for b in args.batchSizes.split(',')]
+            for method, batch_size in runs:
+                rd.flushdb()
+                if batch_size is None:
+                    write_s, read_s = time_unbatched(rd, summaries)
+                else:
+                    write_s, read_s = time_batched(rd, summaries, batch_size)
+                print(f"{n:>8} {method:<14} {batch_size or 1:>6} {n / write_s:>12.0f} {n / read_s:>12.0f}")
+
+            index_s, scan_s = time_query(rd, summaries)
+            print(f"\nlength range + organism query: indexes {index_s * 1000:.1f} ms, full scan {scan_s * 1000:.1f} ms")
+    except FileNotFoundError as e:
+        logging.error(f"{e}. Install Redis to run this benchmark. Exiting")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
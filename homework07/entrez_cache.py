@@ -0,0 +1,142 @@
+"""
+Persistent cache of E-utilities responses in a local SQLite file.
+
+Responses are keyed by the E-utility and its parameters (the database, search term, page and
+format), leaving out who is asking (email, API key). Entries older than the TTL are treated as
+misses, so a search is repeated once its results may have changed. Offline runs read entries
+regardless of their age. One cache is shared by the fetch threads of a run, so access is
+serialized, and the run keeps the cache's size as it writes. Once the cache grows past its
+limit, expired responses are dropped first, then the least recently used ones.
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+# -------------------------
+# Constants (configuration)
+# -------------------------
+CACHE_FILE = os.path.join(os.path.expanduser('~'), '.cache', 'get_ncbi_genbank_records', 'entrez.sqlite')
+MAX_BYTES = 256 * 1024 * 1024
+TTL_SECONDS = 7 * 24 * 3600
+
+# parameters that identify the caller rather than the request
+IGNORED_PARAMS = {'tool', 'email', 'api_key'}
+
+# a full cache is trimmed to this fraction of its limit, so the next few writes do not trim again
+TRIM_TO = 0.9
+
+# -------------------------
+# Classes
+# -------------------------
+class EntrezCache:
+    """
+    SQLite-backed cache of E-utilities response bodies with a TTL. Counts hits and misses;
+    call close() (or use as a context manager) to release the database.
+    """
+    def __init__(self, path: str = CACHE_FILE, ttl: float = TTL_SECONDS, max_bytes: int = MAX_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        self.db = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute(
+            'CREATE TABLE IF NOT EXISTS responses '
+            '(key TEXT PRIMARY KEY, body BLOB NOT NULL, size INTEGER NOT NULL, created REAL NOT NULL, last_access REAL NOT NULL)'
+        )
+        self.db.commit()
+
+        # bytes held by the cache, read once and then kept up to date by put() and trim()
+        self.size = self.db.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    def __enter__(self) -> 'EntrezCache':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def key(self, utility: str, params: dict) -> str:
+        """
+        Given an E-utility and its parameters, returns the cache key: the SHA-256 of the
+        utility and its sorted parameters, without the ones that identify the caller.
+        """
+        request = {k: str(v) for k, v in params.items() if k not in IGNORED_PARAMS and v is not None}
+        return hashlib.sha256(json.dumps([utility, request], sort_keys=True).encode()).hexdigest()
+
+    def get(self, key: str, any_age: bool = False) -> bytes | None:
+        """
+        Given a cache key, returns the stored response (marking it recently used), or None if
+        there is none or it is older than the TTL (unless any_age is set).
+        """
+        with self.lock:
+            row = self.db.execute('SELECT body, created FROM responses WHERE key = ?', (key,)).fetchone()
+            if row is None or (not any_age and time.time() - row[1] > self.ttl):
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            with self.db:
+                self.db.execute('UPDATE responses SET last_access = ? WHERE key = ?', (time.time(), key))
+            return row[0]
+
+    def contains(self, key: str) -> bool:
+        """
+        Given a cache key, returns whether a response younger than the TTL is stored, without
+        counting a hit or miss.
+        """
+        with self.lock:
+            row = self.db.execute('SELECT created FROM responses WHERE key = ?', (key,)).fetchone()
+        return row is not None and time.time() - row[0] <= self.ttl
+
+    def put(self, key: str, body: bytes) -> None:
+        """
+        Given a cache key and response body, stores the response, trimming the cache if it
+        has grown past max_bytes.
+        """
+        size = len(key) + len(body)
+        with self.lock:
+            now = time.time()
+            with self.db:
+                replaced = self.db.execute('SELECT size FROM responses WHERE key = ?', (key,)).fetchone()
+                self.db.execute(
+                    'INSERT OR REPLACE INTO responses (key, body, size, created, last_access) VALUES (?, ?, ?, ?, ?)',
+                    (key, body, size, now, now)
+                )
+            self.size += size - (replaced[0] if replaced else 0)
+            if self.size > self.max_bytes:
+                self.trim(int(self.max_bytes * TRIM_TO))
+
+    def trim(self, max_bytes: int) -> int:
+        """
+        Given a size, deletes responses until the cache holds at most that many bytes: first
+        those older than the TTL, which would be downloaded again anyway, then the least
+        recently used. Call with the lock held.
+
+        Returns:
+            int: number of responses deleted
+        """
+        # keep the most valuable responses whose sizes add up to max_bytes, and delete the rest
+        with self.db:
+            deleted = self.db.execute(
+                'DELETE FROM responses WHERE key IN ('
+                '  SELECT key FROM ('
+                '    SELECT key, SUM(size) OVER (ORDER BY created >= ? DESC, last_access DESC, key) AS kept FROM responses'
+                '  ) WHERE kept > ?'
+                ')', (time.time() - self.ttl, max_bytes)
+            ).rowcount
+        self.size = self.db.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+        logging.info(f"Dropped {deleted} responses from cache '{self.path}', which now holds {self.size} bytes")
+        return deleted
+
+    def close(self) -> None:
+        with self.lock:
+            self.db.close()
@@ -0,0 +1,359 @@
+"""
+Minimal NCBI E-utilities client for large result sets.
+
+Searches (and posted ID lists) are kept on the Entrez history server, so a result set of any
+size is referred to by its WebEnv and query_key rather than by a list of IDs in the URL, and
+records are fetched from it in pages with retstart/retmax. Pages are fetched by a few threads
+at once, but every request, from any thread, waits its turn on one rate limiter so the client
+never exceeds NCBI's limit (3 requests per second, or 10 with an API key). Requests that fail
+with a network error, a 429 or a 5xx response are retried with exponential backoff. With a
+cache, responses are stored on disk and reused, and an offline client runs from them alone.
+"""
+import concurrent.futures
+import itertools
+import json
+import logging
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import xml.etree.ElementTree as ET
+from typing import Iterator
+from pydantic import BaseModel
+from entrez_cache import EntrezCache
+
+# -------------------------
+# Constants (configuration)
+# -------------------------
+EUTILS_URL = 'https://eutils.ncbi.nlm.nih.gov/entrez/eutils/'
+TOOL = 'get_ncbi_genbank_records'
+
+# requests per second allowed by NCBI without and with an API key
+RATE_LIMIT = 3
+RATE_LIMIT_WITH_KEY = 10
+
+FETCH_BATCH_SIZE = 200
+ESEARCH_BATCH_SIZE = 10000
+FETCH_WORKERS = 3
+MAX_TRIES = 4
+BACKOFF_SECONDS = 1.0
+TIMEOUT_SECONDS = 60.0
+
+# HTTP status codes worth retrying: rate limited, or a server side error
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+# -------------------------
+# Classes
+# -------------------------
+class EntrezError(Exception):
+    """
+    Raised when E-utilities reports an error or returns a response that cannot be used.
+    """
+
+class SearchResult(BaseModel):
+    count: int
+    webenv: str
+    query_key: str
+    ids: list[str]
+
+    # the request that made the result set, and whether its response came from the cache
+    utility: str = 'esearch'
+    params: dict = {}
+    cached: bool = False
+
+class RateLimiter:
+    """
+    Spaces calls to wait() at least 1 / rate seconds apart, across all threads.
+    """
+    def __init__(self, rate: float):
+        if rate <= 0:
+            raise ValueError("The rate must be positive")
+        self.interval = 1.0 / rate
+        self.next_slot = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self) -> None:
+        # each caller books the next free slot, then sleeps until it comes
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+class EntrezClient:
+    """
+    E-utilities client with rate limiting, retries and an optional response cache, shared
+    by all threads of a run. An offline client answers from the cache alone.
+    """
+    def __init__(self, email: str, api_key: str | None = None, base_url: str = EUTILS_URL, rate: float | None = None,
+                 max_tries: int = MAX_TRIES, backoff: float = BACKOFF_SECONDS, timeout: float = TIMEOUT_SECONDS,
+                 cache: EntrezCache | None = None, offline: bool = False):
+        if offline and cache is None:
+            raise ValueError("An offline client needs a cache to answer from")
+        self.email = email
+        self.api_key = api_key
+        self.base_url = base_url.rstrip('/') + '/'
+        self.limiter = RateLimiter(rate or (RATE_LIMIT_WITH_KEY if api_key else RATE_LIMIT))
+        self.max_tries = max_tries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.cache = cache
+        self.offline = offline
+        self.requests = 0
+        self.retries = 0
+
+    def request(self, utility: str, params: dict, cache_params: dict | None = None) -> bytes:
+        """
+        Given an E-utility (e.g. 'esearch') and its parameters, returns the cached response
+        if there is one, and otherwise downloads it.
+
+        Args:
+            utility: name of the E-utility, without '.fcgi'
+            params: parameters of the request; None values are left out
+            cache_params: parameters the response is cached under (default: params)
+
+        Returns:
+            bytes: body of the response
+        """
+        body = self.lookup(utility, params if cache_params is None else cache_params)
+        if body is None:
+            body = self.download(utility, params, cache_params)
+        return body
+
+    def lookup(self, utility: str, cache_params: dict) -> bytes | None:
+        """
+        Given an E-utility and the parameters its response is cached under, returns the
+        cached response, or None. Offline, responses older than the TTL are used too.
+        """
+        if self.cache is None:
+            return None
+        return self.cache.get(self.cache.key(utility, cache_params), any_age=self.offline)
+
+    def download(self, utility: str, params: dict, cache_params: dict | None = None) -> bytes:
+        """
+        Given an E-utility (e.g. 'esearch') and its parameters, POSTs the request, waiting
+        for the rate limiter before each attempt and retrying transient failures, and caches
+        the response.
+
+        Args:
+            utility: name of the E-utility, without '.fcgi'
+            params: parameters of the request; None values are left out
+            cache_params: parameters the response is cached under (default: params)
+
+        Returns:
+            bytes: body of the response
+        """
+        if self.offline:
+            raise EntrezError(f"The {utility} response is not in the cache, and the client is offline")
+
+        data = urllib.parse.urlencode(
+            {k: v for k, v in {'tool': TOOL, 'email': self.email, 'api_key': self.api_key, **params}.items() if v is not None}
+        ).encode()
+        url = f'{self.base_url}{utility}.fcgi'
+
+        for attempt in range(self.max_tries):
+            self.limiter.wait()
+            self.requests += 1
+            try:
+                with urllib.request.urlopen(url, data=data, timeout=self.timeout) as response:
+                    body = response.read()
+                break
+            except urllib.error.HTTPError as e:
+                if e.code not in RETRY_STATUS or attempt == self.max_tries - 1:
+                    raise
+                error = f'HTTP {e.code}'
+            except (urllib.error.URLError, TimeoutError, ConnectionError) as e:
+                if attempt == self.max_tries - 1:
+                    raise
+                error = str(e)
+
+            delay = self.backoff * 2 ** attempt
+            self.retries += 1
+            logging.warning(f"{utility} request failed ({error}); retrying in {delay:.1f} s")
+            time.sleep(delay)
+
+        if self.cache is not None:
+            self.cache.put(self.cache.key(utility, params if cache_params is None else cache_params), body)
+        return body
+
+    def search(self, utility: str, params: dict, use_cache: bool = True) -> SearchResult:
+        """
+        Given 'esearch' or 'epost' and its parameters, puts a result set on the history
+        server (or reads the response from the cache) and returns its keys.
+        """
+        body = self.lookup(utility, params) if use_cache else None
+        cached = body is not None
+        if body is None:
+            body = self.download(utility, params)
+
+        result = parse_history_result(body)
+        if utility == 'epost':
+            ids = params['id'].split(',')
+            result = result.model_copy(update={'count': len(ids), 'ids': ids})
+        return result.model_copy(update={'utility': utility, 'params': params, 'cached': cached})
+
+    def esearch(self, db: str, term: str, retmax: int = 0) -> SearchResult:
+        """
+        Given a database and search term, runs the search on the history server.
+
+        Args:
+            db: Entrez database, e.g. 'protein'
+            term: search term
+            retmax: number of IDs to return with the result (the records themselves are
+                    fetched from the history server, so none are needed for that)
+
+        Returns:
+            SearchResult: number of matches, WebEnv and query_key of the result set, and IDs
+        """
+        return self.search('esearch', {'db': db, 'term': term, 'usehistory': 'y', 'retmax': retmax})
+
+    def esearch_ids(self, db: str, term: str, batch_size: int = ESEARCH_BATCH_SIZE) -> list[str]:
+        """
+        Given a database and search term, returns the accession.version of every match,
+        paging through the IDs batch_size at a time. The search is always run again (unless
+        the client is offline) rather than read from the cache, since its point is to see
+        what has changed.
+
+        Args:
+            db: Entrez database, e.g. 'protein'
+            term: search term
+            batch_size: number of IDs returned per esearch request
+
+        Returns:
+            list[str]: accession.version of every record matching the term
+        """
+        ids = []
+        while True:
+            params = {'db': db, 'term': term, 'usehistory': 'y', 'idtype': 'acc', 'retstart': len(ids), 'retmax': batch_size}
+            result = self.search('esearch', params, use_cache=self.offline)
+            ids.extend(result.ids)
+            if not result.ids or len(ids) >= result.count:
+                return ids
+
+    def epost(self, db: str, ids: list[str]) -> SearchResult:
+        """
+        Given a database and a list of IDs, posts the IDs to the history server so they can
+        be fetched in pages like a search result, however long the list is.
+
+        Args:
+            db: Entrez database, e.g. 'protein'
+            ids: IDs (UIDs or accession.version) to post
+
+        Returns:
+            SearchResult: WebEnv and query_key of the posted IDs
+        """
+        return self.search('epost', {'db': db, 'id': ','.join(ids)})
+
+    def page_ranges(self, result: SearchResult, batch_size: int = FETCH_BATCH_SIZE, max_records: int | None = None) -> list[tuple[int, int]]:
+        """
+        Given a result set, a page size and an optional record limit, returns the retstart
+        and retmax of every page.
+        """
+        total = result.count if max_records is None else min(result.count, max_records)
+        return [(start, min(batch_size, total - start)) for start in range(0, total, batch_size)]
+
+    def page_cache_params(self, db: str, result: SearchResult, start: int, count: int, rettype: str, retmode: str) -> dict:
+        """
+        Returns the parameters a page is cached under: the search that made the result set
+        rather than its WebEnv, which changes from run to run.
+        """
+        return {'search': json.dumps([result.utility, result.params], sort_keys=True), 'db': db,
+                'retstart': start, 'retmax': count, 'rettype': rettype, 'retmode': retmode}
+
+    def live_result(self, db: str, result: SearchResult, pages: list[tuple[int, int]], rettype: str = 'gb', retmode: str = 'text') -> SearchResult:
+        """
+        Given a result set and the pages about to be fetched from it, returns a result set
+        the pages can be downloaded from. A result set read from the cache may have expired
+        on the history server, so its search is run again if any page is not cached.
+        """
+        if not result.cached or self.offline:
+            return result
+        keys = [self.cache.key('efetch', self.page_cache_params(db, result, start, count, rettype, retmode)) for start, count in pages]
+        if all(self.cache.contains(key) for key in keys):
+            return result
+        return self.search(result.utility, result.params, use_cache=False)
+
+    def efetch_page(self, db: str, result: SearchResult, start: int, count: int, rettype: str = 'gb', retmode: str = 'text') -> str:
+        """
+        Given a result set on the history server, fetches one page of its records.
+
+        Args:
+            db: Entrez database, e.g. 'protein'
+            result: result set from esearch or epost
+            start: position of the first record of the page in the result set (retstart)
+            count: number of records in the page (retmax)
+            rettype: efetch rettype, e.g. 'gb'
+            retmode: efetch retmode, e.g. 'text'
+
+        Returns:
+            str: the text of the page
+        """
+        cache_params = self.page_cache_params(db, result, start, count, rettype, retmode)
+        params = {'WebEnv': result.webenv, 'query_key': result.query_key, **{k: v for k, v in cache_params.items() if k != 'search'}}
+        return self.request('efetch', params, cache_params).decode()
+
+    def efetch_pages(self, db: str, result: SearchResult, batch_size: int = FETCH_BATCH_SIZE, max_records: int | None = None,
+                     workers: int = FETCH_WORKERS, rettype: str = 'gb', retmode: str = 'text') -> Iterator[str]:
+        """
+        Given a result set on the history server, fetches its records in pages of batch_size
+        with retstart, several pages at a time, and yields the pages in order. At most
+        2 x workers pages are held at once, so a slow consumer does not let them pile up.
+
+        Args:
+            db: Entrez database, e.g. 'protein'
+            result: result set from esearch or epost
+            batch_size: number of records per efetch request
+            max_records: number of records to fetch (default: the whole result set)
+            workers: number of pages fetched at the same time
+            rettype: efetch rettype, e.g. 'gb'
+            retmode: efetch retmode, e.g. 'text'
+
+        Returns:
+            Iterator[str]: the text of each page, in result set order
+        """
+        pages = self.page_ranges(result, batch_size, max_records)
+        result = self.live_result(db, result, pages, rettype, retmode)
+
+        def fetch(page: tuple[int, int]) -> str:
+            return self.efetch_page(db, result, *page, rettype, retmode)
+
+        pages = iter(pages)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = [executor.submit(fetch, page) for page in itertools.islice(pages, 2 * workers)]
+            while pending:
+                text = pending.pop(0).result()
+                pending.extend(executor.submit(fetch, page) for page in itertools.islice(pages, 1))
+                yield text
+
+# -------------------------
+# Functions
+# -------------------------
+def parse_history_result(body: bytes) -> SearchResult:
+    """
+    Given the XML body of an esearch or epost response, returns its history server keys,
+    raising EntrezError if the response reports an error or has no WebEnv.
+
+    Args:
+        body: XML response of esearch or epost
+
+    Returns:
+        SearchResult: number of matches (0 for epost), WebEnv, query_key and IDs
+    """
+    try:
+        root = ET.fromstring(body)
+    except ET.ParseError as e:
+        raise EntrezError(f"Could not parse E-utilities response: {e}")
+
+    error = root.findtext('ERROR')
+    webenv = root.findtext('WebEnv')
+    if error or not webenv:
+        raise EntrezError(error or "E-utilities response has no WebEnv")
+
+    return SearchResult(
+        count = int(root.findtext('Count') or 0),
+        webenv = webenv,
+        query_key = root.findtext('QueryKey'),
+        ids = [element.text for element in root.iterfind('IdList/Id')]
+    )
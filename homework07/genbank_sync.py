@@ -0,0 +1,119 @@
+"""
+Incremental sync of the records matching a search term into Redis.
+
+The accession.version of every match is listed with esearch and compared with the records
+stored for the term. Only records that are new, or whose version changed (the record was
+updated at NCBI), are fetched; records already stored for another term are just added to the
+term's index, and a re-run with nothing new costs one search and one set comparison. The
+versions an update replaces are taken out of the term's index, and records that no longer
+match the term can be removed too.
+"""
+import logging
+from pydantic import BaseModel
+from entrez_client import FETCH_BATCH_SIZE, FETCH_WORKERS, EntrezClient
+from ingest_pipeline import parse_page
+from redis_store import BATCH_SIZE, RecordStore
+
+# -------------------------
+# Classes
+# -------------------------
+class SyncPlan(BaseModel):
+    # accession.version of the records in each state
+    added: list[str]
+    updated: list[str]
+    unchanged: list[str]
+    removed: list[str]
+
+    # stored versions that the updated records replace
+    replaced: list[str]
+
+class SyncReport(BaseModel):
+    added: int
+    updated: int
+    unchanged: int
+    removed: int
+    fetched: int
+
+    def line(self) -> str:
+        return (f"{self.added} added, {self.updated} updated, {self.unchanged} unchanged, "
+                f"{self.removed} removed ({self.fetched} records fetched)")
+
+# -------------------------
+# Functions
+# -------------------------
+def accession(record_id: str) -> str:
+    """
+    Given an accession.version (e.g. 'Q9S7Q7.1'), returns the accession without its version.
+    """
+    return record_id.rsplit('.', 1)[0]
+
+def plan_sync(remote_ids: list[str], stored_ids: set[str]) -> SyncPlan:
+    """
+    Given the accession.version of every record matching a term and of every record stored
+    for it, sorts the records into added, updated, unchanged and removed.
+
+    Args:
+        remote_ids: accession.version of the records matching the term now
+        stored_ids: accession.version of the records stored for the term
+
+    Returns:
+        SyncPlan: the records in each state, and the stored versions the updates replace
+    """
+    remote_ids = list(dict.fromkeys(remote_ids))
+    gone = stored_ids.difference(remote_ids)
+    gone_versions = {accession(record_id): record_id for record_id in gone}
+
+    new = [record_id for record_id in remote_ids if record_id not in stored_ids]
+    updated = [record_id for record_id in new if accession(record_id) in gone_versions]
+    replaced = [gone_versions[accession(record_id)] for record_id in updated]
+
+    return SyncPlan(
+        added = [record_id for record_id in new if accession(record_id) not in gone_versions],
+        updated = updated,
+        unchanged = [record_id for record_id in remote_ids if record_id in stored_ids],
+        removed = sorted(gone.difference(replaced)),
+        replaced = replaced
+    )
+
+def sync_term(client: EntrezClient, store: RecordStore, db: str, term: str, prune: bool = False,
+              fetch_batch_size: int = FETCH_BATCH_SIZE, fetch_workers: int = FETCH_WORKERS, batch_size: int = BATCH_SIZE) -> SyncReport:
+    """
+    Given a search term, brings the records stored for it up to date with the records that
+    match it now, fetching only the ones that are new or changed.
+
+    Args:
+        client: E-utilities client
+        store: Redis record store
+        db: Entrez database, e.g. 'protein'
+        term: search term
+        prune: whether to remove the records that no longer match the term
+        fetch_batch_size: number of records retrieved per efetch request
+        fetch_workers: number of efetch requests in flight at once
+        batch_size: number of records written per Redis round trip
+
+    Returns:
+        SyncReport: number of records added, updated, unchanged and removed, and fetched
+    """
+    plan = plan_sync(client.esearch_ids(db, term), store.term_members(term))
+
+    # records stored for another term only need indexing under this one
+    changed = plan.added + plan.updated
+    stored = store.contains(changed)
+    store.add_term([record_id for record_id, found in zip(changed, stored) if found], term, batch_size)
+    missing = [record_id for record_id, found in zip(changed, stored) if not found]
+
+    fetched = 0
+    if missing:
+        logging.info(f"Fetching {len(missing)} new or updated records")
+        result = client.epost(db, missing)
+        for text in client.efetch_pages(db, result, fetch_batch_size, workers=fetch_workers):
+            fetched += store.save(parse_page(text), term, batch_size)
+
+    store.remove_from_term(plan.replaced, term, batch_size)
+    if prune:
+        store.remove_from_term(plan.removed, term, batch_size)
+    elif plan.removed:
+        logging.info(f"{len(plan.removed)} stored records no longer match the term; use --prune to remove them")
+
+    return SyncReport(added=len(plan.added), updated=len(plan.updated), unchanged=len(plan.unchanged),
+                      removed=len(plan.removed) if prune else 0, fetched=fetched)
@@ -1,11 +1,24 @@
 #!/usr/bin/env python3
-from Bio import Entrez, SeqIO
+from Bio import SeqIO
 import redis
-import json
 import argparse
+import asyncio
+import concurrent.futures
+import functools
+import io
 import logging
+import os
 import socket
+import sqlite3
 import sys
+import urllib.error
+from typing import Iterable, Iterator
+from entrez_cache import CACHE_FILE, MAX_BYTES, TTL_SECONDS, EntrezCache
+from entrez_client import EUTILS_URL, FETCH_BATCH_SIZE, FETCH_WORKERS, EntrezClient, EntrezError
+from genbank_sync import sync_term
+from ingest_pipeline import PARSE_WORKERS, QUEUE_SIZE, PipelineReport, run_ingest
+from redis_store import (BATCH_SIZE, KEY_PREFIX, REDIS_HOST, REDIS_PORT, RecordStore, batched, make_async_redis_client,
+                         make_redis_client, summarize_record)
 
 # -------------------------
 # Constants (configuration)
@@ -40,8 +53,168 @@ parser.add_argument(
     default=SEARCH_TERM,
     help=f'The search term used to retrieve GB records (default: {SEARCH_TERM})'
 )
+parser.add_argument(
+    '-n', '--maxRecords',
+    type=int,
+    required=False,
+    default=None,
+    help='The largest number of records to retrieve (default: every record that matches the search term)'
+)
+parser.add_argument(
+    '--fetchBatchSize',
+    type=int,
+    required=False,
+    default=FETCH_BATCH_SIZE,
+    help=f'The number of records retrieved per efetch request (default: {FETCH_BATCH_SIZE})'
+)
+parser.add_argument(
+    '--fetchWorkers',
+    type=int,
+    required=False,
+    default=FETCH_WORKERS,
+    help=f'The number of efetch requests in flight at once, within the NCBI rate limit (default: {FETCH_WORKERS})'
+)
+parser.add_argument(
+    '--apiKey',
+    type=str,
+    required=False,
+    default=os.environ.get('NCBI_API_KEY'),
+    help='NCBI API key, raising the rate limit from 3 to 10 requests per second (default: $NCBI_API_KEY)'
+)
+parser.add_argument(
+    '--eutilsUrl',
+    type=str,
+    required=False,
+    default=EUTILS_URL,
+    help=f'The base URL of the E-utilities (default: {EUTILS_URL})'
+)
+parser.add_argument(
+    '-p', '--pipeline',
+    action='store_true',
+    help='Fetch, parse and store records at the same time in an asyncio pipeline instead of one phase after the other'
+)
+parser.add_argument(
+    '-i', '--incremental',
+    action='store_true',
+    help='Only fetch the records that are not stored yet or have a new version, comparing accession.version of every match with Redis (ignores -p and -n)'
+)
+parser.add_argument(
+    '--prune',
+    action='store_true',
+    help='With --incremental, remove the stored records that no longer match the search term'
+)
+parser.add_argument(
+    '--parseWorkers',
+    type=int,
+    required=False,
+    default=PARSE_WORKERS,
+    help=f'Pipeline mode: the number of pages parsed at the same time (default: {PARSE_WORKERS})'
+)
+parser.add_argument(
+    '--parseProcesses',
+    action='store_true',
+    help='Pipeline mode: parse pages in worker processes instead of threads'
+)
+parser.add_argument(
+    '--queueSize',
+    type=int,
+    required=False,
+    default=QUEUE_SIZE,
+    help=f'Pipeline mode: the number of pages held between two stages before the earlier stage waits (default: {QUEUE_SIZE})'
+)
+parser.add_argument(
+    '-c', '--cache',
+    type=str,
+    required=False,
+    default=CACHE_FILE,
+    help=f'The SQLite file E-utilities responses are cached in (default: {CACHE_FILE})'
+)
+parser.add_argument(
+    '--cacheTtl',
+    type=float,
+    required=False,
+    default=TTL_SECONDS,
+    help=f'Seconds a cached response is reused before it is downloaded again (default: {TTL_SECONDS})'
+)
+parser.add_argument(
+    '--cacheMaxBytes',
+    type=int,
+    required=False,
+    default=MAX_BYTES,
+    help=f'Size past which the cache is trimmed, dropping expired and then least recently used responses (default: {MAX_BYTES})'
+)
+parser.add_argument(
+    '--noCache',
+    action='store_true',
+    help='Neither read nor write the cache'
+)
+parser.add_argument(
+    '--offline',
+    action='store_true',
+    help='Answer every E-utilities request from the cache, whatever its age, without using the network'
+)
+parser.add_argument(
+    '-b', '--batchSize',
+    type=int,
+    required=False,
+    default=BATCH_SIZE,
+    help=f'The number of records written or read per Redis round trip (default: {BATCH_SIZE})'
+)
+parser.add_argument(
+    '--redisPrefix',
+    type=str,
+    required=False,
+    default=KEY_PREFIX,
+    help=f'The prefix of every Redis key the records and their indexes are stored under (default: {KEY_PREFIX})'
+)
+parser.add_argument(
+    '--minLength',
+    type=int,
+    required=False,
+    default=None,
+    help='Only write records with sequences of at least this many residues to the output file'
+)
+parser.add_argument(
+    '--maxLength',
+    type=int,
+    required=False,
+    default=None,
+    help='Only write records with sequences of at most this many residues to the output file'
+)
+parser.add_argument(
+    '--organism',
+    type=str,
+    required=False,
+    default=None,
+    help='Only write records of this organism to the output file'
+)
+parser.add_argument(
+    '--termOnly',
+    action='store_true',
+    help='Only write records found by the search term to the output file, rather than every stored record'
+)
+parser.add_argument(
+    '--redisHost',
+    type=str,
+    required=False,
+    default=REDIS_HOST,
+    help=f'The host of the Redis server (default: {REDIS_HOST})'
+)
+parser.add_argument(
+    '--redisPort',
+    type=int,
+    required=False,
+    default=REDIS_PORT,
+    help=f'The port of the Redis server (default: {REDIS_PORT})'
+)
 args = parser.parse_args()
 
+for name in ['batchSize', 'fetchBatchSize', 'fetchWorkers', 'parseWorkers', 'queueSize']:
+    if getattr(args, name) < 1:
+        parser.error(f'--{name} must be at least 1')
+if args.offline and args.noCache:
+    parser.error('--offline replays the cache, so it can not be used with --noCache')
+
 format_str = (
     f'[%(asctime)s {socket.gethostname()}] '
     '%(filename)s:%(funcName)s:%(lineno)s - %(levelname)s: %(message)s'
@@ -51,86 +224,153 @@ logging.basicConfig(level=args.loglevel, format=format_str)
 # -------------------------
 # Functions
 # -------------------------
-def retrieve_gb_records(search_term: str) -> list[object]:
+def retrieve_gb_records(search_term: str, client: EntrezClient, max_records: int | None = None,
+                        batch_size: int = FETCH_BATCH_SIZE, workers: int = FETCH_WORKERS) -> Iterator[object]:
     """
-    Given input search term, searches NCBI protein database and uses GenBank IDs 
-    to retrieve and build list of records.
+    Given input search term, searches NCBI protein database and retrieves the matching
+    GenBank records from the Entrez history server, in pages of batch_size, yielding each
+    record as soon as its page is parsed, so only the pages in flight are held in memory
+    rather than the whole result set.
 
     Args:
         search_term: a string corresponding to the search term(s) used in the database search
+        client: E-utilities client, which keeps requests within the NCBI rate limit
+        max_records: the largest number of records to retrieve (default: all matches)
+        batch_size: number of records retrieved per efetch request
+        workers: number of efetch requests in flight at once
 
     Returns:
-        list[object]: a list of SeqRecord objects
+        Iterator[object]: the SeqRecord objects, in result set order
     """
-    # email to be used in NCBI search
-    Entrez.email = EMAIL
 
     logging.info(f"Searching NCBI protein database using search term: {search_term}")
 
-    # search for records in NCBI protein database using input search term, returning 30 IDs max
-    with Entrez.esearch(db="protein", term=search_term, retmax=30) as h:
-        results = Entrez.read(h)
-    
-    # using the list of IDs from the search, join into a single string separated by commas
-    single_string_id = ",".join(results["IdList"])
+    # search NCBI protein database using input search term, keeping the result set on the
+    # history server so it can be retrieved in pages however large it is
+    result = client.esearch("protein", search_term)
+
+    logging.info(f"Retrieving {result.count if max_records is None else min(result.count, max_records)} "
+                 f"of {result.count} GenBank records found")
 
-    # create an empty list of records
-    rec_list = []
+    # retrieve records page by page,
+    # and parse each page, yielding its records one at a time
+    retrieved = 0
+    for page in client.efetch_pages("protein", result, batch_size, max_records, workers):
+        for record in SeqIO.parse(io.StringIO(page), "gb"):
+            retrieved += 1
+            yield record
 
-    logging.info(f"Retrieving GenBank records using found IDs")
+    logging.info(f"Retrieved {retrieved} records in {client.requests} requests ({client.retries} retried)")
 
-    # retrieve records using the IDs, 
-    # and iterate through each record, adding each to rec_list
-    with Entrez.efetch(db="protein", id=single_string_id, rettype="gb", retmode="text") as h:
-        for record in SeqIO.parse(h, "gb"):
-            rec_list.append(record)
+def ingest_gb_records(search_term: str, client: EntrezClient, redis_host: str, redis_port: int, redis_prefix: str = KEY_PREFIX, max_records: int | None = None,
+                      fetch_batch_size: int = FETCH_BATCH_SIZE, fetch_workers: int = FETCH_WORKERS, parse_workers: int = PARSE_WORKERS,
+                      parse_processes: bool = False, queue_size: int = QUEUE_SIZE, batch_size: int = BATCH_SIZE) -> PipelineReport:
+    """
+    Given input search term, searches NCBI protein database and ingests the matching GenBank
+    records into Redis with fetching, parsing and storing overlapping, so only a few pages
+    of records are held in memory at a time. Redis ends up with the same summaries as with
+    retrieve_gb_records followed by save_data_to_redis.
 
-    # return the list of records
-    return rec_list
+    Args:
+        search_term: a string corresponding to the search term(s) used in the database search
+        client: E-utilities client, which keeps requests within the NCBI rate limit
+        redis_host: host of the Redis server
+        redis_port: port of the Redis server
+        redis_prefix: prefix of the Redis keys of the records and their indexes
+        max_records: the largest number of records to ingest (default: all matches)
+        fetch_batch_size: number of records retrieved per efetch request
+        fetch_workers: number of efetch requests in flight at once
+        parse_workers: number of pages parsed at once
+        parse_processes: parse in worker processes instead of threads
+        queue_size: number of pages held between two stages
+        batch_size: number of records written per pipelined Redis round trip
 
-def save_data_to_redis(records_list: list[object]) -> None:
+    Returns:
+        PipelineReport: wall time and per stage throughput and queue depths
     """
-    Given an input list of SeqRecord objects, saves a summary of information about each record
-    to a Redis database.
+
+    logging.info(f"Searching NCBI protein database using search term: {search_term}")
+    result = client.esearch("protein", search_term)
+
+    logging.info(f"Ingesting {result.count if max_records is None else min(result.count, max_records)} "
+                 f"of {result.count} GenBank records found")
+
+    async def ingest() -> PipelineReport:
+        rd = make_async_redis_client(redis_host, redis_port)
+        parse_executor = concurrent.futures.ProcessPoolExecutor(parse_workers) if parse_processes else None
+        try:
+            store = functools.partial(RecordStore(rd, redis_prefix).save_async, term=search_term, batch_size=batch_size)
+            return await run_ingest(client, "protein", result, store, fetch_batch_size, max_records,
+                                    fetch_workers, parse_workers, queue_size, parse_executor)
+        finally:
+            await rd.aclose()
+            if parse_executor is not None:
+                parse_executor.shutdown()
+
+    report = asyncio.run(ingest())
+    for line in report.lines():
+        logging.info(f"Pipeline {line}")
+    logging.info(f"Ingested records in {report.seconds:.2f} s")
+
+    return report
+
+def save_data_to_redis(records_list: Iterable[object], store: RecordStore, search_term: str, batch_size: int = BATCH_SIZE) -> None:
+    """
+    Given SeqRecord objects, saves a summary of information about each record to a Redis
+    database, indexed by sequence length, organism and the search term. Records are taken
+    batch_size at a time as they arrive, so a stream of records is never held in memory whole.
 
     Args: 
-        records_list: a list of SeqRecord objects
+        records_list: SeqRecord objects, e.g. streamed from retrieve_gb_records
+        store: Redis record store, sharing one connection pool with the other Redis functions
+        search_term: the search term that found the records
+        batch_size: number of records written per pipelined round trip
 
     Returns:
         None: this function does not return a value; it saves key-value pairs to a Redis database
     """
 
-    # create a Python client object to the Redis server
-    rd=redis.Redis(host='127.0.0.1', port=6379, db=1)
-    
     logging.info(f"Saving records to Redis database")
 
-    # iterate through the records in the input list and save the ID as the key 
-    # and a summary of the record in a JSON string as the value to Redis
-    for record in records_list:
-        rec_summary = {'ID': record.id, 'Name': record.name, 'Description': record.description, 'Sequence':str(record.seq)}
-        rd.set(record.id, json.dumps(rec_summary))
+    # save a summary of each record as a hash under its ID, with a compressed sequence,
+    # sending the commands to Redis in pipelined batches as the records are retrieved
+    summaries = (summarize_record(record) for record in records_list)
+    written = store.save(summaries, search_term, batch_size)
 
-def write_redis_data_to_txt(output_file: str) -> None:
+    logging.info(f"Saved {written} records to Redis database")
+
+def write_redis_data_to_txt(output_file: str, store: RecordStore, batch_size: int = BATCH_SIZE, min_length: int | None = None,
+                            max_length: int | None = None, organism: str | None = None, term: str | None = None) -> None:
     """
-    Given output file name, writes Redis data to TXT file.
+    Given output file name, writes Redis data to TXT file: every stored record, or only the
+    records matching the given filters, which are looked up in the indexes.
 
     Args:
         output_file: path of output TXT file
+        store: Redis record store, sharing one connection pool with the other Redis functions
+        batch_size: number of records read per round trip
+        min_length: only records with at least this many residues
+        max_length: only records with at most this many residues
+        organism: only records of this organism
+        term: only records found by this search term
 
     Returns:
         None: this function doesn't return a value; it writes data to an output file
     """
 
-    # create a Python client object to the Redis server
-    rd=redis.Redis(host='127.0.0.1', port=6379, db=1)
-
     logging.info(f"Writing Redis data to output file {output_file}")
 
-    # iterates through keys in Redis database, writing record summary value to outfile
+    # walk the records in order of sequence length, or look the IDs of the matching records up
+    # in the indexes, reading the records in batches
+    if (min_length, max_length, organism, term) == (None, None, None, None):
+        summaries = store.iter_records(batch_size)
+    else:
+        record_ids = store.query(min_length, max_length, term, organism)
+        logging.info(f"{len(record_ids)} stored records match the filters")
+        summaries = (summary for batch in batched(record_ids, batch_size) for summary in store.get_many(batch) if summary is not None)
+
     with open(output_file, "w") as outfile:
-        for key in rd.keys():
-            sum_dict = json.loads(rd.get(key))
+        for sum_dict in summaries:
             sum_string = f"ID: {sum_dict['ID']}\nName: {sum_dict['Name']}\nDescription: {sum_dict['Description']}\nSequence: {sum_dict['Sequence']}\n\n"
             outfile.write(sum_string)
 
@@ -138,13 +378,42 @@ def main():
 
     logging.info(f"Starting GenBank records retrieval workflow")
     
+    # a cache that can not be opened only costs downloads, unless the run is offline
+    cache = None
+    if not args.noCache:
+        try:
+            cache = EntrezCache(args.cache, args.cacheTtl, args.cacheMaxBytes)
+        except (OSError, sqlite3.Error) as e:
+            if args.offline:
+                logging.error(f"Cannot run offline without the cache {args.cache} ({e}). Exiting.")
+                sys.exit(1)
+            logging.warning(f"Could not open the E-utilities cache {args.cache} ({e}); downloading every response")
+
     try:
-        rec_list = retrieve_gb_records(args.searchTerm)
-        save_data_to_redis(rec_list)
-        write_redis_data_to_txt(args.output)
+        store = RecordStore(make_redis_client(args.redisHost, args.redisPort), args.redisPrefix)
+        client = EntrezClient(EMAIL, args.apiKey, args.eutilsUrl, cache=cache, offline=args.offline)
+        if args.incremental:
+            report = sync_term(client, store, "protein", args.searchTerm, args.prune, args.fetchBatchSize, args.fetchWorkers, args.batchSize)
+            logging.info(f"Incremental sync: {report.line()}")
+        elif args.pipeline:
+            ingest_gb_records(args.searchTerm, client, args.redisHost, args.redisPort, args.redisPrefix, args.maxRecords, args.fetchBatchSize,
+                              args.fetchWorkers, args.parseWorkers, args.parseProcesses, args.queueSize, args.batchSize)
+        else:
+            records = retrieve_gb_records(args.searchTerm, client, args.maxRecords, args.fetchBatchSize, args.fetchWorkers)
+            save_data_to_redis(records, store, args.searchTerm, args.batchSize)
+        if cache is not None:
+            logging.info(f"E-utilities cache: {cache.hits} hits, {cache.misses} misses")
+        write_redis_data_to_txt(args.output, store, args.batchSize, args.minLength, args.maxLength, args.organism,
+                                args.searchTerm if args.termOnly else None)
     except redis.exceptions.ConnectionError:
         logging.error(f"Could not connect to Redis database. Exiting.")
         sys.exit(1)
+    except (urllib.error.URLError, EntrezError) as e:
+        logging.error(f"Could not retrieve records from NCBI: {e}. Exiting.")
+        sys.exit(1)
+    finally:
+        if cache is not None:
+            cache.close()
 
     logging.info("GenBank records retrieval workflow complete")
 
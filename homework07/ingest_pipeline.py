@@ -0,0 +1,169 @@
+"""
+Asyncio pipeline that fetches, parses and stores GenBank records at the same time.
+
+Three stages run concurrently and hand work on through bounded queues:
+
+    fetch (efetch pages, in threads) -> pages -> parse (in an executor) -> summaries -> store
+
+so the network, the CPU and Redis are busy at once instead of one after the other. A full queue
+makes the stage before it wait, which bounds memory to a few pages whatever the size of the
+result set. Queue depths are sampled while the pipeline runs, and every stage reports its
+throughput, which shows the stage that limits the others.
+"""
+import asyncio
+import concurrent.futures
+import io
+import time
+from typing import Awaitable, Callable
+from Bio import SeqIO
+from pydantic import BaseModel
+from entrez_client import FETCH_BATCH_SIZE, FETCH_WORKERS, EntrezClient, SearchResult
+from redis_store import summarize_record
+
+# -------------------------
+# Constants (configuration)
+# -------------------------
+PARSE_WORKERS = 2
+QUEUE_SIZE = 4
+SAMPLE_SECONDS = 0.05
+
+# -------------------------
+# Classes
+# -------------------------
+class StageStats(BaseModel):
+    name: str
+    pages: int = 0
+    records: int = 0
+    busy_seconds: float = 0.0
+
+    # depth of the queue the stage takes its work from, sampled while the pipeline runs
+    max_queue_depth: int = 0
+    mean_queue_depth: float = 0.0
+
+class PipelineReport(BaseModel):
+    seconds: float
+    stages: list[StageStats]
+
+    def lines(self) -> list[str]:
+        """
+        Returns one line per stage with its throughput and the depth of its input queue.
+        """
+        return [
+            f"{stage.name}: {stage.records} records in {stage.pages} pages, "
+            f"{stage.records / self.seconds if self.seconds else 0:.0f} records/s, busy {stage.busy_seconds:.2f} s, "
+            f"input queue depth mean {stage.mean_queue_depth:.1f} max {stage.max_queue_depth}"
+            for stage in self.stages
+        ]
+
+# -------------------------
+# Functions
+# -------------------------
+def parse_page(text: str) -> list[dict]:
+    """
+    Given the text of an efetch page of GenBank records, returns the summary of each record.
+    """
+    return [summarize_record(record) for record in SeqIO.parse(io.StringIO(text), 'gb')]
+
+async def run_ingest(client: EntrezClient, db: str, result: SearchResult, store: Callable[[list[dict]], Awaitable[int]],
+                     batch_size: int = FETCH_BATCH_SIZE, max_records: int | None = None, fetch_workers: int = FETCH_WORKERS,
+                     parse_workers: int = PARSE_WORKERS, queue_size: int = QUEUE_SIZE,
+                     parse_executor: concurrent.futures.Executor | None = None) -> PipelineReport:
+    """
+    Given a result set on the history server and an async function that stores a list of
+    record summaries, fetches the records page by page, parses each page and stores its
+    summaries, with the three stages overlapping.
+
+    Args:
+        client: E-utilities client
+        db: Entrez database, e.g. 'protein'
+        result: result set from esearch or epost
+        store: coroutine function that stores a list of summaries, e.g. a partial of save_summaries_async
+        batch_size: number of records per efetch page
+        max_records: number of records to ingest (default: the whole result set)
+        fetch_workers: number of pages fetched at the same time
+        parse_workers: number of pages parsed at the same time
+        queue_size: number of pages each queue holds before the stage feeding it waits
+        parse_executor: executor pages are parsed in, e.g. a ProcessPoolExecutor (default: threads)
+
+    Returns:
+        PipelineReport: wall time and per stage throughput and queue depths
+    """
+    loop = asyncio.get_running_loop()
+    start_time = time.perf_counter()
+
+    pages = client.page_ranges(result, batch_size, max_records)
+    result = await loop.run_in_executor(None, client.live_result, db, result, pages)
+
+    todo = asyncio.Queue()
+    for page in pages:
+        todo.put_nowait(page)
+    fetched = asyncio.Queue(maxsize=queue_size)
+    parsed = asyncio.Queue(maxsize=queue_size)
+    queues = [todo, fetched, parsed]
+    stages = [StageStats(name=name) for name in ['fetch', 'parse', 'store']]
+
+    fetch_executor = concurrent.futures.ThreadPoolExecutor(max_workers=fetch_workers)
+    own_parse_executor = parse_executor is None
+    parse_executor = parse_executor or concurrent.futures.ThreadPoolExecutor(max_workers=parse_workers)
+
+    async def fetch_worker() -> None:
+        while not todo.empty():
+            start, count = todo.get_nowait()
+            began = time.perf_counter()
+            text = await loop.run_in_executor(fetch_executor, client.efetch_page, db, result, start, count)
+            stages[0].busy_seconds += time.perf_counter() - began
+            stages[0].pages += 1
+            stages[0].records += count
+            await fetched.put(text)
+
+    async def parse_worker() -> None:
+        while (text := await fetched.get()) is not None:
+            began = time.perf_counter()
+            summaries = await loop.run_in_executor(parse_executor, parse_page, text)
+            stages[1].busy_seconds += time.perf_counter() - began
+            stages[1].pages += 1
+            stages[1].records += len(summaries)
+            await parsed.put(summaries)
+
+    async def store_worker() -> None:
+        while (summaries := await parsed.get()) is not None:
+            began = time.perf_counter()
+            await store(summaries)
+            stages[2].busy_seconds += time.perf_counter() - began
+            stages[2].pages += 1
+            stages[2].records += len(summaries)
+
+    # each stage tells the next one it is done with one None per worker of the next stage
+    async def fetch_stage() -> None:
+        await asyncio.gather(*(fetch_worker() for _ in range(fetch_workers)))
+        for _ in range(parse_workers):
+            await fetched.put(None)
+
+    async def parse_stage() -> None:
+        await asyncio.gather(*(parse_worker() for _ in range(parse_workers)))
+        await parsed.put(None)
+
+    async def sample_queues() -> None:
+        samples = 0
+        while True:
+            samples += 1
+            for stage, queue in zip(stages, queues):
+                depth = queue.qsize()
+                stage.max_queue_depth = max(stage.max_queue_depth, depth)
+                stage.mean_queue_depth += (depth - stage.mean_queue_depth) / samples
+            await asyncio.sleep(SAMPLE_SECONDS)
+
+    sampler = asyncio.create_task(sample_queues())
+    tasks = [asyncio.create_task(stage()) for stage in [fetch_stage, parse_stage, store_worker]]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        # a failed stage stops the others, which may be waiting on a queue it no longer serves
+        for task in tasks + [sampler]:
+            task.cancel()
+        await asyncio.gather(*tasks, sampler, return_exceptions=True)
+        fetch_executor.shutdown(wait=False, cancel_futures=True)
+        if own_parse_executor:
+            parse_executor.shutdown(wait=False, cancel_futures=True)
+
+    return PipelineReport(seconds=time.perf_counter() - start_time, stages=stages)
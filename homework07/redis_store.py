@@ -0,0 +1,329 @@
+"""
+Compact, indexed storage of GenBank record summaries in Redis.
+
+Each record is a hash under a namespaced key (e.g. genbank:rec:Q9S7Q7.1) holding its name,
+description, organism, length and zlib-compressed sequence. Secondary indexes are kept up to
+date on every write: a sorted set of all records scored by sequence length, and one set of
+records per organism and per search term, so range and membership queries ("records of
+500-1000 residues found by term X") are answered by the indexes without reading any record.
+
+All commands go through one shared connection pool, and writes are queued in pipelines sent
+batch_size records at a time, so storing n records costs a few round trips per batch instead
+of a few per record. The asyncio client does the same writes without blocking an event loop.
+"""
+import itertools
+import uuid
+import zlib
+from typing import Iterable, Iterator
+import redis
+import redis.asyncio
+
+# -------------------------
+# Constants (configuration)
+# -------------------------
+REDIS_HOST = '127.0.0.1'
+REDIS_PORT = 6379
+REDIS_DB = 1
+BATCH_SIZE = 1000
+KEY_PREFIX = 'genbank'
+
+# seconds a temporary query result may outlive a query that failed before deleting it
+TEMP_KEY_SECONDS = 60
+
+# -------------------------
+# Classes
+# -------------------------
+class RecordStore:
+    """
+    GenBank record summaries stored as hashes under a key prefix, with secondary indexes by
+    sequence length, organism and search term. Give it a redis.Redis client for save() and
+    the queries, or a redis.asyncio.Redis client for save_async().
+    """
+    def __init__(self, rd: redis.Redis | redis.asyncio.Redis, prefix: str = KEY_PREFIX):
+        self.rd = rd
+        self.prefix = prefix
+        self.length_key = f'{prefix}:idx:length'
+
+    def record_key(self, record_id: str) -> str:
+        return f'{self.prefix}:rec:{record_id}'
+
+    def terms_key(self, record_id: str) -> str:
+        # the search terms a record was stored for, so it can be taken out of their indexes
+        return f'{self.prefix}:rec_terms:{record_id}'
+
+    def organism_key(self, organism: str) -> str:
+        return f'{self.prefix}:idx:organism:{organism}'
+
+    def term_key(self, term: str) -> str:
+        return f'{self.prefix}:idx:term:{term}'
+
+    def queue_writes(self, pipe: object, batch: list[dict], old_organisms: list[bytes | None], term: str | None) -> None:
+        """
+        Given a pipeline, a batch of summaries, the organism each record is currently indexed
+        under (None for new records) and an optional search term, queues the commands that
+        store the records and update every index.
+        """
+        for summary, old_organism in zip(batch, old_organisms):
+            record_id = summary['ID']
+            sequence = summary['Sequence']
+            pipe.hset(self.record_key(record_id), mapping={
+                'name': summary['Name'],
+                'description': summary['Description'],
+                'organism': summary['Organism'],
+                'length': len(sequence),
+                'sequence': zlib.compress(sequence.encode())
+            })
+            pipe.zadd(self.length_key, {record_id: len(sequence)})
+            if old_organism is not None and old_organism.decode() != summary['Organism']:
+                pipe.srem(self.organism_key(old_organism.decode()), record_id)
+            pipe.sadd(self.organism_key(summary['Organism']), record_id)
+            if term is not None:
+                pipe.sadd(self.term_key(term), record_id)
+                pipe.sadd(self.terms_key(record_id), term)
+
+    def save(self, summaries: Iterable[dict], term: str | None = None, batch_size: int = BATCH_SIZE) -> int:
+        """
+        Given record summaries and the search term that found them, stores each record and
+        indexes it, in two pipelined round trips per batch_size records: one to read the
+        organism stored records are indexed under, and one to write.
+
+        Args:
+            summaries: record summaries, e.g. from summarize_record
+            term: search term the records were found by, or None to leave them out of the term indexes
+            batch_size: number of records written per round trip
+
+        Returns:
+            int: number of records written
+        """
+        written = 0
+        for batch in batched(summaries, batch_size):
+            pipe = self.rd.pipeline(transaction=False)
+            for summary in batch:
+                pipe.hget(self.record_key(summary['ID']), 'organism')
+            old_organisms = pipe.execute()
+
+            pipe = self.rd.pipeline(transaction=False)
+            self.queue_writes(pipe, batch, old_organisms, term)
+            pipe.execute()
+            written += len(batch)
+        return written
+
+    async def save_async(self, summaries: list[dict], term: str | None = None, batch_size: int = BATCH_SIZE) -> int:
+        """
+        Given record summaries and the search term that found them, stores and indexes them
+        like save(), awaiting the round trips on an asyncio client.
+
+        Args:
+            summaries: record summaries, e.g. from summarize_record
+            term: search term the records were found by, or None to leave them out of the term indexes
+            batch_size: number of records written per round trip
+
+        Returns:
+            int: number of records written
+        """
+        written = 0
+        for batch in batched(summaries, batch_size):
+            async with self.rd.pipeline(transaction=False) as pipe:
+                for summary in batch:
+                    pipe.hget(self.record_key(summary['ID']), 'organism')
+                old_organisms = await pipe.execute()
+
+            async with self.rd.pipeline(transaction=False) as pipe:
+                self.queue_writes(pipe, batch, old_organisms, term)
+                await pipe.execute()
+            written += len(batch)
+        return written
+
+    def term_members(self, term: str) -> set[str]:
+        """
+        Given a search term, returns the IDs of the records stored for it.
+        """
+        return {record_id.decode() for record_id in self.rd.smembers(self.term_key(term))}
+
+    def contains(self, record_ids: list[str]) -> list[bool]:
+        """
+        Given record IDs, returns whether each one is stored, in one pipelined round trip.
+        """
+        pipe = self.rd.pipeline(transaction=False)
+        for record_id in record_ids:
+            pipe.exists(self.record_key(record_id))
+        return [bool(found) for found in pipe.execute()]
+
+    def add_term(self, record_ids: list[str], term: str, batch_size: int = BATCH_SIZE) -> None:
+        """
+        Given the IDs of stored records and a search term, adds the records to the term's index.
+        """
+        for batch in batched(record_ids, batch_size):
+            pipe = self.rd.pipeline(transaction=False)
+            for record_id in batch:
+                pipe.sadd(self.term_key(term), record_id)
+                pipe.sadd(self.terms_key(record_id), term)
+            pipe.execute()
+
+    def remove_from_term(self, record_ids: list[str], term: str, batch_size: int = BATCH_SIZE) -> int:
+        """
+        Given record IDs and a search term, takes the records out of the term's index, and
+        deletes (from the record hashes and every index) the ones no other term was stored for.
+
+        Args:
+            record_ids: IDs of the records that no longer match the term
+            term: the search term
+            batch_size: number of records updated per round trip
+
+        Returns:
+            int: number of records deleted
+        """
+        deleted = 0
+        for batch in batched(record_ids, batch_size):
+            pipe = self.rd.pipeline(transaction=False)
+            for record_id in batch:
+                pipe.srem(self.term_key(term), record_id)
+                pipe.srem(self.terms_key(record_id), term)
+                pipe.scard(self.terms_key(record_id))
+                pipe.hget(self.record_key(record_id), 'organism')
+            replies = pipe.execute()
+
+            # four replies per record: the term count and organism are the last two
+            pipe = self.rd.pipeline(transaction=False)
+            for record_id, (_, _, terms, organism) in zip(batch, zip(*[iter(replies)] * 4)):
+                if terms == 0 and organism is not None:
+                    pipe.delete(self.record_key(record_id), self.terms_key(record_id))
+                    pipe.zrem(self.length_key, record_id)
+                    pipe.srem(self.organism_key(organism.decode()), record_id)
+                    deleted += 1
+            pipe.execute()
+        return deleted
+
+    def get_many(self, record_ids: list[str]) -> list[dict | None]:
+        """
+        Given record IDs, returns their summaries (None for IDs that are not stored), reading
+        them all in one pipelined round trip.
+        """
+        pipe = self.rd.pipeline(transaction=False)
+        for record_id in record_ids:
+            pipe.hgetall(self.record_key(record_id))
+        return [to_summary(record_id, fields) for record_id, fields in zip(record_ids, pipe.execute())]
+
+    def get(self, record_id: str) -> dict | None:
+        """
+        Given a record ID, returns its summary, or None if it is not stored.
+        """
+        return self.get_many([record_id])[0]
+
+    def iter_records(self, batch_size: int = BATCH_SIZE) -> Iterator[dict]:
+        """
+        Yields every stored record summary in order of sequence length, walking the length
+        index batch_size IDs at a time, so the keyspace is never scanned.
+
+        Args:
+            batch_size: number of records read per round trip
+
+        Returns:
+            Iterator[dict]: the record summaries
+        """
+        start = 0
+        while record_ids := self.rd.zrange(self.length_key, start, start + batch_size - 1):
+            for summary in self.get_many([record_id.decode() for record_id in record_ids]):
+                if summary is not None:
+                    yield summary
+            start += batch_size
+
+    def query(self, min_length: int | None = None, max_length: int | None = None, term: str | None = None,
+              organism: str | None = None, start: int = 0, count: int | None = None) -> list[str]:
+        """
+        Given an optional sequence length range, search term and organism, returns the IDs of
+        the stored records that match all of them, in order of sequence length (then ID),
+        from the indexes alone. With a term or organism the length index is intersected with
+        their sets on the server (ZINTERSTORE) into a short-lived key that is read and deleted
+        in the same transaction.
+
+        Args:
+            min_length: shortest sequence length to return (default: no limit)
+            max_length: longest sequence length to return (default: no limit)
+            term: only records stored for this search term
+            organism: only records of this organism
+            start: number of matching IDs to skip, for paging
+            count: largest number of IDs to return (default: all)
+
+        Returns:
+            list[str]: IDs of the matching records
+        """
+        low = '-inf' if min_length is None else min_length
+        high = '+inf' if max_length is None else max_length
+        limit = {} if start == 0 and count is None else {'start': start, 'num': -1 if count is None else count}
+        sets = ([] if term is None else [self.term_key(term)]) + ([] if organism is None else [self.organism_key(organism)])
+
+        if not sets:
+            record_ids = self.rd.zrangebyscore(self.length_key, low, high, **limit)
+        else:
+            # a set member scores 1, so a weight of 0 keeps the length as the score
+            temp_key = f'{self.prefix}:tmp:{uuid.uuid4().hex}'
+            pipe = self.rd.pipeline(transaction=True)
+            pipe.zinterstore(temp_key, {self.length_key: 1, **{key: 0 for key in sets}})
+            pipe.expire(temp_key, TEMP_KEY_SECONDS)
+            pipe.zrangebyscore(temp_key, low, high, **limit)
+            pipe.delete(temp_key)
+            record_ids = pipe.execute()[2]
+        return [record_id.decode() for record_id in record_ids]
+
+# -------------------------
+# Functions
+# -------------------------
+def make_redis_client(host: str = REDIS_HOST, port: int = REDIS_PORT, db: int = REDIS_DB) -> redis.Redis:
+    """
+    Given a Redis host, port and database number, returns a client backed by one connection
+    pool, to be shared by every function that talks to that database.
+
+    Args:
+        host: host name of the Redis server
+        port: port of the Redis server
+        db: number of the Redis database
+
+    Returns:
+        redis.Redis: client using a shared connection pool
+    """
+    pool = redis.ConnectionPool(host=host, port=port, db=db)
+    return redis.Redis(connection_pool=pool)
+
+def make_async_redis_client(host: str = REDIS_HOST, port: int = REDIS_PORT, db: int = REDIS_DB) -> redis.asyncio.Redis:
+    """
+    Given a Redis host, port and database number, returns an asyncio client backed by its
+    own connection pool, which aclose() releases. It must be used (and closed) inside a
+    single event loop.
+
+    Args:
+        host: host name of the Redis server
+        port: port of the Redis server
+        db: number of the Redis database
+
+    Returns:
+        redis.asyncio.Redis: asyncio client using a shared connection pool
+    """
+    return redis.asyncio.Redis(host=host, port=port, db=db)
+
+def summarize_record(record: object) -> dict:
+    """
+    Given a SeqRecord, returns the summary of it that is stored in Redis.
+    """
+    return {'ID': record.id, 'Name': record.name, 'Description': record.description,
+            'Organism': record.annotations.get('organism', ''), 'Sequence': str(record.seq)}
+
+def batched(items: Iterable, batch_size: int) -> Iterator[list]:
+    """
+    Given an iterable and a batch size, yields lists of up to batch_size items.
+    """
+    if batch_size < 1:
+        raise ValueError(f"The batch size must be at least 1, not {batch_size}")
+    items = iter(items)
+    while batch := list(itertools.islice(items, batch_size)):
+        yield batch
+
+def to_summary(record_id: str, fields: dict) -> dict | None:
+    """
+    Given a record ID and the fields of its hash (as returned by HGETALL), returns the
+    record summary, or None if the hash is empty (the record is not stored).
+    """
+    if not fields:
+        return None
+    return {'ID': record_id, 'Name': fields[b'name'].decode(), 'Description': fields[b'description'].decode(),
+            'Organism': fields[b'organism'].decode(), 'Sequence': zlib.decompress(fields[b'sequence']).decode()}
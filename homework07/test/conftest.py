@@ -0,0 +1,19 @@
+import shutil
+import sys
+from pathlib import Path
+import pytest
+
+# make the homework07 library modules (e.g. redis_store) and benchmark helpers importable from the tests
+HOMEWORK_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(HOMEWORK_DIR))
+sys.path.insert(0, str(HOMEWORK_DIR / 'benchmarks'))
+
+from bench_utils import local_redis_server
+
+@pytest.fixture
+def redis_port():
+    # tests that need Redis run against a throwaway local redis-server
+    if shutil.which('redis-server') is None:
+        pytest.skip('redis-server is not installed')
+    with local_redis_server() as port:
+        yield port
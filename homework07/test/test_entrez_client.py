@@ -0,0 +1,113 @@
+import io
+import urllib.error
+import pytest
+from Bio import SeqIO
+from bench_utils import StandInEutils, make_synthetic_genbank
+import entrez_cache
+from entrez_cache import EntrezCache
+from entrez_client import EntrezClient, EntrezError, parse_history_result
+
+def fetched_ids(pages):
+    return [record.id for page in pages for record in SeqIO.parse(io.StringIO(page), 'gb')]
+
+def test_history_pagination_fetches_every_record():
+    records = make_synthetic_genbank(1234, length=30)
+    with StandInEutils(records) as server:
+        client = EntrezClient('test@example.com', base_url=server.url, rate=100)
+        result = client.esearch('protein', 'anything')
+        assert result.count == 1234
+
+        assert fetched_ids(client.efetch_pages('protein', result, batch_size=100, workers=3)) == list(records)
+        assert fetched_ids(client.efetch_pages('protein', result, batch_size=100, max_records=250)) == list(records)[:250]
+
+        # pages are fetched from the history server, never by listing IDs
+        efetches = [params for utility, params, _ in server.requests if utility == 'efetch']
+        assert len(efetches) == 13 + 3
+        assert all(params['WebEnv'] == result.webenv and 'id' not in params for params in efetches)
+
+        # a long ID list is posted to the history server and fetched the same way
+        posted = client.epost('protein', list(records)[::-1])
+        assert fetched_ids(client.efetch_pages('protein', posted, batch_size=500)) == list(records)[::-1]
+
+def test_retries_with_backoff_under_rate_limit():
+    records = make_synthetic_genbank(300, length=30)
+    with StandInEutils(records, failures=2) as server:
+        client = EntrezClient('test@example.com', base_url=server.url, rate=20, backoff=0.01)
+        result = client.esearch('protein', 'anything')
+        assert fetched_ids(client.efetch_pages('protein', result, batch_size=50, workers=4)) == list(records)
+        assert client.retries == 2
+
+        # requests from all threads stay at least 1 / rate seconds apart
+        times = sorted(t for _, _, t in server.requests)
+        assert min(b - a for a, b in zip(times, times[1:])) >= 1 / 20 * 0.9
+
+    with StandInEutils(records, failures=10) as server:
+        client = EntrezClient('test@example.com', base_url=server.url, rate=100, max_tries=2, backoff=0.01)
+        with pytest.raises(urllib.error.HTTPError):
+            list(client.efetch_pages('protein', client.esearch('protein', 'anything')))
+
+def test_errors_are_reported_without_retrying():
+    with StandInEutils({}) as server:
+        client = EntrezClient('test@example.com', base_url=server.url, rate=100, backoff=0.01)
+        with pytest.raises(urllib.error.HTTPError):
+            client.request('nosuch', {})
+        assert client.retries == 0
+
+    with pytest.raises(EntrezError, match='Invalid query'):
+        parse_history_result(b'<eSearchResult><ERROR>Invalid query</ERROR></eSearchResult>')
+
+def test_cache_replays_responses_offline(tmp_path):
+    records = make_synthetic_genbank(500, length=30)
+    cache = EntrezCache(str(tmp_path / 'entrez.sqlite'))
+
+    def run(url, **client_args):
+        client = EntrezClient('test@example.com', base_url=url, rate=100, cache=cache, **client_args)
+        return fetched_ids(client.efetch_pages('protein', client.esearch('protein', 'term'), batch_size=100))
+
+    with StandInEutils(records) as server:
+        assert run(server.url) == list(records)
+        assert cache.hits == 0 and len(server.requests) == 6
+
+        # a re-run is answered from the cache, even though its WebEnv would have changed
+        assert run(server.url) == list(records)
+        assert cache.hits == 6 and len(server.requests) == 6
+
+        # pages of another size are not cached, so the cached search is run again for a fresh WebEnv
+        client = EntrezClient('test@example.com', base_url=server.url, rate=100, cache=cache)
+        assert fetched_ids(client.efetch_pages('protein', client.esearch('protein', 'term'), batch_size=250)) == list(records)
+        assert [utility for utility, _, _ in server.requests[6:]] == ['esearch', 'efetch', 'efetch']
+
+    # offline, the cache answers with the server gone, and anything not cached is an error
+    assert run(server.url, offline=True) == list(records)
+    with pytest.raises(EntrezError):
+        EntrezClient('test@example.com', base_url=server.url, cache=cache, offline=True).esearch('protein', 'other term')
+
+    # entries older than the TTL are downloaded again
+    cache.ttl = 0
+    with StandInEutils(records) as server:
+        assert run(server.url) == list(records)
+        assert len(server.requests) == 6
+    cache.close()
+
+def test_cache_trims_expired_then_least_recently_used(tmp_path, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(entrez_cache.time, 'time', lambda: clock[0])
+    cache = EntrezCache(str(tmp_path / 'entrez.sqlite'), ttl=100, max_bytes=1000)
+    keys = [cache.key('efetch', {'page': i}) for i in range(5)]
+
+    # five 164 byte responses, the first written long enough ago to have expired
+    for i, key in enumerate(keys):
+        cache.put(key, b'x' * 100)
+        clock[0] += 150 if i == 0 else 1
+    assert cache.get(keys[1]) is not None
+    assert cache.size == 5 * 164
+
+    # the sixth goes past the limit, so the expired response and then the least recently used go
+    cache.put(cache.key('efetch', {'page': 5}), b'x' * 300)
+    assert cache.size <= 900
+    assert [cache.contains(key) for key in keys] == [False, True, False, True, True]
+    cache.close()
+
+    # the size is read back when the cache is opened again
+    with EntrezCache(str(tmp_path / 'entrez.sqlite')) as reopened:
+        assert reopened.size == cache.size
@@ -0,0 +1,56 @@
+from bench_utils import StandInEutils, make_synthetic_genbank
+from entrez_client import EntrezClient
+from genbank_sync import plan_sync, sync_term
+from redis_store import RecordStore, make_redis_client
+
+def new_version(records, record_id, version):
+    # the stand-in serves the record's text, so the new version goes into the text too
+    updated_id = f'{record_id.rsplit(".", 1)[0]}.{version}'
+    records[updated_id] = records.pop(record_id).replace(record_id, updated_id)
+    return updated_id
+
+def test_plan_sorts_records_by_accession_version():
+    plan = plan_sync(['A.1', 'B.2', 'C.1', 'C.1', 'E.1'], {'A.1', 'B.1', 'D.1'})
+    assert plan.added == ['C.1', 'E.1']
+    assert plan.updated == ['B.2']
+    assert plan.replaced == ['B.1']
+    assert plan.unchanged == ['A.1']
+    assert plan.removed == ['D.1']
+
+def test_sync_fetches_only_new_and_changed_records(redis_port):
+    records = make_synthetic_genbank(500, length=30)
+    ids = list(records)
+    searches = {'term': ids[:400], 'other term': ids[350:]}
+    store = RecordStore(make_redis_client(port=redis_port))
+
+    with StandInEutils(records, searches) as server:
+        client = EntrezClient('test@example.com', base_url=server.url, rate=200)
+        assert client.esearch_ids('protein', 'term', batch_size=150) == ids[:400]
+
+        report = sync_term(client, store, 'protein', 'term', fetch_batch_size=100)
+        assert (report.added, report.updated, report.unchanged, report.removed, report.fetched) == (400, 0, 0, 0, 400)
+
+        # a re-run with nothing new is one search and no fetches
+        server.requests.clear()
+        report = sync_term(client, store, 'protein', 'term')
+        assert (report.added, report.unchanged, report.fetched) == (0, 400, 0)
+        assert [utility for utility, _, _ in server.requests] == ['esearch']
+
+        # records already stored for one term are indexed under another without fetching them again
+        report = sync_term(client, store, 'protein', 'other term')
+        assert (report.added, report.fetched) == (150, 100)
+
+        # one record gets a new version, three stop matching and one starts matching
+        updated = new_version(records, ids[0], 2)
+        searches['term'] = [updated] + ids[2:398] + [ids[450]]
+        report = sync_term(client, store, 'protein', 'term')
+        assert (report.added, report.updated, report.unchanged, report.removed, report.fetched) == (1, 1, 396, 0, 1)
+        assert store.term_members('term') == set(searches['term']) | {ids[1], ids[398], ids[399]}
+        assert store.get(ids[0]) is None and store.get(updated)['ID'] == updated
+
+        # pruning deletes records no other term refers to, and keeps the rest
+        report = sync_term(client, store, 'protein', 'term', prune=True)
+        assert (report.removed, report.fetched) == (3, 0)
+        assert store.term_members('term') == set(searches['term'])
+        assert store.get(ids[1]) is None and ids[1] not in store.query()
+        assert store.get(ids[398]) is not None and store.get(ids[399]) is not None
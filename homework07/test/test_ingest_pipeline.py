@@ -0,0 +1,60 @@
+import asyncio
+import concurrent.futures
+import functools
+import io
+from Bio import SeqIO
+from bench_utils import StandInEutils, make_synthetic_genbank
+from entrez_client import EntrezClient
+from ingest_pipeline import run_ingest
+from redis_store import RecordStore, make_async_redis_client, make_redis_client, summarize_record
+
+def sequential_summaries(client, result):
+    return [summarize_record(record) for page in client.efetch_pages('protein', result, batch_size=40)
+            for record in SeqIO.parse(io.StringIO(page), 'gb')]
+
+def test_pipeline_stores_what_the_sequential_workflow_stores():
+    records = make_synthetic_genbank(700, length=30)
+    with StandInEutils(records) as server:
+        client = EntrezClient('test@example.com', base_url=server.url, rate=200)
+        result = client.esearch('protein', 'term')
+        expected = sequential_summaries(client, result)
+
+        # a slow store backs the pipeline up, but no queue grows past its size
+        stored = []
+        async def store(summaries):
+            await asyncio.sleep(0.01)
+            stored.extend(summaries)
+            return len(summaries)
+
+        for parse_executor in [None, concurrent.futures.ProcessPoolExecutor(max_workers=2)]:
+            stored.clear()
+            report = asyncio.run(run_ingest(client, 'protein', result, store, batch_size=40, queue_size=2, parse_executor=parse_executor))
+            assert sorted(stored, key=lambda s: s['ID']) == expected
+            assert [stage.records for stage in report.stages] == [700, 700, 700]
+            assert all(stage.max_queue_depth <= 2 for stage in report.stages[1:])
+            if parse_executor is not None:
+                parse_executor.shutdown()
+
+def test_pipeline_matches_sequential_workflow_in_redis(redis_port):
+    records = make_synthetic_genbank(700, length=30)
+    rd = make_redis_client(port=redis_port)
+    store = RecordStore(rd)
+    with StandInEutils(records) as server:
+        client = EntrezClient('test@example.com', base_url=server.url, rate=200)
+        result = client.esearch('protein', 'term')
+        store.save(sequential_summaries(client, result), 'term')
+        expected = {key: rd.dump(key) for key in rd.scan_iter()}
+        rd.flushdb()
+
+        async def ingest():
+            rd_async = make_async_redis_client(port=redis_port)
+            try:
+                store_async = functools.partial(RecordStore(rd_async).save_async, term='term', batch_size=100)
+                return await run_ingest(client, 'protein', result, store_async, batch_size=40)
+            finally:
+                await rd_async.aclose()
+
+        asyncio.run(ingest())
+        assert {key: rd.dump(key) for key in rd.scan_iter()}.keys() == expected.keys()
+        assert list(store.iter_records()) == [store.get(record_id) for record_id in store.query()]
+        assert sorted(store.iter_records(), key=lambda s: s['ID']) == sorted(sequential_summaries(client, result), key=lambda s: s['ID'])
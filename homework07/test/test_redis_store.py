@@ -0,0 +1,58 @@
+from bench_utils import make_synthetic_summaries
+from redis_store import RecordStore, make_redis_client
+
+def by_length(summaries):
+    return [s['ID'] for s in sorted(summaries, key=lambda s: (len(s['Sequence']), s['ID']))]
+
+def test_batched_writes_and_reads_round_trip(redis_port):
+    rd = make_redis_client(port=redis_port)
+    store = RecordStore(rd, prefix='test')
+    summaries = make_synthetic_summaries(2500, length=400)
+
+    # batch sizes that do and do not divide the number of records
+    for batch_size in [1, 7, 1000]:
+        rd.flushdb()
+        assert store.save(summaries, 'term', batch_size) == len(summaries)
+        assert list(store.iter_records(batch_size)) == [store.get(i) for i in by_length(summaries)]
+        assert sorted(store.iter_records(batch_size), key=lambda s: s['ID']) == summaries
+
+    # every key is under the prefix, and sequences are stored compressed
+    assert all(key.startswith(b'test:') for key in rd.scan_iter())
+    assert len(rd.hget(store.record_key(summaries[0]['ID']), 'sequence')) < len(summaries[0]['Sequence'])
+
+def test_queries_are_answered_from_the_indexes(redis_port):
+    rd = make_redis_client(port=redis_port)
+    store = RecordStore(rd)
+    summaries = make_synthetic_summaries(3000, length=400)
+    store.save(summaries[:2000], 'first term')
+    store.save(summaries[1000:], 'second term')
+
+    def expected(records, low=0, high=10 ** 9, organism=None):
+        return by_length(s for s in records if low <= len(s['Sequence']) <= high and organism in (None, s['Organism']))
+
+    assert store.query(300, 500) == expected(summaries, 300, 500)
+    assert store.query(300, 500, term='first term') == expected(summaries[:2000], 300, 500)
+    assert store.query(term='second term', organism='Oryza sativa', start=10, count=25) == expected(summaries[1000:], organism='Oryza sativa')[10:35]
+    assert store.query(max_length=250, organism='Zea mays') == expected(summaries, high=250, organism='Zea mays')
+    assert store.query(term='no such term') == []
+    assert not list(rd.scan_iter('genbank:tmp:*'))
+
+    # a record whose organism changes moves to the other organism index
+    changed = dict(summaries[0], Organism='Zea mays')
+    store.save([changed])
+    assert changed['ID'] in store.query(organism='Zea mays')
+    assert changed['ID'] not in store.query(organism=summaries[0]['Organism'])
+    assert store.get(changed['ID']) == changed
+
+def test_save_consumes_a_stream_one_batch_at_a_time(redis_port):
+    rd = make_redis_client(port=redis_port)
+    store = RecordStore(rd)
+    summaries = make_synthetic_summaries(1000, length=50)
+
+    # no more than one batch is read from the stream ahead of what is already in Redis
+    def stream():
+        for i, summary in enumerate(summaries):
+            assert i - rd.zcard(store.length_key) <= 64
+            yield summary
+
+    assert store.save(stream(), batch_size=64) == len(summaries)
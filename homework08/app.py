@@ -1,9 +1,136 @@
-from dash import Dash, html
+import logging
+import os
+import socket
+import redis
+from dash import Dash, Input, Output, dash_table, dcc, html
+from flask import request
+from data_layer import PAGE_SIZE, DataLayer, make_redis_client, timed
 
-app = Dash()
+# -------------------------
+# Constants (configuration)
+# -------------------------
+# gzip responses (needs flask-compress); set DASH_COMPRESS=false to turn it off
+COMPRESS = os.environ.get('DASH_COMPRESS', 'true').lower() == 'true'
+
+# assets are linked with their modification time and component files with a fingerprint, so a
+# changed file gets a new URL and browsers can keep the old one for a year
+ASSET_MAX_AGE = 31536000
+
+# -------------------------
+# Logging setup
+# -------------------------
+format_str = (
+    f'[%(asctime)s {socket.gethostname()}] '
+    '%(filename)s:%(funcName)s:%(lineno)s - %(levelname)s: %(message)s'
+)
+logging.basicConfig(level=os.environ.get('LOGLEVEL', 'INFO'), format=format_str)
+
+# -------------------------
+# App and layout
+# -------------------------
+data = DataLayer(make_redis_client())
+logged = timed(data.stats, logging.info)
+
+app = Dash(compress=COMPRESS)
 server = app.server
 
-app.layout = [html.Div(children='Hello, World!')]
+@server.after_request
+def cache_static_files(response):
+    versioned_asset = request.path.startswith(app.get_asset_url('')) and 'm' in request.args
+    if response.status_code == 200 and (versioned_asset or response.cache_control.max_age == ASSET_MAX_AGE):
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = ASSET_MAX_AGE
+        response.cache_control.immutable = True
+    return response
+
+app.layout = [
+    dcc.Location(id='url'),
+    html.H1('GenBank records and structure summaries'),
+    html.Div(id='overview'),
+    dcc.Graph(id='length-figure'),
+    dcc.Graph(id='organism-figure'),
+    html.H2('GenBank records'),
+    html.P('Filter by length (e.g. >= 300) or organism, and sort by length. Click a row to show its sequence.'),
+    dash_table.DataTable(
+        id='records',
+        columns=[{'name': name, 'id': column, 'type': 'numeric' if column == 'length' else 'text'}
+                 for name, column in [('ID', 'id'), ('Name', 'name'), ('Description', 'description'), ('Organism', 'organism'), ('Length', 'length')]],
+        page_action='custom',
+        page_current=0,
+        page_size=PAGE_SIZE,
+        sort_action='custom',
+        sort_mode='single',
+        sort_by=[],
+        filter_action='custom',
+        filter_query=''
+    ),
+    html.Div(id='records-message'),
+    html.Pre(id='sequence'),
+    html.H2('Structure summaries'),
+    dash_table.DataTable(id='structures', page_size=20, sort_action='native')
+]
+
+# -------------------------
+# Callbacks
+# -------------------------
+@app.callback(Output('overview', 'children'), Input('url', 'pathname'))
+@logged
+def update_overview(pathname):
+    try:
+        overview = data.genbank_overview()
+    except redis.exceptions.ConnectionError:
+        logging.error("Could not connect to Redis database")
+        return 'Could not connect to the Redis database'
+    return f"{overview['records']} GenBank records of {len(overview['organisms'])} organisms"
+
+@app.callback(Output('length-figure', 'figure'), Output('organism-figure', 'figure'), Input('url', 'pathname'))
+@logged
+def update_figures(pathname):
+    try:
+        return data.length_figure(), data.organism_figure()
+    except redis.exceptions.ConnectionError:
+        logging.error("Could not connect to Redis database")
+        return {}, {}
+
+@app.callback(Output('records', 'data'), Output('records', 'page_count'), Output('records-message', 'children'),
+              Input('records', 'page_current'), Input('records', 'page_size'), Input('records', 'sort_by'), Input('records', 'filter_query'))
+@logged
+def update_records(page_current, page_size, sort_by, filter_query):
+    # the length index is the only order the records are kept in, so only length sorts
+    descending = any(sort['column_id'] == 'length' and sort['direction'] == 'desc' for sort in sort_by or [])
+    try:
+        rows, total = data.record_page(page_current or 0, page_size, descending, filter_query or '')
+    except ValueError as e:
+        return [], 0, str(e)
+    except redis.exceptions.ConnectionError:
+        logging.error("Could not connect to Redis database")
+        return [], 0, 'Could not connect to the Redis database'
+    return rows, max(1, -(-total // page_size)), f'{total} matching records'
+
+@app.callback(Output('sequence', 'children'), Input('records', 'active_cell'))
+@logged
+def show_sequence(active_cell):
+    # sequences are only read from Redis for the row that was clicked
+    if not active_cell or active_cell.get('row_id') is None:
+        return ''
+    try:
+        sequence = data.sequence(active_cell['row_id'])
+    except redis.exceptions.ConnectionError:
+        logging.error("Could not connect to Redis database")
+        return 'Could not connect to the Redis database'
+    return f">{active_cell['row_id']}\n{sequence}" if sequence is not None else ''
+
+@app.callback(Output('structures', 'data'), Input('url', 'pathname'))
+@logged
+def update_structures(pathname):
+    try:
+        return data.structure_rows()
+    except redis.exceptions.ConnectionError:
+        logging.error("Could not connect to Redis database")
+        return []
 
+# development server; in production the app is served by gunicorn (see gunicorn.conf.py),
+# and the debugger is only turned on with DASH_DEBUG=true
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=8050, debug=True)
\ No newline at end of file
+    app.run(host='0.0.0.0', port=8050)
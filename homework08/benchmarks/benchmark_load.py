@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+import argparse
+import contextlib
+import logging
+import os
+import socket
+import subprocess
+import sys
+import time
+from typing import Iterator
+import requests
+from load_utils import check_thresholds, page_targets, run_load, warm_up
+
+# -------------------------
+# Constants (configuration)
+# -------------------------
+HOMEWORK_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLIENTS = 8
+SECONDS = 10.0
+NUM_RECORDS = 10000
+WEB_WORKERS = 2
+START_SECONDS = 30.0
+
+# regression thresholds; a run that crosses one fails
+MAX_P95_MS = 500.0
+MAX_P99_MS = 1000.0
+MAX_ERROR_RATE = 0.0
+
+# -------------------------
+# Logging and Command Line Inputs setup
+# -------------------------
+parser = argparse.ArgumentParser()
+parser.add_argument(
+    '-l', '--loglevel',
+    type=str,
+    required=False,
+    choices=['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'],
+    default='WARNING',
+    help='set log level to DEBUG, INFO, WARNING, ERROR, or CRITICAL (default: WARNING)'
+)
+parser.add_argument(
+    '-u', '--url',
+    type=str,
+    required=False,
+    default=None,
+    help='The URL of a running dashboard to load test (default: start one locally with gunicorn and a throwaway Redis)'
+)
+parser.add_argument(
+    '-c', '--clients',
+    type=int,
+    required=False,
+    default=CLIENTS,
+    help=f'The number of concurrent clients, each loading the page over and over (default: {CLIENTS})'
+)
+parser.add_argument(
+    '-d', '--duration',
+    type=float,
+    required=False,
+    default=SECONDS,
+    help=f'The number of seconds the load is applied for (default: {SECONDS})'
+)
+parser.add_argument(
+    '-n', '--numRecords',
+    type=int,
+    required=False,
+    default=NUM_RECORDS,
+    help=f'The number of synthetic GenBank records stored for a locally started dashboard (default: {NUM_RECORDS})'
+)
+parser.add_argument(
+    '-w', '--webWorkers',
+    type=int,
+    required=False,
+    default=WEB_WORKERS,
+    help=f'The number of gunicorn workers of a locally started dashboard (default: {WEB_WORKERS})'
+)
+parser.add_argument(
+    '--maxP95Ms',
+    type=float,
+    required=False,
+    default=MAX_P95_MS,
+    help=f'Fail if the p95 latency of any kind of request is above this many ms (default: {MAX_P95_MS})'
+)
+parser.add_argument(
+    '--maxP99Ms',
+    type=float,
+    required=False,
+    default=MAX_P99_MS,
+    help=f'Fail if the p99 latency of any kind of request is above this many ms (default: {MAX_P99_MS})'
+)
+parser.add_argument(
+    '--minThroughput',
+    type=float,
+    required=False,
+    default=None,
+    help='Fail if fewer requests per second than this are served (default: no limit)'
+)
+parser.add_argument(
+    '--maxErrorRate',
+    type=float,
+    required=False,
+    default=MAX_ERROR_RATE,
+    help=f'Fail if a larger fraction of requests than this fails (default: {MAX_ERROR_RATE})'
+)
+args = parser.parse_args()
+
+format_str = (
+    f'[%(asctime)s {socket.gethostname()}] '
+    '%(filename)s:%(funcName)s:%(lineno)s - %(levelname)s: %(message)s'
+)
+logging.basicConfig(level=args.loglevel, format=format_str)
+
+# -------------------------
+# Functions
+# -------------------------
+@contextlib.contextmanager
+def local_dashboard(num_records: int, web_workers: int) -> Iterator[str]:
+    """
+    Given a number of records and gunicorn workers, starts a throwaway redis-server holding
+    that many synthetic GenBank records and the dashboard served by gunicorn on free ports,
+    and stops both on exit.
+
+    Returns:
+        Iterator[str]: the URL of the dashboard
+    """
+    # the records are written with homework07's RecordStore, which is only needed here
+    sys.path.insert(0, os.path.join(os.path.dirname(HOMEWORK_DIR), 'homework07', 'benchmarks'))
+    from bench_utils import free_port, local_redis_server, make_synthetic_summaries
+    from redis_store import RecordStore, make_redis_client
+
+    with local_redis_server() as redis_port:
+        RecordStore(make_redis_client(port=redis_port)).save(make_synthetic_summaries(num_records))
+        port = free_port()
+        env = dict(os.environ, REDIS_PORT=str(redis_port), PORT=str(port), WEB_WORKERS=str(web_workers), LOGLEVEL='WARNING')
+        process = subprocess.Popen([sys.executable, '-m', 'gunicorn', 'app:server'], cwd=HOMEWORK_DIR, env=env)
+        try:
+            url = f'http://127.0.0.1:{port}/'
+            deadline = time.monotonic() + START_SECONDS
+            while True:
+                try:
+                    requests.get(url, timeout=1).raise_for_status()
+                    break
+                except requests.RequestException:
+                    if time.monotonic() > deadline or process.poll() is not None:
+                        raise RuntimeError("The dashboard did not start")
+                    time.sleep(0.2)
+            yield url
+        finally:
+            process.terminate()
+            process.wait()
+
+def main():
+
+    try:
+        with contextlib.nullcontext(args.url) if args.url else local_dashboard(args.numRecords, args.webWorkers) as url:
+            targets = page_targets(url)
+            logging.info(f"A page load makes {len(targets)} requests")
+
+            # one page load first, so the run measures repeat loads with warm caches
+            failed = sum(not ok for _, _, ok in warm_up(url, targets))
+            if failed:
+                logging.warning(f"{failed} of {len(targets)} warm-up requests failed")
+            report = run_load(url, targets, args.clients, args.duration)
+    except FileNotFoundError as e:
+        logging.error(f"{e}. Install Redis, or load test a running dashboard with --url. Exiting")
+        sys.exit(1)
+    except (requests.RequestException, RuntimeError) as e:
+        logging.error(f"Could not load the dashboard: {e}. Exiting")
+        sys.exit(1)
+
+    print(f"{args.clients} clients for {report.seconds:.1f} s")
+    for line in report.lines():
+        print(line)
+
+    failures = check_thresholds(report, args.maxP95Ms, args.maxP99Ms, args.minThroughput, args.maxErrorRate)
+    for failure in failures:
+        logging.error(f"Regression threshold crossed: {failure}")
+    if failures:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+import argparse
+import logging
+import os
+import socket
+import statistics
+import sys
+import time
+from typing import Iterator
+
+# the records are written with homework07's RecordStore, in a throwaway homework07 redis-server
+HOMEWORK_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, HOMEWORK_DIR)
+sys.path.insert(0, os.path.join(os.path.dirname(HOMEWORK_DIR), 'homework07', 'benchmarks'))
+
+from bench_utils import local_redis_server, make_synthetic_summaries
+from data_layer import DataLayer, make_redis_client
+from redis_store import RecordStore
+
+# -------------------------
+# Constants (configuration)
+# -------------------------
+RECORD_COUNTS = '1000,10000,100000,1000000'
+LENGTH = 50
+PAGE_SIZE = 25
+REPEATS = 50
+
+# -------------------------
+# Logging and Command Line Inputs setup
+# -------------------------
+parser = argparse.ArgumentParser()
+parser.add_argument(
+    '-l', '--loglevel',
+    type=str,
+    required=False,
+    choices=['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'],
+    default='WARNING',
+    help='set log level to DEBUG, INFO, WARNING, ERROR, or CRITICAL (default: WARNING)'
+)
+parser.add_argument(
+    '-n', '--recordCounts',
+    type=str,
+    required=False,
+    default=RECORD_COUNTS,
+    help=f'Comma separated, increasing numbers of stored records to time pages at (default: {RECORD_COUNTS})'
+)
+parser.add_argument(
+    '-r', '--repeats',
+    type=int,
+    required=False,
+    default=REPEATS,
+    help=f'The number of times each page is fetched; the median is reported (default: {REPEATS})'
+)
+args = parser.parse_args()
+
+format_str = (
+    f'[%(asctime)s {socket.gethostname()}] '
+    '%(filename)s:%(funcName)s:%(lineno)s - %(levelname)s: %(message)s'
+)
+logging.basicConfig(level=args.loglevel, format=format_str)
+
+# -------------------------
+# Functions
+# -------------------------
+def synthetic_records(start: int, stop: int) -> Iterator[dict]:
+    """
+    Given a range of record numbers, yields synthetic record summaries with those numbers,
+    reusing a small set of summaries so a million records need not be held at once.
+    """
+    templates = make_synthetic_summaries(1000, LENGTH)
+    for i in range(start, stop):
+        yield dict(templates[i % len(templates)], ID=f'SYN{i:08d}.1', Name=f'SYN{i:08d}')
+
+def median_ms(data: DataLayer, page: int, descending: bool = False, filter_query: str = '') -> float:
+    """
+    Given a page of the record table, returns the median time in ms of fetching it.
+    """
+    times = []
+    for _ in range(args.repeats):
+        start = time.perf_counter()
+        data.record_page(page, PAGE_SIZE, descending, filter_query)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+def main():
+
+    counts = [int(n) for n in args.recordCounts.split(',')]
+    try:
+        with local_redis_server() as port:
+            rd = make_redis_client(port=port)
+            store = RecordStore(rd)
+            data = DataLayer(rd)
+            print(f"{'records':>8} {'first':>8} {'middle':>8} {'last':>8} {'desc':>8} {'length':>8} {'organism':>8}   (median ms per page)")
+            stored = 0
+            for n in counts:
+                store.save(synthetic_records(stored, n))
+                stored = n
+                data.invalidate()
+                last = (n - 1) // PAGE_SIZE
+                row = [
+                    median_ms(data, 0),
+                    median_ms(data, last // 2),
+                    median_ms(data, last),
+                    median_ms(data, last // 2, descending=True),
+                    median_ms(data, 10, filter_query=f'{{length}} >= {LENGTH} && {{length}} < {LENGTH * 5 // 4}'),
+                    median_ms(data, 10, filter_query='{organism} = Zea mays')
+                ]
+                print(f"{n:>8} " + ' '.join(f'{ms:>8.2f}' for ms in row))
+    except FileNotFoundError as e:
+        logging.error(f"{e}. Install Redis to run this benchmark. Exiting")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,225 @@
+"""
+Helpers of the dashboard load test: the requests a browser makes to load the page (the page,
+its static files and one request per callback the page fires), clients that replay them
+concurrently, and the throughput and latency percentiles of what they measured.
+
+Only the standard library and requests are needed, so the load test can be pointed at a
+running service from any machine.
+"""
+import math
+import re
+import threading
+import time
+import requests
+
+# -------------------------
+# Constants (configuration)
+# -------------------------
+TIMEOUT_SECONDS = 30.0
+KINDS = ['page', 'asset', 'callback']
+
+# values the page's callback inputs have when it is first loaded; other inputs are None
+INPUT_VALUES = {
+    'url.pathname': '/',
+    'records.page_current': 0,
+    'records.page_size': 25,
+    'records.sort_by': [],
+    'records.filter_query': ''
+}
+
+# -------------------------
+# Classes
+# -------------------------
+class Target:
+    """
+    One request of a page load: its kind ('page', 'asset' or 'callback'), method, path and
+    JSON body.
+    """
+    def __init__(self, kind: str, path: str, body: dict | None = None):
+        self.kind = kind
+        self.path = path
+        self.body = body
+        self.name = body['output'] if body is not None else path
+
+class LatencyStats:
+    """
+    Number of requests and errors of a group of requests, their throughput over the run and
+    their latency percentiles in ms.
+    """
+    def __init__(self, latencies: list[float], errors: int, seconds: float):
+        ordered = sorted(latencies)
+        self.requests = len(ordered)
+        self.errors = errors
+        self.throughput = self.requests / seconds if seconds else 0.0
+        self.p50 = percentile(ordered, 50) * 1000
+        self.p95 = percentile(ordered, 95) * 1000
+        self.p99 = percentile(ordered, 99) * 1000
+        self.max = (ordered[-1] if ordered else 0.0) * 1000
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.requests if self.requests else 0.0
+
+    def line(self, name: str) -> str:
+        return (f"{name:<9} {self.requests:>9} {self.errors:>7} {self.throughput:>9.1f} "
+                f"{self.p50:>8.1f} {self.p95:>8.1f} {self.p99:>8.1f} {self.max:>8.1f}")
+
+class LoadReport:
+    """
+    Latency stats of a load test run, for all requests and for each kind of request.
+    """
+    header = f"{'requests':<9} {'count':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}"
+
+    def __init__(self, results: list[tuple[str, float, bool]], seconds: float, clients: int):
+        self.seconds = seconds
+        self.clients = clients
+        self.total = stats_of(results, seconds)
+        self.kinds = {kind: stats_of([r for r in results if r[0] == kind], seconds) for kind in KINDS}
+
+    def lines(self) -> list[str]:
+        return [self.header] + [stats.line(kind) for kind, stats in self.kinds.items() if stats.requests] + [self.total.line('all')]
+
+# -------------------------
+# Functions
+# -------------------------
+def percentile(ordered: list[float], q: float) -> float:
+    """
+    Given sorted values and a percentage, returns the nearest-rank percentile (0 for no values).
+    """
+    if not ordered:
+        return 0.0
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+def stats_of(results: list[tuple[str, float, bool]], seconds: float) -> LatencyStats:
+    return LatencyStats([latency for _, latency, _ in results], sum(not ok for _, _, ok in results), seconds)
+
+def callback_body(dependency: dict) -> dict:
+    """
+    Given a callback from the app's /_dash-dependencies, returns the body of the request a
+    browser sends to fire it when the page loads.
+    """
+    output = dependency['output']
+    if output.startswith('..'):
+        outputs = [dict(zip(['id', 'property'], part.rsplit('.', 1))) for part in output[2:-2].split('...')]
+    else:
+        outputs = dict(zip(['id', 'property'], output.rsplit('.', 1)))
+
+    def with_values(items: list[dict]) -> list[dict]:
+        return [{**item, 'value': INPUT_VALUES.get(f"{item['id']}.{item['property']}")} for item in items]
+
+    inputs = with_values(dependency['inputs'])
+    return {'output': output, 'outputs': outputs, 'inputs': inputs, 'state': with_values(dependency.get('state', [])),
+            'changedPropIds': [f"{item['id']}.{item['property']}" for item in inputs]}
+
+def page_targets(base_url: str) -> list[Target]:
+    """
+    Given the URL of the dashboard, loads the page once and returns every request a page
+    load makes: the page, the static files it links to and one request per callback.
+
+    Args:
+        base_url: URL of the dashboard, e.g. http://localhost:8050/
+
+    Returns:
+        list[Target]: the requests of a page load
+    """
+    base_url = base_url.rstrip('/')
+    page = requests.get(f'{base_url}/', timeout=TIMEOUT_SECONDS)
+    page.raise_for_status()
+    targets = [Target('page', '/')]
+    for path in re.findall(r'(?:src|href)="(/[^"]+)"', page.text):
+        if path.startswith(('/assets/', '/_dash-component-suites/')):
+            targets.append(Target('asset', path))
+
+    dependencies = requests.get(f'{base_url}/_dash-dependencies', timeout=TIMEOUT_SECONDS)
+    dependencies.raise_for_status()
+    targets.extend(Target('callback', '/_dash-update-component', callback_body(dependency)) for dependency in dependencies.json())
+    return targets
+
+def send(session: requests.Session, base_url: str, target: Target) -> tuple[str, float, bool]:
+    """
+    Given a session, the URL of the dashboard and one request of a page load, sends the
+    request and returns its kind, its latency in seconds and whether it succeeded. A request
+    fails if it raises or its status is not 200.
+    """
+    began = time.perf_counter()
+    try:
+        if target.body is None:
+            response = session.get(f'{base_url}{target.path}', timeout=TIMEOUT_SECONDS)
+        else:
+            response = session.post(f'{base_url}{target.path}', json=target.body, timeout=TIMEOUT_SECONDS)
+        ok = response.status_code == 200
+    except requests.RequestException:
+        ok = False
+    return target.kind, time.perf_counter() - began, ok
+
+def warm_up(base_url: str, targets: list[Target]) -> list[tuple[str, float, bool]]:
+    """
+    Given the URL of the dashboard and the requests of a page load, loads the page once so
+    the server's caches are filled before a run is measured.
+
+    Returns:
+        list[tuple[str, float, bool]]: kind, latency and success of each request sent
+    """
+    base_url = base_url.rstrip('/')
+    with requests.Session() as session:
+        return [send(session, base_url, target) for target in targets]
+
+def run_load(base_url: str, targets: list[Target], clients: int, seconds: float) -> LoadReport:
+    """
+    Given the URL of the dashboard and the requests of a page load, has `clients` threads,
+    each with its own keep-alive session, load the page over and over for `seconds` seconds,
+    timing every request with send().
+
+    Args:
+        base_url: URL of the dashboard, e.g. http://localhost:8050/
+        targets: the requests of a page load, from page_targets
+        clients: number of concurrent clients
+        seconds: duration of the run
+
+    Returns:
+        LoadReport: throughput and latency percentiles of the run
+    """
+    base_url = base_url.rstrip('/')
+    results = []
+    lock = threading.Lock()
+    start = time.perf_counter()
+    deadline = start + seconds
+
+    def client() -> None:
+        session = requests.Session()
+        measured = []
+        while time.perf_counter() < deadline:
+            measured.extend(send(session, base_url, target) for target in targets)
+        session.close()
+        with lock:
+            results.extend(measured)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return LoadReport(results, time.perf_counter() - start, clients)
+
+def check_thresholds(report: LoadReport, max_p95_ms: float | None = None, max_p99_ms: float | None = None,
+                     min_throughput: float | None = None, max_error_rate: float | None = None) -> list[str]:
+    """
+    Given a load test report and regression thresholds (None to skip one), returns a message
+    for every threshold the run crossed, checking the percentiles of each kind of request.
+
+    Returns:
+        list[str]: the thresholds crossed, empty if the run passed
+    """
+    failures = []
+    for name, stats in [('all', report.total)] + list(report.kinds.items()):
+        if not stats.requests:
+            continue
+        if max_p95_ms is not None and stats.p95 > max_p95_ms:
+            failures.append(f"{name} p95 latency {stats.p95:.1f} ms is above {max_p95_ms} ms")
+        if max_p99_ms is not None and stats.p99 > max_p99_ms:
+            failures.append(f"{name} p99 latency {stats.p99:.1f} ms is above {max_p99_ms} ms")
+    if min_throughput is not None and report.total.throughput < min_throughput:
+        failures.append(f"throughput {report.total.throughput:.1f} requests/s is below {min_throughput}")
+    if max_error_rate is not None and report.total.error_rate > max_error_rate:
+        failures.append(f"error rate {report.total.error_rate:.2%} is above {max_error_rate:.2%}")
+    return failures
@@ -0,0 +1,372 @@
+"""
+Data access layer of the dashboard.
+
+Reads the GenBank records homework07 stores in Redis (hashes under <prefix>:rec:<ID>, indexed
+by sequence length and organism) and the structure summaries homework06 writes as JSON Lines,
+through one shared Redis connection pool. Aggregates over them are memoized in Redis with a
+TTL, and so are the figures built from them, as ready to send JSON, so every worker process
+shares them and a page load after the first only reads a few keys. Cache keys carry a
+generation number; invalidate() bumps it, which makes every cached value stale at once after
+new data is loaded, and the TTL removes the old values.
+"""
+import functools
+import json
+import math
+import os
+import re
+import threading
+import time
+import zlib
+from typing import Callable
+import plotly.graph_objects as go
+import plotly.io as pio
+import redis
+
+# -------------------------
+# Constants (configuration)
+# -------------------------
+REDIS_HOST = os.environ.get('REDIS_HOST', '127.0.0.1')
+REDIS_PORT = int(os.environ.get('REDIS_PORT', 6379))
+REDIS_DB = int(os.environ.get('REDIS_DB', 1))
+KEY_PREFIX = os.environ.get('GENBANK_PREFIX', 'genbank')
+STRUCTURE_SUMMARIES = os.environ.get('STRUCTURE_SUMMARIES', '')
+
+CACHE_PREFIX = 'dash:cache'
+CACHE_TTL_SECONDS = int(os.environ.get('CACHE_TTL_SECONDS', 300))
+LENGTH_BINS = 30
+PAGE_SIZE = 25
+
+# one condition of a DataTable filter query, e.g. {length} >= 300 or {organism} contains "Zea"
+FILTER_PART = re.compile(r'\{(?P<column>\w+)\}\s*(?P<operator>>=|<=|>|<|=|eq|ge|le|gt|lt|contains)\s*(?P<value>.+)')
+
+# -------------------------
+# Classes
+# -------------------------
+class CacheStats:
+    """
+    Hits and misses of the memoized values in this process, counted across threads.
+    """
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def count(self, hit: bool) -> None:
+        with self.lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+class RecordFilter:
+    """
+    Conditions of the record table's filter query that the indexes can answer: a sequence
+    length range and an organism, matched exactly or by a case-insensitive substring.
+    """
+    def __init__(self, min_length: int | None = None, max_length: int | None = None, organism: str | None = None,
+                 organism_exact: bool = False):
+        self.min_length = min_length
+        self.max_length = max_length
+        self.organism = organism
+        self.organism_exact = organism_exact
+
+    def matches_organism(self, organism: str) -> bool:
+        if self.organism_exact:
+            return organism == self.organism
+        return self.organism.lower() in organism.lower()
+
+class DataLayer:
+    """
+    Memoized queries and figures of the GenBank records stored in Redis under a key prefix,
+    and of the structure summaries in a JSON Lines file.
+    """
+    def __init__(self, rd: redis.Redis, prefix: str = KEY_PREFIX, ttl: int = CACHE_TTL_SECONDS,
+                 structure_file: str = STRUCTURE_SUMMARIES):
+        self.rd = rd
+        self.prefix = prefix
+        self.ttl = ttl
+        self.structure_file = structure_file
+        self.length_key = f'{prefix}:idx:length'
+        self.generation_key = f'{CACHE_PREFIX}:{prefix}:generation'
+        self.stats = CacheStats()
+
+    def memoized(self, name: str, compute: Callable[[], object], *args: object) -> object:
+        """
+        Given the name of a value, a function that computes it and the arguments it depends
+        on, returns the value cached in Redis for the current generation, or computes it and
+        caches it for ttl seconds.
+
+        Args:
+            name: name of the value, unique among the memoized values
+            compute: function that computes the value as something JSON can encode
+            args: arguments the value depends on, which become part of its key
+
+        Returns:
+            object: the value, decoded from JSON
+        """
+        generation = int(self.rd.get(self.generation_key) or 0)
+        key = f'{CACHE_PREFIX}:{self.prefix}:{generation}:{name}:{json.dumps(args)}'
+        cached = self.rd.get(key)
+        self.stats.count(cached is not None)
+        if cached is not None:
+            return json.loads(cached)
+
+        value = compute()
+        self.rd.set(key, json.dumps(value), ex=self.ttl)
+        return value
+
+    def invalidate(self) -> int:
+        """
+        Makes every memoized value stale, e.g. after new records are loaded.
+
+        Returns:
+            int: the new cache generation
+        """
+        return self.rd.incr(self.generation_key)
+
+    def genbank_overview(self) -> dict:
+        """
+        Returns the number of stored GenBank records and the number of records of each
+        organism, largest first.
+        """
+        def compute() -> dict:
+            pattern = f'{self.prefix}:idx:organism:'
+            keys = list(self.rd.scan_iter(match=f'{pattern}*', count=1000))
+            pipe = self.rd.pipeline(transaction=False)
+            pipe.zcard(self.length_key)
+            for key in keys:
+                pipe.scard(key)
+            total, *counts = pipe.execute()
+            organisms = {key.decode().removeprefix(pattern): count for key, count in zip(keys, counts)}
+            return {'records': total, 'organisms': dict(sorted(organisms.items(), key=lambda item: (-item[1], item[0])))}
+        return self.memoized('genbank_overview', compute)
+
+    def length_histogram(self, bins: int = LENGTH_BINS) -> dict:
+        """
+        Given a number of bins, returns the histogram of the stored sequence lengths, counted
+        with one ZCOUNT per bin on the length index rather than by reading every length.
+
+        Returns:
+            dict: the lower edge of every bin, the bin width and the number of records in each bin
+        """
+        def compute() -> dict:
+            shortest = self.rd.zrange(self.length_key, 0, 0, withscores=True)
+            longest = self.rd.zrange(self.length_key, -1, -1, withscores=True)
+            if not shortest:
+                return {'edges': [], 'width': 0, 'counts': []}
+            low, high = int(shortest[0][1]), int(longest[0][1])
+            width = max(1, -(-(high - low + 1) // bins))
+            edges = list(range(low, high + 1, width))
+            pipe = self.rd.pipeline(transaction=False)
+            for edge in edges:
+                pipe.zcount(self.length_key, edge, f'({edge + width}')
+            return {'edges': edges, 'width': width, 'counts': pipe.execute()}
+        return self.memoized('length_histogram', compute, bins)
+
+    def structure_rows(self) -> list[dict]:
+        """
+        Returns one row per structure summarized in the JSON Lines file: its entry ID and the
+        number of chains and of total, standard and hetero residues (entries that failed to
+        summarize are left out, as is everything when there is no file).
+        """
+        def compute() -> list[dict]:
+            if not self.structure_file or not os.path.exists(self.structure_file):
+                return []
+            rows = []
+            with open(self.structure_file) as f:
+                for line in f:
+                    record = json.loads(line) if line.strip() else {}
+                    if 'summary' not in record:
+                        continue
+                    chains = record['summary']['chains']
+                    rows.append({
+                        'entry_id': record['entry_id'],
+                        'chains': len(chains),
+                        'total_residues': sum(chain['total_residues'] for chain in chains),
+                        'standard_residues': sum(chain['standard_residues'] for chain in chains),
+                        'hetero_residues': sum(chain['hetero_residue_count'] for chain in chains)
+                    })
+            return sorted(rows, key=lambda row: row['entry_id'])
+        return self.memoized('structure_rows', compute, self.structure_file)
+
+    def length_figure(self) -> dict:
+        """
+        Returns the sequence length histogram figure, as JSON ready for a dcc.Graph.
+        """
+        def compute() -> dict:
+            histogram = self.length_histogram()
+            figure = go.Figure(go.Bar(x=[edge + histogram['width'] / 2 for edge in histogram['edges']], y=histogram['counts'],
+                                      width=histogram['width']))
+            figure.update_layout(title='Sequence lengths', xaxis_title='residues', yaxis_title='records')
+            return json.loads(pio.to_json(figure))
+        return self.memoized('figure:length', compute)
+
+    def organism_figure(self, top: int = 20) -> dict:
+        """
+        Given a number of organisms, returns the figure of the organisms with the most stored
+        records, as JSON ready for a dcc.Graph.
+        """
+        def compute() -> dict:
+            organisms = list(self.genbank_overview()['organisms'].items())[:top]
+            figure = go.Figure(go.Bar(x=[count for _, count in organisms], y=[name for name, _ in organisms], orientation='h'))
+            figure.update_layout(title='Records per organism', xaxis_title='records', yaxis={'autorange': 'reversed'})
+            return json.loads(pio.to_json(figure))
+        return self.memoized('figure:organism', compute, top)
+
+    def organism_view(self, organisms: list[str]) -> str:
+        """
+        Given organisms, returns the key of a sorted set of their records scored by sequence
+        length: the length index intersected with their sets on the server. The view is kept
+        for ttl seconds in the current cache generation, so paging through it does not build
+        it again.
+        """
+        view_key = f'{CACHE_PREFIX}:{self.prefix}:{int(self.rd.get(self.generation_key) or 0)}:view:{json.dumps(sorted(organisms))}'
+        if self.rd.exists(view_key):
+            return view_key
+
+        # a set member scores 1, so a weight of 0 keeps the length as the score
+        union_key = f'{view_key}:union'
+        pipe = self.rd.pipeline(transaction=True)
+        pipe.sunionstore(union_key, [f'{self.prefix}:idx:organism:{organism}' for organism in organisms])
+        pipe.zinterstore(view_key, {self.length_key: 1, union_key: 0})
+        pipe.delete(union_key)
+        pipe.expire(view_key, self.ttl)
+        pipe.execute()
+        return view_key
+
+    def record_page(self, page: int, page_size: int = PAGE_SIZE, descending: bool = False, filter_query: str = '') -> tuple[list[dict], int]:
+        """
+        Given a page number and size, a sort direction and a DataTable filter query, returns
+        the rows of the page of stored records, sorted by sequence length (then ID), and the
+        number of matching records. The page is located by rank in the length index (or an
+        organism view of it) with ZCOUNT and read with one ZRANGE and one HMGET per row, so a
+        page costs the same however many records are stored; sequences are not read.
+
+        Args:
+            page: number of the page, from 0
+            page_size: number of rows per page
+            descending: whether the longest sequences come first
+            filter_query: DataTable filter query on the length and organism columns
+
+        Returns:
+            tuple[list[dict], int]: rows of the page and number of matching records
+        """
+        record_filter = parse_filter(filter_query)
+        key = self.length_key
+        if record_filter.organism is not None:
+            organisms = [name for name in self.genbank_overview()['organisms'] if record_filter.matches_organism(name)]
+            if not organisms:
+                return [], 0
+            key = self.organism_view(organisms)
+
+        low = '-inf' if record_filter.min_length is None else record_filter.min_length
+        high = '+inf' if record_filter.max_length is None else record_filter.max_length
+        pipe = self.rd.pipeline(transaction=False)
+        pipe.zcount(key, low, high)
+        if descending:
+            pipe.zcount(key, f'({high}', '+inf')
+        else:
+            pipe.zcount(key, '-inf', f'({low}')
+        total, before = pipe.execute()
+
+        start = before + page * page_size
+        stop = before + min(total, (page + 1) * page_size) - 1
+        if stop < start:
+            return [], total
+        record_ids = (self.rd.zrevrange if descending else self.rd.zrange)(key, start, stop)
+
+        pipe = self.rd.pipeline(transaction=False)
+        for record_id in record_ids:
+            pipe.hmget(f'{self.prefix}:rec:{record_id.decode()}', 'name', 'description', 'organism', 'length')
+        rows = []
+        for record_id, fields in zip(record_ids, pipe.execute()):
+            if fields[0] is None:
+                continue
+            name, description, organism, length = (field.decode() for field in fields)
+            rows.append({'id': record_id.decode(), 'name': name, 'description': description, 'organism': organism, 'length': int(length)})
+        return rows, total
+
+    def sequence(self, record_id: str) -> str | None:
+        """
+        Given a record ID, returns its sequence, or None if the record is not stored.
+        """
+        compressed = self.rd.hget(f'{self.prefix}:rec:{record_id}', 'sequence')
+        return None if compressed is None else zlib.decompress(compressed).decode()
+
+# -------------------------
+# Functions
+# -------------------------
+def make_redis_client(host: str = REDIS_HOST, port: int = REDIS_PORT, db: int = REDIS_DB) -> redis.Redis:
+    """
+    Given a Redis host, port and database number, returns a client backed by one connection
+    pool, shared by every callback and thread of the app.
+
+    Args:
+        host: host name of the Redis server
+        port: port of the Redis server
+        db: number of the Redis database
+
+    Returns:
+        redis.Redis: client using a shared connection pool
+    """
+    pool = redis.ConnectionPool(host=host, port=port, db=db)
+    return redis.Redis(connection_pool=pool)
+
+def parse_filter(filter_query: str) -> RecordFilter:
+    """
+    Given a DataTable filter query (conditions joined by ' && '), returns the length range
+    and organism it asks for, raising ValueError for a condition the indexes cannot answer.
+
+    Args:
+        filter_query: e.g. '{length} >= 300 && {organism} contains "Zea"'
+
+    Returns:
+        RecordFilter: the conditions of the query
+    """
+    record_filter = RecordFilter()
+    for part in filter(None, (part.strip() for part in filter_query.split(' && '))):
+        match = FILTER_PART.fullmatch(part)
+        if match is None:
+            raise ValueError(f"Cannot filter by '{part}'")
+        column, operator, value = match['column'], match['operator'], match['value'].strip().strip('"\'`')
+
+        if column == 'length' and operator != 'contains':
+            try:
+                number = float(value)
+            except ValueError:
+                raise ValueError(f"'{value}' is not a sequence length")
+            # lengths are whole numbers, so every bound is rounded to the nearest one inside it
+            if operator in ('>=', 'ge', '=', 'eq', '>', 'gt'):
+                low = math.floor(number) + 1 if operator in ('>', 'gt') else math.ceil(number)
+                record_filter.min_length = low if record_filter.min_length is None else max(low, record_filter.min_length)
+            if operator in ('<=', 'le', '=', 'eq', '<', 'lt'):
+                high = math.ceil(number) - 1 if operator in ('<', 'lt') else math.floor(number)
+                record_filter.max_length = high if record_filter.max_length is None else min(high, record_filter.max_length)
+        elif column == 'organism' and operator in ('=', 'eq', 'contains'):
+            record_filter.organism = value
+            record_filter.organism_exact = operator != 'contains'
+        else:
+            raise ValueError(f"Cannot filter by '{part}'; filter by length or organism")
+    return record_filter
+
+def timed(stats: CacheStats, log: Callable[[str], None]) -> Callable:
+    """
+    Given cache stats and a logging function, returns a decorator that logs how long each
+    call of the function it wraps (e.g. a Dash callback) takes, and the cache hit rate so far.
+    """
+    def decorator(function: Callable) -> Callable:
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                log(f"{function.__name__} took {(time.perf_counter() - start) * 1000:.1f} ms; "
+                    f"cache hit rate {stats.hit_rate:.0%} ({stats.hits} hits, {stats.misses} misses)")
+        return wrapper
+    return decorator
@@ -0,0 +1,24 @@
+"""
+gunicorn settings for serving the dashboard in production (gunicorn reads this file from the
+working directory): `gunicorn app:server`.
+
+Several worker processes, each with a few threads, serve requests at once. The app is loaded
+once before the workers are forked, so they share its code pages and start quickly; each
+worker opens its own Redis connections. The number of workers and threads are set with the
+WEB_WORKERS and WEB_THREADS environment variables.
+"""
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 8050)}"
+workers = int(os.environ.get('WEB_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('WEB_THREADS', 4))
+worker_class = 'gthread'
+preload_app = True
+timeout = int(os.environ.get('WEB_TIMEOUT', 60))
+keepalive = 5
+loglevel = os.environ.get('LOGLEVEL', 'INFO').lower()
+accesslog = os.environ.get('ACCESS_LOG') or None
+
+# the containers run as a user without a writable home directory, where the control socket would go
+control_socket_disable = True
@@ -0,0 +1,21 @@
+import shutil
+import sys
+from pathlib import Path
+import pytest
+
+# make the app modules and load test helpers importable, and homework07 (whose RecordStore
+# writes the records the dashboard reads) with its benchmark helpers
+HOMEWORK_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(HOMEWORK_DIR))
+sys.path.insert(0, str(HOMEWORK_DIR / 'benchmarks'))
+sys.path.insert(0, str(HOMEWORK_DIR.parent / 'homework07'))
+sys.path.insert(0, str(HOMEWORK_DIR.parent / 'homework07' / 'benchmarks'))
+
+@pytest.fixture
+def redis_port():
+    # tests that need Redis run against a throwaway local redis-server
+    bench_utils = pytest.importorskip('bench_utils')
+    if shutil.which('redis-server') is None:
+        pytest.skip('redis-server is not installed')
+    with bench_utils.local_redis_server() as port:
+        yield port
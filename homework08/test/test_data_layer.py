@@ -0,0 +1,74 @@
+import json
+import pytest
+
+data_layer = pytest.importorskip('data_layer')
+redis_store = pytest.importorskip('redis_store')
+
+def test_aggregates_are_memoized_until_invalidated(redis_port, tmp_path):
+    from bench_utils import make_synthetic_summaries
+    rd = data_layer.make_redis_client(port=redis_port)
+    summaries = make_synthetic_summaries(3000, length=400)
+    store = redis_store.RecordStore(rd)
+    store.save(summaries[:2000], 'term')
+
+    structures = tmp_path / 'summaries.jsonl'
+    structures.write_text(
+        json.dumps({'entry_id': '4HHB', 'file': '4HHB.cif', 'summary': {'chains': [
+            {'chain_id': 'A', 'total_residues': 198, 'standard_residues': 141, 'hetero_residue_count': 57},
+            {'chain_id': 'B', 'total_residues': 205, 'standard_residues': 146, 'hetero_residue_count': 59}]}}) + '\n' +
+        json.dumps({'entry_id': '1BAD', 'file': '1BAD.cif', 'error': 'no atoms'}) + '\n'
+    )
+    data = data_layer.DataLayer(rd, structure_file=str(structures))
+
+    overview = data.genbank_overview()
+    assert overview['records'] == 2000
+    assert overview['organisms'] == {organism: sum(s['Organism'] == organism for s in summaries[:2000]) for organism in overview['organisms']}
+    histogram = data.length_histogram()
+    assert sum(histogram['counts']) == 2000
+    assert data.structure_rows() == [{'entry_id': '4HHB', 'chains': 2, 'total_residues': 403, 'standard_residues': 287, 'hetero_residues': 116}]
+    length_figure = data.length_figure()
+    assert length_figure['data'][0]['type'] == 'bar'
+
+    # a repeat load is served from the cache, even after more records arrive, until invalidated
+    hits, misses = data.stats.hits, data.stats.misses
+    store.save(summaries[2000:], 'term')
+    assert data.genbank_overview() == overview
+    assert data.length_figure() == length_figure
+    assert (data.stats.hits, data.stats.misses) == (hits + 2, misses)
+
+    data.invalidate()
+    assert data.genbank_overview()['records'] == 3000
+    assert sum(data.length_histogram()['counts']) == 3000
+    assert data.stats.misses == misses + 2
+    assert all(rd.ttl(key) > 0 for key in rd.scan_iter('dash:cache:genbank:*:*:*'))
+
+def test_record_pages_match_a_sorted_filtered_list(redis_port):
+    from bench_utils import make_synthetic_summaries
+    rd = data_layer.make_redis_client(port=redis_port)
+    summaries = make_synthetic_summaries(1000, length=400)
+    redis_store.RecordStore(rd).save(summaries)
+    data = data_layer.DataLayer(rd)
+
+    def expected(descending=False, low=0, high=10 ** 9, organisms=None):
+        matching = [s for s in summaries if low <= len(s['Sequence']) <= high and (organisms is None or s['Organism'] in organisms)]
+        matching.sort(key=lambda s: (len(s['Sequence']), s['ID']), reverse=descending)
+        return [s['ID'] for s in matching]
+
+    def page_ids(*args, **kwargs):
+        rows, total = data.record_page(*args, **kwargs)
+        return [row['id'] for row in rows], total
+
+    assert page_ids(0, 25) == (expected()[:25], 1000)
+    assert page_ids(39, 25) == (expected()[975:], 1000)
+    assert page_ids(40, 25) == ([], 1000)
+    assert page_ids(3, 10, filter_query='{length} >= 300 && {length} < 500') == (expected(low=300, high=499)[30:40], len(expected(low=300, high=499)))
+    assert page_ids(2, 10, descending=True, filter_query='{length} le 500 && {organism} contains "zea"') == \
+        (expected(True, high=500, organisms=['Zea mays'])[20:30], len(expected(high=500, organisms=['Zea mays'])))
+    assert page_ids(0, 10, filter_query='{organism} = Oryza') == ([], 0)
+    assert page_ids(1, 10, filter_query='{organism} contains a') == (expected(organisms=['Arabidopsis thaliana', 'Oryza sativa', 'Zea mays'])[10:20], 1000)
+
+    # rows carry no sequence; it is read for one record at a time
+    row = data.record_page(0, 1)[0][0]
+    assert 'sequence' not in row and row['length'] == len(data.sequence(row['id']))
+    with pytest.raises(ValueError):
+        data.record_page(0, 10, filter_query='{name} contains x')
@@ -0,0 +1,44 @@
+import threading
+import pytest
+
+load_utils = pytest.importorskip('load_utils')
+
+def test_percentiles_and_thresholds():
+    assert load_utils.percentile([], 95) == 0.0
+    ordered = [i / 1000 for i in range(1, 101)]
+    assert [load_utils.percentile(ordered, q) for q in [50, 95, 99, 100]] == [0.05, 0.095, 0.099, 0.1]
+
+    results = [('page', latency, True) for latency in ordered] + [('callback', 0.5, False)]
+    report = load_utils.LoadReport(results, seconds=2.0, clients=1)
+    assert (report.total.requests, report.total.errors, report.total.throughput) == (101, 1, 50.5)
+    assert report.kinds['asset'].requests == 0
+    assert load_utils.check_thresholds(report, max_p95_ms=500, max_error_rate=0.01) == []
+    failures = load_utils.check_thresholds(report, max_p95_ms=96, min_throughput=100, max_error_rate=0)
+    assert len(failures) == 3 and 'callback p95' in ' '.join(failures)
+
+def test_load_run_covers_page_assets_and_callbacks(redis_port, monkeypatch):
+    from werkzeug.serving import make_server
+    app = pytest.importorskip('app')
+    data_layer = pytest.importorskip('data_layer')
+    monkeypatch.setattr(app, 'data', data_layer.DataLayer(data_layer.make_redis_client(port=redis_port)))
+
+    server = make_server('127.0.0.1', 0, app.server, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        url = f'http://127.0.0.1:{server.server_port}/'
+        targets = load_utils.page_targets(url)
+        assert {target.kind for target in targets} == {'page', 'asset', 'callback'}
+        assert len([target for target in targets if target.kind == 'callback']) == len(app.app.callback_map)
+
+        # the warm-up loads the page once, sending every request of it
+        warmed = load_utils.warm_up(url, targets)
+        assert [kind for kind, _, _ in warmed] == [target.kind for target in targets]
+        assert all(ok for _, _, ok in warmed)
+
+        report = load_utils.run_load(url, targets, clients=2, seconds=1.0)
+        assert report.total.requests >= len(targets) and report.total.errors == 0
+        assert all(report.kinds[kind].requests for kind in load_utils.KINDS)
+        assert report.total.p50 <= report.total.p95 <= report.total.p99 <= report.total.max
+    finally:
+        server.shutdown()
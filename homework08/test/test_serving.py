@@ -0,0 +1,22 @@
+import gzip
+import re
+import pytest
+
+pytest.importorskip('flask_compress')
+app = pytest.importorskip('app')
+
+def test_responses_are_compressed_and_static_files_cached():
+    client = app.server.test_client()
+    response = client.get('/', headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert not app.server.debug
+
+    # versioned assets and component files are cached for a year; unversioned ones are not
+    urls = re.findall(r'(?:src|href)="([^"]+)"', gzip.decompress(response.data).decode())
+    static = [url for url in urls if url.startswith(('/assets/', '/_dash-component-suites/'))]
+    assert any(url.startswith('/assets/dashboard.css?m=') for url in static)
+    for url in static:
+        cache_control = client.get(url).headers['Cache-Control']
+        assert 'max-age=31536000' in cache_control and 'immutable' in cache_control and 'no-cache' not in cache_control
+    assert 'max-age' not in client.get('/assets/dashboard.css').headers.get('Cache-Control', '')